@@ -0,0 +1,162 @@
+"""
+Command-line entry point for the VR sign language evaluation analysis.
+
+    python analysis_cli.py stats        descriptive statistics, learning outcomes, correlations
+    python analysis_cli.py reaction     Kirkpatrick Level 1 reaction metrics
+    python analysis_cli.py qualitative  interview themes (reads no CSV)
+    python analysis_cli.py search QUERY interviews matching a query, e.g. 'theme:"controller difficulty"'
+    python analysis_cli.py inference    bootstrap CIs and permutation p-values (--resamples, --seed, --workers)
+    python analysis_cli.py figures      render figures (--figures, --profile, --workers)
+    python analysis_cli.py report       executive summary report
+
+Only argparse is imported up front. Each subcommand loads the data sources and
+libraries it needs when it runs, so a `qualitative` query never imports pandas
+and only `figures` imports matplotlib.
+"""
+import argparse
+import sys
+
+from data_cache import CACHE_DIR
+
+
+def _analyzer(args):
+    from data_analysis_script import VRSignLanguageDataAnalyzer
+    return VRSignLanguageDataAnalyzer(chunksize=args.chunksize, cache_dir=None if args.no_cache else CACHE_DIR,
+                                      state_file=args.state_file)
+
+
+def run_stats(args):
+    analyzer = _analyzer(args)
+    if not analyzer.load_data(interviews=False):
+        return 1
+    analyzer.descriptive_statistics()
+    analyzer.learning_outcomes_analysis()
+    analyzer.correlation_analysis()
+    return 0
+
+
+def run_reaction(args):
+    analyzer = _analyzer(args)
+    if not analyzer.load_data(interviews=False):
+        return 1
+    analyzer.reaction_analysis()
+    return 0
+
+
+def run_qualitative(args):
+    analyzer = _analyzer(args)
+    if not analyzer.load_data(students=False):
+        return 1
+    analyzer.qualitative_analysis(args.workers)
+    return 0
+
+
+def run_search(args):
+    analyzer = _analyzer(args)
+    try:
+        matches = analyzer.search_interviews(' '.join(args.query))
+    except ValueError as e:
+        print(f"✗ {e}")
+        return 2
+    for match in matches:
+        owner = match.get('Student_ID') or match.get('Educator_ID')
+        detail = f"  {match['Role']}" if 'Role' in match else ''
+        print(f"{match['id']}\t{match['source']}\t{owner}{detail}")
+    print(f"✓ {len(matches)} matching interviews")
+    return 0
+
+
+def run_inference(args):
+    if args.resamples is not None and args.resamples < 1:
+        print(f"✗ --resamples must be at least 1, got {args.resamples}")
+        return 2
+    analyzer = _analyzer(args)
+    if not analyzer.load_data(interviews=False):
+        return 1
+    analyzer.resampling_analysis(args.resamples, args.seed, args.workers)
+    return 0
+
+
+def run_figures(args):
+    from figure_rendering import FIGURES, RESOLUTION_PROFILES, render_figures, select_figures
+    try:
+        names = select_figures(args.figures, FIGURES)
+    except ValueError as e:
+        print(f"✗ {e}")
+        return 2
+    if args.profile not in RESOLUTION_PROFILES:
+        print(f"✗ Unknown resolution profile '{args.profile}'; choose from {', '.join(RESOLUTION_PROFILES)}")
+        return 2
+    analyzer = _analyzer(args)
+    if not analyzer.load_data(interviews=False):
+        return 1
+    paths = render_figures(analyzer.summary, analyzer.features, names, profile=args.profile,
+                           workers=args.workers, cache=analyzer.figure_cache)
+    reused = analyzer.figure_cache.hits if analyzer.figure_cache else 0
+    print(f"✓ {len(paths)} figures saved ({args.profile} profile, {reused} unchanged and reused)")
+    return 0
+
+
+def run_report(args):
+    analyzer = _analyzer(args)
+    if not analyzer.load_data():
+        return 1
+    analyzer.generate_summary_report()
+    return 0
+
+
+def build_parser():
+    data = argparse.ArgumentParser(add_help=False)
+    data.add_argument('--chunksize', type=int, default=None,
+                      help="stream student_data.csv in chunks of this many rows")
+    data.add_argument('--no-cache', action='store_true',
+                      help="always re-parse the input files instead of using the binary cache")
+    data.add_argument('--state-file', default=None,
+                      help="keep statistics in this file and only read rows appended since the last run")
+
+    parser = argparse.ArgumentParser(description="VR sign language evaluation analysis")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('stats', parents=[data], help="descriptive statistics, learning outcomes and correlations") \
+        .set_defaults(run=run_stats)
+    commands.add_parser('reaction', parents=[data], help="VR reaction metrics (Kirkpatrick Level 1)") \
+        .set_defaults(run=run_reaction)
+    qualitative = commands.add_parser('qualitative', parents=[data], help="student and educator interview analysis")
+    qualitative.add_argument('--workers', type=int, default=None,
+                             help="transcript NLP processes (default: one per CPU, 1 runs in-process)")
+    qualitative.set_defaults(run=run_qualitative)
+    search = commands.add_parser('search', parents=[data], help="search the interview transcripts, themes and assessments")
+    search.add_argument('query', nargs='+',
+                        help='terms, "phrases", field:term (transcript, theme, assessment, source), '
+                             'prefix*, AND / OR / NOT and parentheses')
+    search.set_defaults(run=run_search)
+    inference = commands.add_parser('inference', parents=[data],
+                                    help="bootstrap CIs and permutation p-values of gains, effect sizes and correlations")
+    inference.add_argument('--resamples', type=int, default=None,
+                           help="bootstrap and permutation resamples (default: 1000)")
+    inference.add_argument('--seed', type=int, default=0,
+                           help="random seed; results are identical for any --workers")
+    inference.add_argument('--workers', type=int, default=None,
+                           help="resampling processes (default: one per CPU, 1 runs in-process)")
+    inference.set_defaults(run=run_inference)
+    figures = commands.add_parser('figures', parents=[data], help="render the evaluation figures")
+    # Names and profiles are checked when the command runs, so building the
+    # parser does not import matplotlib
+    figures.add_argument('--figures', nargs='+', default=None, metavar='NAME',
+                         help="render only these figures (default: all); see figure_rendering.FIGURES")
+    figures.add_argument('--profile', default='print',
+                         help="figure resolution profile: draft or print (default)")
+    figures.add_argument('--workers', type=int, default=None,
+                         help="rendering processes (default: one per CPU, 1 renders in-process)")
+    figures.set_defaults(run=run_figures)
+    commands.add_parser('report', parents=[data], help="executive summary report") \
+        .set_defaults(run=run_report)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
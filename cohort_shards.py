@@ -0,0 +1,211 @@
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+from cohort_statistics import CohortSummary
+from data_cache import CACHE_DIR, DataCache
+from data_ingestion import DEFAULT_CHUNKSIZE, GAIN_COLUMNS, add_learning_gains, read_student_chunks
+from likert_histograms import LikertHistogram, likert_levels
+from paired_tests import PairedTestAccumulator, paired_tests_from_summary
+from process_pool import process_pool
+from result_store import ResultStore
+
+SHARD_DB_FILE = 'shard_results.db'
+# Same groupings as detailed_data_analysis.DEFAULT_TEST_GROUPS
+SHARD_TEST_GROUPS = [['Gender'], ['Grade_Level']]
+# Shard label of the statistics reduced over every shard
+ALL_SHARDS = 'All'
+
+
+def discover_shards(sources):
+    """
+    Cohort CSV files named by `sources`: directories (searched recursively for
+    *.csv), glob patterns or plain paths. Sorted and without duplicates, so
+    the reduce order, and with it the result, does not depend on the listing.
+    """
+    paths = set()
+    for source in [sources] if isinstance(sources, str) else sources:
+        if os.path.isdir(source):
+            paths.update(glob.glob(os.path.join(source, '**', '*.csv'), recursive=True))
+        else:
+            paths.update(glob.glob(source, recursive=True))
+    return sorted(os.path.abspath(path) for path in paths)
+
+
+def shard_names(paths):
+    """
+    Short label per shard: its path relative to the common directory, without
+    '.csv'; when every file has the same name (school_1/student_data.csv, ...)
+    just the directory.
+    """
+    if len(paths) == 1:
+        return [os.path.splitext(os.path.basename(paths[0]))[0]]
+    root = os.path.commonpath([os.path.dirname(path) for path in paths])
+    if len({os.path.basename(path) for path in paths}) == 1:
+        return [os.path.relpath(os.path.dirname(path), root) for path in paths]
+    return [os.path.splitext(os.path.relpath(path, root))[0] for path in paths]
+
+
+class ShardStatistics:
+    """
+    Mergeable sufficient statistics of one cohort file (the map output) or of
+    several files merged together (the reduce output).
+
+    Holds the `CohortSummary` plus per-group `PairedTestAccumulator`s and
+    `LikertHistogram`s, i.e. the state `IncrementalStatistics` keeps, without
+    the plotting sample: a uniform sample cannot be rebuilt exactly from
+    per-shard samples, and no shard result needs one. It also keeps a hash of
+    every Student_ID, so the reduce can count students that appear in more
+    than one shard (`duplicates`, by the name of the shard merged in) instead
+    of silently counting them twice.
+    """
+
+    def __init__(self, name, test_groups=()):
+        self.name = name
+        self.test_groups = [list(keys) for keys in test_groups]
+        self.summary = CohortSummary()
+        self.group_tests = [PairedTestAccumulator(by=keys) for keys in self.test_groups]
+        self.group_reactions = [LikertHistogram(by=keys) for keys in self.test_groups]
+        self.ids = np.empty(0, dtype=np.uint64)
+        self.duplicates = {}
+
+    @property
+    def rows(self):
+        return self.summary.n
+
+    def update(self, chunk):
+        """Fold a chunk with gain columns into every accumulator"""
+        self.summary.update(chunk)
+        ids = pd.util.hash_pandas_object(chunk['Student_ID'], index=False).to_numpy()
+        self.ids = np.union1d(self.ids, ids)
+        for accumulator in self.group_tests + self.group_reactions:
+            accumulator.update(chunk)
+        return self
+
+    def merge(self, other):
+        """Fold the statistics of another shard with the same test groups into these"""
+        shared = len(np.intersect1d(self.ids, other.ids, assume_unique=True))
+        if shared:
+            self.duplicates[other.name] = shared
+        self.ids = np.union1d(self.ids, other.ids)
+        self.summary.merge(other.summary)
+        for mine, theirs in zip(self.group_tests + self.group_reactions, other.group_tests + other.group_reactions):
+            mine.merge(theirs)
+        return self
+
+    def tables(self):
+        """Result tables of these rows, named as the tables of detailed_data_analysis.py"""
+        tables = {
+            'descriptive_stats': self.summary.describe().rename_axis('Statistic'),
+            'paired_tests': paired_tests_from_summary(self.summary),
+            'reaction_levels': likert_levels(self.summary.likert_counts()),
+            'correlations': self.summary.correlations.results(),
+            'subgroup_cube': self.summary.cube.table()
+        }
+        for accumulator in self.group_tests:
+            tables['_'.join(key.lower() for key in accumulator.by) + '_paired_tests'] = accumulator.results()
+        for histogram in self.group_reactions:
+            tables['_'.join(key.lower() for key in histogram.by) + '_reaction_levels'] = histogram.results()
+        return tables
+
+
+def summarize_shard(task):
+    """Map step: (name, path, chunksize, test_groups, cache_dir) -> ShardStatistics of that file"""
+    name, path, chunksize, test_groups, cache_dir = task
+    statistics = ShardStatistics(name, test_groups)
+    cache = DataCache(cache_dir) if cache_dir else None
+    try:
+        for chunk in read_student_chunks(path, chunksize, cache=cache):
+            statistics.update(add_learning_gains(chunk))
+    except Exception as e:
+        raise ValueError(f"{path}: {e}") from e
+    return statistics
+
+
+def map_reduce_shards(paths, chunksize=DEFAULT_CHUNKSIZE, test_groups=None, cache_dir=CACHE_DIR, workers=None):
+    """
+    Summarize every file on `workers` processes (one per CPU by default, 1 runs
+    in-process) and reduce the shards in path order. Returns (combined
+    statistics, statistics per shard); the combined statistics equal those of
+    one run over the concatenated files exactly, whatever the number of
+    workers. Students found in an earlier shard are listed in
+    `combined.duplicates`.
+    """
+    test_groups = SHARD_TEST_GROUPS if test_groups is None else test_groups
+    tasks = [(name, path, chunksize, test_groups, cache_dir) for name, path in zip(shard_names(paths), paths)]
+    if workers is None:
+        workers = min(len(tasks), os.cpu_count() or 1)
+    if workers <= 1 or len(tasks) <= 1:
+        shards = [summarize_shard(task) for task in tasks]
+    else:
+        with process_pool(workers) as pool:
+            shards = list(pool.map(summarize_shard, tasks))
+    # Reduced in path order, whichever shard finished first
+    combined = ShardStatistics(ALL_SHARDS, test_groups)
+    for statistics in shards:
+        combined.merge(statistics)
+    return combined, shards
+
+
+def shard_tables(combined, shards):
+    """Each result table over all shards, with a leading Shard level ('All' for the combined rows)"""
+    tables = {}
+    for statistics in [combined] + shards:
+        if statistics.rows == 0:
+            continue
+        for name, table in statistics.tables().items():
+            tables.setdefault(name, {})[statistics.name] = table
+    return {name: pd.concat(parts, names=['Shard']) for name, parts in tables.items()}
+
+
+def write_shard_results(tables, db_path=SHARD_DB_FILE):
+    """Write every table as `shard_<name>` to `db_path` in one transaction"""
+    store = ResultStore(db_path)
+    try:
+        with store.transaction():
+            for name, table in tables.items():
+                store.write_results(f'shard_{name}', table)
+    finally:
+        store.close()
+
+
+def shard_overview(combined, shards):
+    """Students, mean gains and mean overall VR satisfaction per shard, combined last"""
+    columns = GAIN_COLUMNS + ['VR_Satisfaction_Overall']
+    rows = {statistics.name: [statistics.rows] + [statistics.summary.mean(col) if statistics.rows else float('nan')
+                                                  for col in columns]
+            for statistics in shards + [combined]}
+    return pd.DataFrame.from_dict(rows, orient='index', columns=['Students'] + columns).rename_axis('Shard')
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Evaluate many student_data.csv-shaped cohort files at once")
+    parser.add_argument('sources', nargs='+', help="directories (searched for *.csv), glob patterns or files")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="shard processes (default: one per CPU, 1 runs in-process)")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help="rows per chunk read from a shard")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="always re-parse the input files instead of using the binary cache")
+    parser.add_argument('--db', default=SHARD_DB_FILE, help="SQLite database of the shard_* result tables")
+    args = parser.parse_args()
+
+    paths = discover_shards(args.sources)
+    if not paths:
+        print(f"✗ No cohort files found in {', '.join(args.sources)}")
+        raise SystemExit(1)
+    print(f"Cohort shards: {len(paths)}")
+    combined, shards = map_reduce_shards(paths, args.chunksize, cache_dir=None if args.no_cache else CACHE_DIR,
+                                         workers=args.workers)
+    if combined.duplicates:
+        for name, count in combined.duplicates.items():
+            print(f"✗ {name}: {count} Student_IDs already seen in an earlier shard")
+        print(f"✗ {sum(combined.duplicates.values())} students would be counted twice; remove overlapping shards")
+        raise SystemExit(1)
+    print(shard_overview(combined, shards).round(2).to_string())
+    print("\nPaired tests over all shards:")
+    print(paired_tests_from_summary(combined.summary).round(4).to_string())
+    write_shard_results(shard_tables(combined, shards), args.db)
+    print(f"✓ {combined.rows} students in {len(shards)} shards reduced; results saved to {args.db}")
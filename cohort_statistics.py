@@ -0,0 +1,237 @@
+import numpy as np
+import pandas as pd
+
+from correlation_engine import HEATMAP_COLUMNS, PairwiseCorrelation, pairs_of
+from data_ingestion import GAIN_COLUMNS, POST_COLUMNS, PRE_COLUMNS, SUCCESS_THRESHOLDS, VR_COLUMNS, add_learning_gains
+from derived_columns import DerivedFrame
+from exact_sums import integer_values, means, variances
+from likert_histograms import LIKERT_LEVELS, likert_histogram
+from subgroup_cube import SubgroupCube
+
+NUMERIC_COLUMNS = ['Age', 'Grade_Level'] + PRE_COLUMNS + POST_COLUMNS + VR_COLUMNS + GAIN_COLUMNS
+COUNTED_COLUMNS = ['Gender'] + NUMERIC_COLUMNS
+# Joint counts of these two columns (with the sum of Age) back the binned satisfaction scatter plots
+SCATTER_COLUMNS = ['VR_Satisfaction_Overall', 'Vocabulary_Gain']
+
+
+class CohortSummary:
+    """
+    Mergeable one-pass summary of student data chunks.
+
+    Keeps the count and the exact integer sums and sums of squares of the
+    numeric columns (see `exact_sums`), so summaries of any split of the rows
+    merge to the same statistics, exact value counts of every bounded-domain column, the number of
+    rows flagged by each success-metric mask, joint counts of the scatter
+    columns, a `SubgroupCube` of the gain and reaction columns and a `PairwiseCorrelation` of the requested column pairs (by default
+    every pair of the heatmap columns), so every statistic printed by the
+    analysis scripts can be answered without holding the raw rows in memory.
+    """
+
+    def __init__(self, correlation_pairs=None, spearman=False):
+        self.n = 0
+        self.sums = np.zeros(len(NUMERIC_COLUMNS), dtype=np.int64)
+        self.squares = np.zeros(len(NUMERIC_COLUMNS), dtype=np.int64)
+        self.correlations = PairwiseCorrelation(correlation_pairs or pairs_of(HEATMAP_COLUMNS), spearman)
+        self.counts = {}
+        self.successes = dict.fromkeys(SUCCESS_THRESHOLDS, 0)
+        self.scatter = None  # (SCATTER_COLUMNS) -> [count, Age_sum]
+        self.cube = SubgroupCube()
+        self._index = {col: i for i, col in enumerate(NUMERIC_COLUMNS)}
+
+    @classmethod
+    def from_frame(cls, df):
+        """Summarize an in-memory data frame (or `DerivedFrame`) as a single chunk"""
+        summary = cls()
+        summary.update(df)
+        return summary
+
+    def update(self, chunk):
+        """Fold one chunk of rows (a data frame or `DerivedFrame`) into the summary"""
+        if len(chunk) == 0:
+            return self
+        frame = chunk if isinstance(chunk, DerivedFrame) else DerivedFrame(chunk)
+        for name in self.successes:
+            self.successes[name] += int(frame[name].sum())
+        chunk = frame.with_derived(GAIN_COLUMNS)
+
+        values = integer_values(chunk[NUMERIC_COLUMNS].to_numpy(dtype=np.float64))
+        self.n += len(chunk)
+        self.sums += values.sum(axis=0)
+        self.squares += (values * values).sum(axis=0)
+        self.correlations.update(chunk)
+
+        for col, counts in self._chunk_counts(chunk):
+            previous = self.counts.get(col)
+            self.counts[col] = counts if previous is None else previous.add(counts, fill_value=0).astype(np.int64)
+        self._add_scatter(chunk.groupby(SCATTER_COLUMNS, sort=False)['Age'].agg(['size', 'sum'])
+                          .set_axis(['count', 'Age_sum'], axis=1))
+
+        self.cube.update(chunk)
+        return self
+
+    def _chunk_counts(self, chunk):
+        """(column, value counts) of one chunk; all Likert columns share one histogram pass"""
+        ratings = chunk[VR_COLUMNS].to_numpy()
+        histogram = likert_histogram(ratings)[0]
+        in_range = histogram.sum(axis=1)
+        present = chunk[VR_COLUMNS].count().to_numpy()
+        for col in COUNTED_COLUMNS:
+            if col not in VR_COLUMNS:
+                counts = chunk[col].value_counts()
+            else:
+                i = VR_COLUMNS.index(col)
+                counts = pd.Series(histogram[i], index=pd.Index(range(1, LIKERT_LEVELS + 1), dtype=chunk[col].dtype),
+                                   name='count')
+                if in_range[i] < present[i]:
+                    # Off-scale ratings are rare; count them the slow way
+                    values = chunk[col]
+                    outside = values[(values < 1) | (values > LIKERT_LEVELS)].value_counts()
+                    counts = counts.add(outside, fill_value=0).astype(np.int64)
+            yield col, counts[counts > 0]
+
+    def merge(self, other):
+        """Fold another summary (e.g. from a different chunk range) into this one"""
+        if other.n == 0:
+            return self
+        self.n += other.n
+        self.sums += other.sums
+        self.squares += other.squares
+        self.correlations.merge(other.correlations)
+        for name, flagged in other.successes.items():
+            self.successes[name] += flagged
+        if other.scatter is not None:
+            self._add_scatter(other.scatter)
+        for col, counts in other.counts.items():
+            previous = self.counts.get(col)
+            self.counts[col] = counts if previous is None else previous.add(counts, fill_value=0).astype(np.int64)
+        self.cube.merge(other.cube)
+        return self
+
+    def _add_scatter(self, joint):
+        joint = joint.astype(np.float64)
+        self.scatter = joint if self.scatter is None else self.scatter.add(joint, fill_value=0)
+
+    # Point statistics
+
+    def mean(self, col):
+        i = self._index[col]
+        return means(self.n, self.sums[i])[()]
+
+    def var(self, col):
+        i = self._index[col]
+        return variances(self.n, self.sums[i], self.squares[i])[()]
+
+    def std(self, col):
+        return np.sqrt(self.var(col))
+
+    def value_counts(self, col):
+        """Counts per value, sorted by count like pandas `value_counts`"""
+        return self.counts[col].sort_values(ascending=False, kind='stable')
+
+    def min(self, col):
+        return self.counts[col].index.min()
+
+    def max(self, col):
+        return self.counts[col].index.max()
+
+    def count_at_least(self, col, threshold):
+        counts = self.counts[col]
+        return int(counts[counts.index >= threshold].sum())
+
+    def count_at_most(self, col, threshold):
+        counts = self.counts[col]
+        return int(counts[counts.index <= threshold].sum())
+
+    def count_equal(self, col, value):
+        return int(self.counts[col].get(value, 0))
+
+    def likert_counts(self, columns=None):
+        """One-row (column, rating) count frame of the Likert columns, as `LikertHistogram.counts`"""
+        columns = columns or VR_COLUMNS
+        ratings = range(1, LIKERT_LEVELS + 1)
+        values = [[int(self.counts[col].get(rating, 0)) for col in columns for rating in ratings]]
+        return pd.DataFrame(values, index=pd.Index(['All'], name='Group'),
+                            columns=pd.MultiIndex.from_product([columns, ratings], names=['Item', 'Rating']))
+
+    def mask_count(self, name):
+        """Rows flagged by a success-metric mask of `data_ingestion.SUCCESS_THRESHOLDS`"""
+        return self.successes[name]
+
+    def quantile(self, col, q):
+        """Linearly interpolated quantile (pandas default) from the exact value counts"""
+        counts = self.counts[col].sort_index()
+        values = counts.index.to_numpy(dtype=np.float64)
+        cumulative = counts.to_numpy().cumsum()
+        position = q * (self.n - 1)
+        lower = values[np.searchsorted(cumulative, int(np.floor(position)), side='right')]
+        upper = values[np.searchsorted(cumulative, int(np.ceil(position)), side='right')]
+        return lower + (upper - lower) * (position - np.floor(position))
+
+    def describe(self, columns=None):
+        """Equivalent of `DataFrame.describe()` for the numeric columns"""
+        columns = columns or NUMERIC_COLUMNS
+        rows = {}
+        for col in columns:
+            rows[col] = [self.n, self.mean(col), self.std(col), self.min(col),
+                         self.quantile(col, 0.25), self.quantile(col, 0.5),
+                         self.quantile(col, 0.75), self.max(col)]
+        return pd.DataFrame(rows, index=['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max'],
+                            dtype=np.float64)
+
+    def corr(self, col_a, col_b, method='pearson'):
+        """Correlation of a tracked column pair"""
+        return self.correlations.corr(col_a, col_b, method)
+
+    def corr_matrix(self, columns, method='pearson'):
+        """Correlation matrix of columns whose pairs are all tracked"""
+        return self.correlations.matrix(columns, method)
+
+    def group_means(self, key, columns=None, bins=None):
+        """Per-group means of the gain columns, optionally re-binning the group key"""
+        return self.cube.means([key], columns, None if bins is None else {key: bins})
+
+
+class SampleReservoir:
+    """
+    Uniform random sample of at most `size` rows over any number of chunks.
+
+    Every row gets a random key and the rows with the `size` smallest keys are
+    kept (bottom-k sampling), so memory stays bounded and updates are vectorized.
+    """
+
+    def __init__(self, size=10_000, seed=0):
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.sample = None
+        self.keys = np.empty(0)
+
+    def update(self, chunk):
+        keys = self.rng.random(len(chunk))
+        combined = chunk if self.sample is None else pd.concat([self.sample, chunk], ignore_index=True)
+        combined_keys = np.concatenate([self.keys, keys])
+        if len(combined) > self.size:
+            keep = np.sort(np.argpartition(combined_keys, self.size)[:self.size])
+            combined = combined.iloc[keep].reset_index(drop=True)
+            combined_keys = combined_keys[keep]
+        self.sample, self.keys = combined, combined_keys
+        return self
+
+
+def summarize_chunks(chunks, sample_size=10_000, seed=0, on_chunk=None):
+    """
+    Fold an iterable of chunks into a `CohortSummary` in one pass.
+
+    Also keeps a `SampleReservoir` of at most `sample_size` rows for the figure
+    code. `on_chunk` is called with every chunk after gain columns are added.
+    """
+    summary = CohortSummary()
+    reservoir = SampleReservoir(sample_size, seed)
+
+    for chunk in chunks:
+        chunk = add_learning_gains(chunk)
+        summary.update(chunk)
+        if on_chunk is not None:
+            on_chunk(chunk)
+        reservoir.update(chunk)
+
+    return summary, reservoir.sample
@@ -0,0 +1,165 @@
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from exact_sums import correlations, integer_values
+
+# Columns of the correlation heatmap; the text report reads pairs among them
+HEATMAP_COLUMNS = ['Age', 'Vocabulary_Gain', 'Comprehension_Gain', 'Production_Gain', 'VR_Satisfaction_Overall',
+                   'VR_Ease_of_Use', 'VR_Engagement_Level', 'VR_Recommendation']
+
+# Key correlations of the text report: reaction measures and age against each gain
+REPORT_PAIRS = [(measure, gain) for measure in ('VR_Satisfaction_Overall', 'VR_Engagement_Level', 'Age')
+                for gain in ('Vocabulary_Gain', 'Comprehension_Gain', 'Production_Gain')]
+
+# Pairs processed together per update; bounds the (rows x pairs) work arrays
+PAIR_BLOCK = 64
+
+
+def pairs_of(columns):
+    """Every unordered pair of `columns`"""
+    return list(combinations(columns, 2))
+
+
+def _p_values(r, n):
+    """Two-sided p-values of correlations `r` from t with n - 2 degrees of freedom"""
+    from scipy import stats
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df = np.where(n > 2, n - 2, np.nan)
+        t = r * np.sqrt(df / np.maximum(1 - r * r, 0))
+        return 2 * stats.t.sf(np.abs(t), df)
+
+
+def _rank_correlation(joint):
+    """Spearman correlation (Pearson on average ranks) from joint value counts"""
+    if joint is None or len(joint) < 2:
+        return np.nan
+    weights = joint.to_numpy(dtype=np.float64)
+    ranks = []
+    for level in range(2):
+        marginal = joint.groupby(level=level).sum().sort_index()
+        cumulative = marginal.cumsum()
+        midranks = cumulative - marginal + (marginal + 1) / 2
+        ranks.append(midranks.reindex(joint.index.get_level_values(level)).to_numpy())
+    total = weights.sum()
+    centered = [rank - (weights * rank).sum() / total for rank in ranks]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (weights * centered[0] * centered[1]).sum() / np.sqrt(
+            (weights * centered[0] ** 2).sum() * (weights * centered[1] ** 2).sum())
+
+
+class PairwiseCorrelation:
+    """
+    Streaming correlations of the requested variable pairs only.
+
+    For every pair the accumulator keeps the count, sums, sums of squares and
+    cross product over rows where both values are present (pairwise deletion,
+    as `DataFrame.corr`), as exact integers (see `exact_sums`), so chunks and
+    files merge by addition to the same result in any split. Work
+    is proportional to rows x pairs, never to the square of the number of
+    columns, so hundreds of columns can be tracked as long as only the pairs
+    of interest are requested.
+
+    With `spearman` the joint value counts of each pair are kept as well, and
+    Spearman's rho is computed exactly from them; memory then grows with the
+    number of distinct value pairs, which is small for scores and ratings.
+    """
+
+    def __init__(self, pairs, spearman=False):
+        self.pairs = [tuple(pair) for pair in pairs]
+        self.columns = list(dict.fromkeys(col for pair in self.pairs for col in pair))
+        self.spearman = spearman
+        k = len(self.pairs)
+        self.n = np.zeros(k, dtype=np.int64)
+        self.sums = np.zeros((2, k), dtype=np.int64)
+        self.squares = np.zeros((2, k), dtype=np.int64)
+        self.cross = np.zeros(k, dtype=np.int64)
+        self.joint = [None] * k if spearman else None
+        self._position = {pair: i for i, pair in enumerate(self.pairs)}
+        self._results = {}
+
+    def update(self, data):
+        """Fold a data frame (or chunk) into the pair moments"""
+        if len(data) == 0:
+            return self
+        values = data[self.columns].to_numpy(dtype=np.float64)
+        column = {col: i for i, col in enumerate(self.columns)}
+        for start in range(0, len(self.pairs), PAIR_BLOCK):
+            block = self.pairs[start:start + PAIR_BLOCK]
+            a = values[:, [column[p[0]] for p in block]]
+            b = values[:, [column[p[1]] for p in block]]
+            present = ~(np.isnan(a) | np.isnan(b))
+            ia = integer_values(np.where(present, a, 0))
+            ib = integer_values(np.where(present, b, 0))
+            where = slice(start, start + len(block))
+            self.n[where] += present.sum(axis=0)
+            self.sums[0, where] += ia.sum(axis=0)
+            self.sums[1, where] += ib.sum(axis=0)
+            self.squares[0, where] += (ia * ia).sum(axis=0)
+            self.squares[1, where] += (ib * ib).sum(axis=0)
+            self.cross[where] += (ia * ib).sum(axis=0)
+            if self.spearman:
+                for i, pair in enumerate(block, start):
+                    rows = present[:, i - start]
+                    counts = pd.DataFrame({'a': a[rows, i - start], 'b': b[rows, i - start]}).value_counts()
+                    previous = self.joint[i]
+                    self.joint[i] = counts if previous is None else previous.add(counts, fill_value=0)
+        self._results = {}
+        return self
+
+    def merge(self, other):
+        """Fold another accumulator over the same pairs into this one"""
+        self.n += other.n
+        self.sums += other.sums
+        self.squares += other.squares
+        self.cross += other.cross
+        if self.spearman and other.spearman:
+            self.joint = [theirs if mine is None else mine if theirs is None else mine.add(theirs, fill_value=0)
+                          for mine, theirs in zip(self.joint, other.joint)]
+        self._results = {}
+        return self
+
+    def results(self, p_values=True):
+        """
+        One row per requested pair: n, Pearson r and, optionally, p-values
+        and Spearman's rho. Cached until the next update or merge, so every
+        consumer of the same accumulator shares one computation.
+        """
+        if p_values not in self._results:
+            r = correlations(self.n, self.sums[0], self.sums[1], self.squares[0], self.squares[1], self.cross)
+            columns = {'n': self.n.copy(), 'r': r}
+            if p_values:
+                columns['p_value'] = _p_values(r, self.n)
+            if self.spearman:
+                rho = np.array([_rank_correlation(joint) for joint in self.joint])
+                columns['spearman_r'] = rho
+                if p_values:
+                    columns['spearman_p'] = _p_values(rho, self.n)
+            index = pd.MultiIndex.from_tuples(self.pairs, names=['Variable_A', 'Variable_B'])
+            self._results[p_values] = pd.DataFrame(columns, index=index)
+        return self._results[p_values]
+
+    def corr(self, col_a, col_b, method='pearson'):
+        """Correlation of one requested pair, in either order"""
+        if col_a == col_b:
+            return 1.0
+        key = 'r' if method == 'pearson' else 'spearman_r'
+        results = self.results(p_values=False)
+        pair = (col_a, col_b) if (col_a, col_b) in self._position else (col_b, col_a)
+        if pair not in self._position:
+            raise KeyError(f"Pair ({col_a}, {col_b}) is not tracked by this accumulator")
+        return results[key].iloc[self._position[pair]]
+
+    def matrix(self, columns, method='pearson'):
+        """Square correlation matrix of `columns`; every pair among them must be tracked"""
+        values = np.array([[self.corr(a, b, method) for b in columns] for a in columns], dtype=np.float64)
+        return pd.DataFrame(values, index=columns, columns=columns)
+
+
+def correlate(chunks, pairs, spearman=False, p_values=True):
+    """Correlation table of `pairs` over an iterable of data frames"""
+    accumulator = PairwiseCorrelation(pairs, spearman)
+    for chunk in chunks:
+        accumulator.update(chunk)
+    return accumulator.results(p_values)
@@ -1,12 +1,16 @@
-import pandas as pd
-import numpy as np
 import json
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy import stats
+import os
 from collections import Counter
-import re
-from textblob import TextBlob
+
+from data_cache import CACHE_DIR, DataCache
+from figure_cache import FigureCache
+from stage_metrics import DEFAULT_SAMPLE_INTERVAL, StageMetrics
+from stage_scheduler import Stage, StageCache, StageScheduler, source_fingerprint
+
+INTERVIEW_FILES = ['student_interview_data.json', 'educator_interview_data.json']
+
+# pandas, scipy and matplotlib are imported inside the steps that use them, so
+# text-only runs (see analysis_cli.py) start without loading them
 
 class VRSignLanguageDataAnalyzer:
     """
@@ -14,31 +18,91 @@ class VRSignLanguageDataAnalyzer:
     Based on Kirkpatrick Model Level 1 (Reaction) and Level 2 (Learning)
     """
     
-    def __init__(self):
+    def __init__(self, chunksize=None, cache_dir=CACHE_DIR, state_file=None, metrics=None):
+        """
+        chunksize: when set, student_data.csv is streamed in chunks of this many
+        rows and only a bounded summary plus a plotting sample are kept in memory
+        cache_dir: directory of the binary input cache and the figure manifest
+        (None disables both)
+        state_file: when set, statistics are kept in this file between runs and
+        only rows appended to student_data.csv since the last run are read
+        metrics: StageMetrics recording every stage of run_complete_analysis
+        """
+        self.chunksize = chunksize
+        self.cache = DataCache(cache_dir) if cache_dir else None
+        self.figure_cache = FigureCache(cache_dir) if cache_dir else None
+        self.state_file = state_file
         self.student_data = None
+        self.features = None
+        self.summary = None
         self.student_interviews = None
         self.educator_interviews = None
-        
-    def load_data(self):
-        """Load all data sources"""
+        self.interview_index = None
+        self.validation = None
+        self.metrics = metrics or StageMetrics('summary')
+        self.metrics.watch(self.cache)
+        self.metrics.watch(self.figure_cache)
+        
+    def load_data(self, students=True, interviews=True):
+        """Load all data sources (or only the student CSV / interview files)"""
         try:
             # Load primary quantitative data
-            self.student_data = pd.read_csv('student_data.csv')
+            if students:
+                self._load_student_data()
             
             # Load qualitative interview data
-            with open('student_interview_data.json', 'r') as f:
-                self.student_interviews = json.load(f)
-                
-            with open('educator_interview_data.json', 'r') as f:
-                self.educator_interviews = json.load(f)
+            if interviews:
+                self.student_interviews = self._load_json('student_interview_data.json')
+                self.educator_interviews = self._load_json('educator_interview_data.json')
                 
-            print("✓ All data sources loaded successfully")
+            print("✓ All data sources loaded successfully" if students and interviews
+                  else "✓ Requested data sources loaded successfully")
             return True
             
         except Exception as e:
             print(f"✗ Error loading data: {e}")
             return False
     
+    def _load_student_data(self):
+        from cohort_statistics import CohortSummary, summarize_chunks
+        from data_ingestion import DEFAULT_CHUNKSIZE, read_student_chunks, read_student_data
+        from derived_columns import DerivedFrame
+        from incremental_statistics import IncrementalStatistics
+        from student_schema import ValidationReport
+        
+        self.validation = ValidationReport()
+        if self.state_file:
+            # Incremental mode: fold only newly appended rows into the saved state
+            state = IncrementalStatistics.load(self.state_file, 'student_data.csv')
+            new_rows = state.refresh(self.chunksize or DEFAULT_CHUNKSIZE)
+            state.save(self.state_file)
+            self.summary, self.student_data = state.summary, state.reservoir.sample
+            self.validation = state.validator.report
+            self.metrics.count(rows=new_rows)
+            print(f"✓ {new_rows} new student rows folded into saved statistics ({state.rows} total)")
+        elif self.chunksize:
+            # Streaming mode: student_data holds only a random plotting sample
+            self.summary, self.student_data = summarize_chunks(
+                read_student_chunks('student_data.csv', self.chunksize, cache=self.cache, report=self.validation))
+            self.metrics.count(rows=self.summary.n)
+        else:
+            self.features = DerivedFrame(read_student_data('student_data.csv', cache=self.cache,
+                                                           report=self.validation))
+            self.student_data = self.features.frame
+            self.summary = CohortSummary.from_frame(self.features)
+            self.metrics.count(rows=self.summary.n)
+        if not self.validation.ok:
+            print(self.validation.summary())
+        if self.features is None:
+            self.features = DerivedFrame(self.student_data)
+    
+    def _load_json(self, path):
+        """Load a JSON data source, through the binary cache when enabled"""
+        if self.cache is not None:
+            return self.cache.load_json(path)
+        with open(path, 'r') as f:
+            return json.load(f)
+    
     def descriptive_statistics(self):
         """Generate descriptive statistics for quantitative data"""
         print("\n" + "="*60)
@@ -48,20 +112,22 @@ class VRSignLanguageDataAnalyzer:
         # Demographics
         print("\n1. DEMOGRAPHIC OVERVIEW")
         print("-" * 30)
-        print(f"Total Students: {len(self.student_data)}")
-        print(f"Age Range: {self.student_data['Age'].min()} - {self.student_data['Age'].max()} years")
-        print(f"Mean Age: {self.student_data['Age'].mean():.1f} years")
+        summary = self.summary
+        self.metrics.count(rows=summary.n)
+        print(f"Total Students: {summary.n}")
+        print(f"Age Range: {summary.min('Age')} - {summary.max('Age')} years")
+        print(f"Mean Age: {summary.mean('Age'):.1f} years")
         
         print("\nGender Distribution:")
-        gender_dist = self.student_data['Gender'].value_counts()
+        gender_dist = summary.value_counts('Gender')
         for gender, count in gender_dist.items():
-            percentage = (count / len(self.student_data)) * 100
+            percentage = (count / summary.n) * 100
             print(f"  {gender}: {count} ({percentage:.1f}%)")
         
         print("\nGrade Level Distribution:")
-        grade_dist = self.student_data['Grade_Level'].value_counts().sort_index()
+        grade_dist = summary.value_counts('Grade_Level').sort_index()
         for grade, count in grade_dist.items():
-            percentage = (count / len(self.student_data)) * 100
+            percentage = (count / summary.n) * 100
             print(f"  Grade {grade}: {count} ({percentage:.1f}%)")
         
         # Pre-test scores
@@ -69,8 +135,8 @@ class VRSignLanguageDataAnalyzer:
         print("-" * 30)
         pre_cols = ['Pre_Sign_Vocabulary_Score', 'Pre_Comprehension_Score', 'Pre_Production_Score']
         for col in pre_cols:
-            mean_score = self.student_data[col].mean()
-            std_score = self.student_data[col].std()
+            mean_score = summary.mean(col)
+            std_score = summary.std(col)
             print(f"{col.replace('Pre_', '').replace('_', ' ')}: {mean_score:.1f} ± {std_score:.1f}")
         
         # Post-test scores
@@ -78,8 +144,8 @@ class VRSignLanguageDataAnalyzer:
         print("-" * 30)
         post_cols = ['Post_Sign_Vocabulary_Score', 'Post_Comprehension_Score', 'Post_Production_Score']
         for col in post_cols:
-            mean_score = self.student_data[col].mean()
-            std_score = self.student_data[col].std()
+            mean_score = summary.mean(col)
+            std_score = summary.std(col)
             print(f"{col.replace('Post_', '').replace('_', ' ')}: {mean_score:.1f} ± {std_score:.1f}")
         
         # VR Reaction scores (Kirkpatrick Level 1)
@@ -87,8 +153,8 @@ class VRSignLanguageDataAnalyzer:
         print("-" * 30)
         vr_cols = ['VR_Satisfaction_Overall', 'VR_Ease_of_Use', 'VR_Engagement_Level', 'VR_Recommendation']
         for col in vr_cols:
-            mean_score = self.student_data[col].mean()
-            std_score = self.student_data[col].std()
+            mean_score = summary.mean(col)
+            std_score = summary.std(col)
             print(f"{col.replace('VR_', '').replace('_', ' ')}: {mean_score:.2f} ± {std_score:.2f}")
     
     def learning_outcomes_analysis(self):
@@ -97,54 +163,35 @@ class VRSignLanguageDataAnalyzer:
         print("LEARNING OUTCOMES ANALYSIS (KIRKPATRICK LEVEL 2)")
         print("="*60)
         
-        # Calculate learning gains
-        self.student_data['Vocabulary_Gain'] = (
-            self.student_data['Post_Sign_Vocabulary_Score'] - 
-            self.student_data['Pre_Sign_Vocabulary_Score']
-        )
-        self.student_data['Comprehension_Gain'] = (
-            self.student_data['Post_Comprehension_Score'] - 
-            self.student_data['Pre_Comprehension_Score']
-        )
-        self.student_data['Production_Gain'] = (
-            self.student_data['Post_Production_Score'] - 
-            self.student_data['Pre_Production_Score']
-        )
+        # Learning gains are derived at load time (see data_ingestion.add_learning_gains)
+        summary = self.summary
+        self.metrics.count(rows=summary.n)
         
         print("\n1. LEARNING GAINS")
         print("-" * 30)
         gain_cols = ['Vocabulary_Gain', 'Comprehension_Gain', 'Production_Gain']
         for col in gain_cols:
-            mean_gain = self.student_data[col].mean()
-            std_gain = self.student_data[col].std()
+            mean_gain = summary.mean(col)
+            std_gain = summary.std(col)
             print(f"{col.replace('_', ' ')}: {mean_gain:.1f} ± {std_gain:.1f} points")
         
         # Statistical significance tests
         print("\n2. STATISTICAL SIGNIFICANCE TESTS")
         print("-" * 30)
         
-        test_pairs = [
-            ('Pre_Sign_Vocabulary_Score', 'Post_Sign_Vocabulary_Score', 'Vocabulary'),
-            ('Pre_Comprehension_Score', 'Post_Comprehension_Score', 'Comprehension'),
-            ('Pre_Production_Score', 'Post_Production_Score', 'Production')
-        ]
+        # Paired t-tests (post vs pre) and pooled-SD Cohen's d for all pairs at once
+        from paired_tests import paired_tests_from_summary
+        test_results = paired_tests_from_summary(summary)
         
-        for pre_col, post_col, name in test_pairs:
-            pre_scores = self.student_data[pre_col]
-            post_scores = self.student_data[post_col]
-            
-            # Paired t-test
-            t_stat, p_value = stats.ttest_rel(post_scores, pre_scores)
-            
-            # Effect size (Cohen's d)
-            diff = post_scores - pre_scores
-            pooled_std = np.sqrt((pre_scores.var() + post_scores.var()) / 2)
-            cohens_d = diff.mean() / pooled_std
+        for name, result in test_results.iterrows():
+            p_value = result['p_value']
+            cohens_d = result['cohens_d']
             
             print(f"\n{name} Assessment:")
-            print(f"  t-statistic: {t_stat:.3f}")
+            print(f"  t-statistic: {result['t_statistic']:.3f}")
             print(f"  p-value: {p_value:.6f}")
             print(f"  Cohen's d: {cohens_d:.3f}")
+            print(f"  95% CI of gain: [{result['ci_low']:.1f}, {result['ci_high']:.1f}]")
             
             if p_value < 0.001:
                 significance = "***"
@@ -172,11 +219,11 @@ class VRSignLanguageDataAnalyzer:
         print("-" * 30)
         
         # Calculate percentage of students with meaningful improvement (≥10 points)
-        vocab_improved = (self.student_data['Vocabulary_Gain'] >= 10).sum()
-        comp_improved = (self.student_data['Comprehension_Gain'] >= 10).sum()
-        prod_improved = (self.student_data['Production_Gain'] >= 10).sum()
+        vocab_improved = summary.mask_count('Vocabulary_Improved')
+        comp_improved = summary.mask_count('Comprehension_Improved')
+        prod_improved = summary.mask_count('Production_Improved')
         
-        total_students = len(self.student_data)
+        total_students = summary.n
         
         print(f"Students with ≥10 point improvement:")
         print(f"  Vocabulary: {vocab_improved}/{total_students} ({vocab_improved/total_students*100:.1f}%)")
@@ -190,41 +237,44 @@ class VRSignLanguageDataAnalyzer:
         print("="*60)
         
         vr_cols = ['VR_Satisfaction_Overall', 'VR_Ease_of_Use', 'VR_Engagement_Level', 'VR_Recommendation']
+        self.metrics.count(rows=self.summary.n)
         
         print("\n1. VR REACTION METRICS")
         print("-" * 30)
         
+        summary = self.summary
+        # High/moderate/low splits of every column from one rating histogram
+        from likert_histograms import likert_levels
+        levels = likert_levels(summary.likert_counts(vr_cols)).loc['All']
         for col in vr_cols:
-            scores = self.student_data[col]
-            
             # Calculate satisfaction levels
-            high_satisfaction = (scores >= 4).sum()
-            moderate_satisfaction = (scores == 3).sum()
-            low_satisfaction = (scores <= 2).sum()
+            high_satisfaction = levels.loc[col, 'high']
+            moderate_satisfaction = levels.loc[col, 'moderate']
+            low_satisfaction = levels.loc[col, 'low']
             
-            total = len(scores)
+            total = summary.n
             
             print(f"\n{col.replace('VR_', '').replace('_', ' ')}:")
             print(f"  High (4-5): {high_satisfaction}/{total} ({high_satisfaction/total*100:.1f}%)")
             print(f"  Moderate (3): {moderate_satisfaction}/{total} ({moderate_satisfaction/total*100:.1f}%)")
             print(f"  Low (1-2): {low_satisfaction}/{total} ({low_satisfaction/total*100:.1f}%)")
-            print(f"  Mean Score: {scores.mean():.2f}")
+            print(f"  Mean Score: {levels.loc[col, 'mean']:.2f}")
         
         # Success metrics evaluation
         print("\n2. SUCCESS METRICS EVALUATION")
         print("-" * 30)
         
         # Target: ≥80% positive experience (score ≥4)
-        overall_positive = (self.student_data['VR_Satisfaction_Overall'] >= 4).sum()
-        overall_percentage = (overall_positive / len(self.student_data)) * 100
+        overall_positive = summary.mask_count('Positive_Experience')
+        overall_percentage = (overall_positive / summary.n) * 100
         
         # Target: ≥75% high engagement (score ≥4)
-        engagement_high = (self.student_data['VR_Engagement_Level'] >= 4).sum()
-        engagement_percentage = (engagement_high / len(self.student_data)) * 100
+        engagement_high = summary.mask_count('High_Engagement')
+        engagement_percentage = (engagement_high / summary.n) * 100
         
         # Target: ≥70% willing to recommend (score ≥4)
-        recommend_positive = (self.student_data['VR_Recommendation'] >= 4).sum()
-        recommend_percentage = (recommend_positive / len(self.student_data)) * 100
+        recommend_positive = summary.mask_count('Would_Recommend')
+        recommend_percentage = (recommend_positive / summary.n) * 100
         
         print(f"Positive Experience (≥4): {overall_percentage:.1f}% (Target: ≥80%)")
         print(f"High Engagement (≥4): {engagement_percentage:.1f}% (Target: ≥75%)")
@@ -241,8 +291,8 @@ class VRSignLanguageDataAnalyzer:
         
         print(f"\nTargets Met: {targets_met}/3")
     
-    def qualitative_analysis(self):
-        """Analyze qualitative interview data"""
+    def qualitative_analysis(self, workers=None):
+        """Analyze qualitative interview data; `workers` processes run the transcript NLP"""
         print("\n" + "="*60)
         print("QUALITATIVE ANALYSIS")
         print("="*60)
@@ -293,18 +343,59 @@ class VRSignLanguageDataAnalyzer:
             print(f"  {role}: {', '.join(role_assessments)}")
         
         # Common assessment themes
-        assessment_words = []
-        for assessment in assessments:
-            assessment_words.extend(assessment.lower().split())
-        
-        # Filter out common words
-        common_words = {'with', 'and', 'the', 'for', 'of', 'to', 'in', 'a', 'an'}
-        filtered_words = [word for word in assessment_words if word not in common_words]
-        
-        word_counts = Counter(filtered_words)
+        from transcript_nlp import (TranscriptPipeline, codebook_agreement, content_terms, tokenize,
+                                    validation_transcripts)
+        word_counts = Counter(term for assessment in assessments for term in content_terms(tokenize(assessment)))
         print(f"\nMost Common Assessment Terms:")
         for word, count in word_counts.most_common(8):
             print(f"  {word}: {count} mentions")
+        
+        # Transcript NLP: sentiment and themes coded from the raw transcripts,
+        # cached per transcript so reruns only process new or edited interviews
+        print("\n3. TRANSCRIPT ANALYSIS")
+        print("-" * 30)
+        
+        pipeline = TranscriptPipeline(self.cache.cache_dir if self.cache else None, workers=workers)
+        student_results = pipeline.run([interview['Transcript'] for interview in self.student_interviews['interviews']])
+        educator_results = pipeline.run([interview['Transcript'] for interview in self.educator_interviews['interviews']])
+        print(f"Transcripts processed: {pipeline.misses} new, {pipeline.hits} cached")
+        self.metrics.count(rows=len(student_results) + len(educator_results), cache_hits=pipeline.hits,
+                           cache_misses=pipeline.misses)
+        
+        coded = [interview['Sentiment_Score'] for interview in self.student_interviews['interviews']]
+        computed = Counter(result['sentiment'] for result in student_results)
+        agreement = sum(result['sentiment'] == label for result, label in zip(student_results, coded))
+        print("Computed Student Sentiment:")
+        for sentiment in sentiment_counts:
+            print(f"  {sentiment}: {computed[sentiment]}/{total_interviews}")
+        print(f"  Agreement with coded sentiment: {agreement}/{total_interviews} ({agreement/total_interviews*100:.1f}%)")
+        
+        theme_mentions = Counter(theme for result in student_results for theme in result['themes'])
+        print("Transcript Themes (codebook):")
+        for theme, count in theme_mentions.most_common(8):
+            print(f"  {theme}: {count} transcripts ({count/total_interviews*100:.1f}%)")
+        held_out = codebook_agreement(validation_transcripts())
+        print(f"  Codebook agreement on {held_out['transcripts']} held-out hand-coded transcripts: "
+              f"kappa {held_out['kappa']:.2f}, precision {held_out['precision']:.2f}, "
+              f"recall {held_out['recall']:.2f}")
+        
+        polarity_by_role = {}
+        for interview, result in zip(self.educator_interviews['interviews'], educator_results):
+            polarity_by_role.setdefault(interview['Role'], []).append(result['polarity'])
+        print("Educator Transcript Polarity by Role:")
+        for role, polarities in polarity_by_role.items():
+            print(f"  {role}: {sum(polarities)/len(polarities):+.2f}")
+    
+    def search_interviews(self, query):
+        """Interviews matching a boolean / phrase query (see interview_index.InterviewIndex)"""
+        from interview_index import InterviewIndex
+        if self.interview_index is None:
+            # The index is saved next to the input cache and rebuilt only when an interview file changes
+            if self.cache is not None:
+                self.interview_index = InterviewIndex.load(self.cache.cache_dir, load_json=self.cache.load_json)
+            else:
+                self.interview_index = InterviewIndex.build(load_json=self._load_json)
+        return self.interview_index.search(query)
     
     def correlation_analysis(self):
         """Analyze correlations between variables"""
@@ -312,25 +403,19 @@ class VRSignLanguageDataAnalyzer:
         print("CORRELATION ANALYSIS")
         print("="*60)
         
-        # Select numeric columns for correlation
-        numeric_cols = [
-            'Age', 'Grade_Level',
-            'Pre_Sign_Vocabulary_Score', 'Pre_Comprehension_Score', 'Pre_Production_Score',
-            'Post_Sign_Vocabulary_Score', 'Post_Comprehension_Score', 'Post_Production_Score',
-            'VR_Satisfaction_Overall', 'VR_Ease_of_Use', 'VR_Engagement_Level', 'VR_Recommendation',
-            'Vocabulary_Gain', 'Comprehension_Gain', 'Production_Gain'
-        ]
-        
-        correlation_matrix = self.student_data[numeric_cols].corr()
+        # Only the pairs reported below are computed, by the summary's streaming
+        # correlation engine; the heatmap reads the same cached results
+        correlations = self.summary.correlations
+        self.metrics.count(rows=self.summary.n)
         
         # Key correlations of interest
         print("\n1. KEY CORRELATIONS")
         print("-" * 30)
         
         # VR satisfaction vs learning gains
-        satisfaction_vocab_corr = correlation_matrix.loc['VR_Satisfaction_Overall', 'Vocabulary_Gain']
-        satisfaction_comp_corr = correlation_matrix.loc['VR_Satisfaction_Overall', 'Comprehension_Gain']
-        satisfaction_prod_corr = correlation_matrix.loc['VR_Satisfaction_Overall', 'Production_Gain']
+        satisfaction_vocab_corr = correlations.corr('VR_Satisfaction_Overall', 'Vocabulary_Gain')
+        satisfaction_comp_corr = correlations.corr('VR_Satisfaction_Overall', 'Comprehension_Gain')
+        satisfaction_prod_corr = correlations.corr('VR_Satisfaction_Overall', 'Production_Gain')
         
         print("VR Satisfaction vs Learning Gains:")
         print(f"  Vocabulary Gain: r = {satisfaction_vocab_corr:.3f}")
@@ -338,9 +423,9 @@ class VRSignLanguageDataAnalyzer:
         print(f"  Production Gain: r = {satisfaction_prod_corr:.3f}")
         
         # Engagement vs learning gains
-        engagement_vocab_corr = correlation_matrix.loc['VR_Engagement_Level', 'Vocabulary_Gain']
-        engagement_comp_corr = correlation_matrix.loc['VR_Engagement_Level', 'Comprehension_Gain']
-        engagement_prod_corr = correlation_matrix.loc['VR_Engagement_Level', 'Production_Gain']
+        engagement_vocab_corr = correlations.corr('VR_Engagement_Level', 'Vocabulary_Gain')
+        engagement_comp_corr = correlations.corr('VR_Engagement_Level', 'Comprehension_Gain')
+        engagement_prod_corr = correlations.corr('VR_Engagement_Level', 'Production_Gain')
         
         print("\nVR Engagement vs Learning Gains:")
         print(f"  Vocabulary Gain: r = {engagement_vocab_corr:.3f}")
@@ -348,152 +433,58 @@ class VRSignLanguageDataAnalyzer:
         print(f"  Production Gain: r = {engagement_prod_corr:.3f}")
         
         # Age vs performance
-        age_vocab_corr = correlation_matrix.loc['Age', 'Vocabulary_Gain']
-        age_comp_corr = correlation_matrix.loc['Age', 'Comprehension_Gain']
-        age_prod_corr = correlation_matrix.loc['Age', 'Production_Gain']
+        age_vocab_corr = correlations.corr('Age', 'Vocabulary_Gain')
+        age_comp_corr = correlations.corr('Age', 'Comprehension_Gain')
+        age_prod_corr = correlations.corr('Age', 'Production_Gain')
         
         print("\nAge vs Learning Gains:")
         print(f"  Vocabulary Gain: r = {age_vocab_corr:.3f}")
         print(f"  Comprehension Gain: r = {age_comp_corr:.3f}")
         print(f"  Production Gain: r = {age_prod_corr:.3f}")
     
-    def generate_visualizations(self):
-        """Generate key visualizations"""
+    def resampling_analysis(self, n_resamples=None, seed=0, workers=None):
+        """Bootstrap CIs and permutation p-values of gains, effect sizes and key correlations"""
         print("\n" + "="*60)
-        print("GENERATING VISUALIZATIONS")
+        print("RESAMPLING INFERENCE")
         print("="*60)
         
-        plt.style.use('default')
-        fig, axes = plt.subplots(2, 3, figsize=(18, 12))
-        fig.suptitle('VR Sign Language Learning Evaluation Results', fontsize=16, fontweight='bold')
-        
-        # 1. Pre-Post Comparison
-        ax1 = axes[0, 0]
-        pre_scores = [
-            self.student_data['Pre_Sign_Vocabulary_Score'].mean(),
-            self.student_data['Pre_Comprehension_Score'].mean(),
-            self.student_data['Pre_Production_Score'].mean()
-        ]
-        post_scores = [
-            self.student_data['Post_Sign_Vocabulary_Score'].mean(),
-            self.student_data['Post_Comprehension_Score'].mean(),
-            self.student_data['Post_Production_Score'].mean()
-        ]
-        
-        x = np.arange(3)
-        width = 0.35
-        
-        ax1.bar(x - width/2, pre_scores, width, label='Pre-test', alpha=0.8)
-        ax1.bar(x + width/2, post_scores, width, label='Post-test', alpha=0.8)
-        ax1.set_xlabel('Assessment Type')
-        ax1.set_ylabel('Score')
-        ax1.set_title('Pre-test vs Post-test Scores')
-        ax1.set_xticks(x)
-        ax1.set_xticklabels(['Vocabulary', 'Comprehension', 'Production'])
-        ax1.legend()
-        ax1.grid(True, alpha=0.3)
-        
-        # 2. Learning Gains Distribution
-        ax2 = axes[0, 1]
-        gains = [
-            self.student_data['Vocabulary_Gain'].mean(),
-            self.student_data['Comprehension_Gain'].mean(),
-            self.student_data['Production_Gain'].mean()
-        ]
-        
-        bars = ax2.bar(['Vocabulary', 'Comprehension', 'Production'], gains, 
-                      color=['skyblue', 'lightgreen', 'lightcoral'], alpha=0.8)
-        ax2.set_ylabel('Average Gain (Points)')
-        ax2.set_title('Learning Gains by Assessment Type')
-        ax2.grid(True, alpha=0.3)
-        
-        # Add value labels on bars
-        for bar, gain in zip(bars, gains):
-            height = bar.get_height()
-            ax2.text(bar.get_x() + bar.get_width()/2., height + 0.5,
-                    f'{gain:.1f}', ha='center', va='bottom')
-        
-        # 3. VR Reaction Scores
-        ax3 = axes[0, 2]
-        vr_scores = [
-            self.student_data['VR_Satisfaction_Overall'].mean(),
-            self.student_data['VR_Ease_of_Use'].mean(),
-            self.student_data['VR_Engagement_Level'].mean(),
-            self.student_data['VR_Recommendation'].mean()
-        ]
-        
-        bars = ax3.bar(['Satisfaction', 'Ease of Use', 'Engagement', 'Recommendation'], 
-                      vr_scores, color='orange', alpha=0.8)
-        ax3.set_ylabel('Average Rating (1-5)')
-        ax3.set_title('VR Application Reaction Scores')
-        ax3.set_ylim(0, 5)
-        ax3.grid(True, alpha=0.3)
-        
-        # Add value labels
-        for bar, score in zip(bars, vr_scores):
-            height = bar.get_height()
-            ax3.text(bar.get_x() + bar.get_width()/2., height + 0.05,
-                    f'{score:.2f}', ha='center', va='bottom')
-        
-        # 4. Age vs Learning Gains
-        ax4 = axes[1, 0]
-        ax4.scatter(self.student_data['Age'], self.student_data['Vocabulary_Gain'], 
-                   alpha=0.6, label='Vocabulary')
-        ax4.scatter(self.student_data['Age'], self.student_data['Comprehension_Gain'], 
-                   alpha=0.6, label='Comprehension')
-        ax4.scatter(self.student_data['Age'], self.student_data['Production_Gain'], 
-                   alpha=0.6, label='Production')
-        ax4.set_xlabel('Age')
-        ax4.set_ylabel('Learning Gain')
-        ax4.set_title('Age vs Learning Gains')
-        ax4.legend()
-        ax4.grid(True, alpha=0.3)
-        
-        # 5. Satisfaction vs Learning Gains
-        ax5 = axes[1, 1]
-        ax5.scatter(self.student_data['VR_Satisfaction_Overall'], 
-                   self.student_data['Vocabulary_Gain'], alpha=0.6)
-        ax5.set_xlabel('VR Satisfaction Rating')
-        ax5.set_ylabel('Vocabulary Learning Gain')
-        ax5.set_title('VR Satisfaction vs Vocabulary Gains')
-        ax5.grid(True, alpha=0.3)
-        
-        # 6. Success Metrics Dashboard
-        ax6 = axes[1, 2]
-        
-        # Calculate success percentages
-        positive_exp = (self.student_data['VR_Satisfaction_Overall'] >= 4).mean() * 100
-        high_engagement = (self.student_data['VR_Engagement_Level'] >= 4).mean() * 100
-        recommend = (self.student_data['VR_Recommendation'] >= 4).mean() * 100
-        skill_improvement = (self.student_data['Vocabulary_Gain'] >= 10).mean() * 100
-        
-        metrics = ['Positive\nExperience\n(≥80%)', 'High\nEngagement\n(≥75%)', 
-                  'Recommend\n(≥70%)', 'Skill\nImprovement\n(≥60%)']
-        values = [positive_exp, high_engagement, recommend, skill_improvement]
-        targets = [80, 75, 70, 60]
-        
-        bars = ax6.bar(metrics, values, alpha=0.8)
-        
-        # Color bars based on target achievement
-        for i, (bar, value, target) in enumerate(zip(bars, values, targets)):
-            if value >= target:
-                bar.set_color('green')
-            else:
-                bar.set_color('red')
-        
-        ax6.set_ylabel('Percentage (%)')
-        ax6.set_title('Success Metrics Achievement')
-        ax6.set_ylim(0, 100)
-        
-        # Add target lines
-        for i, target in enumerate(targets):
-            ax6.axhline(y=target, color='black', linestyle='--', alpha=0.5)
+        from resampling import DEFAULT_RESAMPLES, resampling_table
+        n_resamples = n_resamples or DEFAULT_RESAMPLES
+        data = self.features
+        if self.cache is not None and not self.state_file:
+            # Workers map the cohort's score matrix instead of receiving pickled columns
+            from data_ingestion import DEFAULT_CHUNKSIZE
+            from score_matrix import open_score_matrix
+            data = open_score_matrix('student_data.csv', self.cache.cache_dir, self.chunksize or DEFAULT_CHUNKSIZE,
+                                     cache=self.cache)
+        inference = resampling_table(data, n_resamples=n_resamples, seed=seed, workers=workers)
+        labels = {'mean_gain': 'Mean gain', 'cohens_d': "Cohen's d", 'glass_delta': "Glass's delta", 'r': 'r'}
+        
+        print(f"{n_resamples} resamples, seed {seed}, {inference['n'].iloc[0]} students")
+        for (statistic, variable), result in inference.iterrows():
+            line = (f"{labels[statistic]} ({variable}): {result['estimate']:.3f} "
+                    f"[95% CI {result['ci_low']:.3f}, {result['ci_high']:.3f}]")
+            if result['p_value'] == result['p_value']:
+                line += f", permutation p = {result['p_value']:.4f}"
+            print(f"  {line}")
+        return inference
+    
+    def generate_visualizations(self, profile='print'):
+        """Generate key visualizations at the given resolution profile"""
+        print("\n" + "="*60)
+        print("GENERATING VISUALIZATIONS")
+        print("="*60)
         
-        plt.tight_layout()
-        plt.savefig('vr_evaluation_results.png', dpi=300, bbox_inches='tight')
+        # Means and success rates come from the summary; the scatter panels use
+        # student_data, a bounded random sample in streaming mode. The PNG is
+        # kept when its data, style and resolution are unchanged
+        from figure_rendering import render_figures
+        self.metrics.count(rows=len(self.features))
+        [path] = render_figures(self.summary, self.features, ['evaluation_results'], profile=profile, workers=1,
+                                cache=self.figure_cache)
         print("✓ Visualizations saved as 'vr_evaluation_results.png'")
         
-        return fig
+        return path
     
     def generate_summary_report(self):
         """Generate comprehensive summary report"""
@@ -502,15 +493,16 @@ class VRSignLanguageDataAnalyzer:
         print("="*60)
         
         # Calculate key metrics
-        vocab_gain = self.student_data['Vocabulary_Gain'].mean()
-        comp_gain = self.student_data['Comprehension_Gain'].mean()
-        prod_gain = self.student_data['Production_Gain'].mean()
+        vocab_gain = self.summary.mean('Vocabulary_Gain')
+        comp_gain = self.summary.mean('Comprehension_Gain')
+        prod_gain = self.summary.mean('Production_Gain')
         
-        satisfaction = self.student_data['VR_Satisfaction_Overall'].mean()
-        engagement = self.student_data['VR_Engagement_Level'].mean()
+        satisfaction = self.summary.mean('VR_Satisfaction_Overall')
+        engagement = self.summary.mean('VR_Engagement_Level')
         
-        positive_exp = (self.student_data['VR_Satisfaction_Overall'] >= 4).mean() * 100
-        high_engagement = (self.student_data['VR_Engagement_Level'] >= 4).mean() * 100
+        self.metrics.count(rows=self.summary.n)
+        positive_exp = (self.summary.mask_count('Positive_Experience') / self.summary.n) * 100
+        high_engagement = (self.summary.mask_count('High_Engagement') / self.summary.n) * 100
         
         # Count positive sentiment interviews
         positive_interviews = sum(1 for interview in self.student_interviews['interviews'] 
@@ -523,8 +515,8 @@ EXECUTIVE SUMMARY
 ================
 
 Study Overview:
-- Sample Size: {len(self.student_data)} deaf primary students
-- Age Range: {self.student_data['Age'].min()}-{self.student_data['Age'].max()} years
+- Sample Size: {self.summary.n} deaf primary students
+- Age Range: {self.summary.min('Age')}-{self.summary.max('Age')} years
 - Evaluation Framework: Kirkpatrick Model (Level 1 & 2)
 
 KEY FINDINGS:
@@ -533,7 +525,7 @@ Level 2 (Learning) Results:
 - Average Vocabulary Gain: {vocab_gain:.1f} points
 - Average Comprehension Gain: {comp_gain:.1f} points  
 - Average Production Gain: {prod_gain:.1f} points
-- Students with Significant Improvement (≥10 pts): {(self.student_data['Vocabulary_Gain'] >= 10).mean()*100:.1f}%
+- Students with Significant Improvement (≥10 pts): {(self.summary.mask_count('Vocabulary_Improved') / self.summary.n)*100:.1f}%
 
 Level 1 (Reaction) Results:
 - Overall Satisfaction: {satisfaction:.2f}/5.0
@@ -560,25 +552,54 @@ to the Kirkpatrick evaluation model. Results exceed most success metrics and
 support continued investment in this educational technology.
         """)
     
-    def run_complete_analysis(self):
-        """Run the complete analysis pipeline"""
+    def pipeline_stages(self, profile='print'):
+        """
+        The complete analysis as `Stage`s, in order; a step returning False
+        stops it. Every step reads what load_data loaded from the 'students'
+        and 'interviews' sources.
+        """
+        return [
+            Stage('load_data', self.load_data, ['students', 'interviews'], cacheable=False),
+            Stage('descriptive_statistics', self.descriptive_statistics, ['load_data']),
+            Stage('learning_outcomes', self.learning_outcomes_analysis, ['load_data']),
+            Stage('reaction_analysis', self.reaction_analysis, ['load_data']),
+            Stage('qualitative_analysis', self.qualitative_analysis, ['load_data']),
+            Stage('correlation_analysis', self.correlation_analysis, ['load_data']),
+            Stage('visualizations', lambda: self.generate_visualizations(profile), ['load_data'], params=[profile],
+                  thread_safe=False, products=['vr_evaluation_results.png']),
+            Stage('summary_report', self.generate_summary_report, ['load_data'])
+        ]
+
+    def sources(self):
+        """Fingerprints of the input files, with the options that change how the CSV is read"""
+        cache_dir = self.cache.cache_dir if self.cache else None
+        return {'students': source_fingerprint(['student_data.csv'], {'chunksize': self.chunksize,
+                                                                      'state_file': self.state_file}, cache_dir),
+                'interviews': source_fingerprint(INTERVIEW_FILES, cache_dir=cache_dir)}
+    
+    def run_complete_analysis(self, profile='print', stage_workers=None):
+        """
+        Run the complete analysis pipeline
+
+        Independent stages run concurrently on `stage_workers` threads (one
+        per CPU by default). With the cache enabled, a stage whose inputs and
+        code are unchanged since the last run is skipped and its report replayed.
+        """
         print("VR SIGN LANGUAGE LEARNING EVALUATION")
         print("="*60)
         print("Comprehensive Data Analysis Report")
         print("Based on Kirkpatrick Evaluation Model")
         print("="*60)
         
-        if not self.load_data():
-            return False
-        
-        # Run all analysis components
-        self.descriptive_statistics()
-        self.learning_outcomes_analysis()
-        self.reaction_analysis()
-        self.qualitative_analysis()
-        self.correlation_analysis()
-        self.generate_visualizations()
-        self.generate_summary_report()
+        # Run all analysis components, each instrumented by self.metrics
+        cache = StageCache(os.path.join(self.cache.cache_dir, 'stages-summary.pkl')) if self.cache else None
+        scheduler = StageScheduler(self.pipeline_stages(profile), self, self.sources(), cache=cache,
+                                   workers=stage_workers, metrics=self.metrics)
+        try:
+            if not scheduler.run():
+                return False
+        finally:
+            self.metrics.flush()
         
         print(f"\n{'='*60}")
         print("ANALYSIS COMPLETE")
@@ -586,10 +607,38 @@ support continued investment in this educational technology.
         print("✓ All analyses completed successfully")
         print("✓ Results saved to 'vr_evaluation_results.png'")
         print("✓ Comprehensive evaluation report generated")
+        if self.metrics.enabled:
+            print("\nStage metrics:")
+            print(self.metrics.report())
         
         return True
 
 # Main execution
 if __name__ == "__main__":
-    analyzer = VRSignLanguageDataAnalyzer()
-    analyzer.run_complete_analysis()
+    import argparse
+    from figure_rendering import RESOLUTION_PROFILES
+    parser = argparse.ArgumentParser(description="VR sign language evaluation analysis")
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help="stream student_data.csv in chunks of this many rows")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="always re-parse the input files instead of using the binary cache")
+    parser.add_argument('--state-file', default=None,
+                        help="keep statistics in this file and only read rows appended since the last run")
+    parser.add_argument('--profile', choices=list(RESOLUTION_PROFILES), default='print',
+                        help="figure resolution profile")
+    parser.add_argument('--metrics-log', default=None,
+                        help="append wall/CPU time, peak RSS, rows and cache hits of every stage to this JSON lines file")
+    parser.add_argument('--metrics-db', default=None,
+                        help="also insert the stage metrics into the stage_metrics table of this SQLite database")
+    parser.add_argument('--sample-stages', nargs='+', default=(), metavar='STAGE',
+                        help="run the sampling profiler during these stages (e.g. qualitative_analysis visualizations)")
+    parser.add_argument('--sample-interval', type=float, default=DEFAULT_SAMPLE_INTERVAL,
+                        help="seconds between profiler samples")
+    parser.add_argument('--stage-workers', type=int, default=None,
+                        help="threads running independent pipeline stages concurrently (default: one per CPU)")
+    args = parser.parse_args()
+    metrics = StageMetrics('summary', args.metrics_log, args.metrics_db, args.sample_stages, args.sample_interval)
+    analyzer = VRSignLanguageDataAnalyzer(chunksize=args.chunksize,
+                                          cache_dir=None if args.no_cache else CACHE_DIR,
+                                          state_file=args.state_file, metrics=metrics)
+    analyzer.run_complete_analysis(args.profile, args.stage_workers)
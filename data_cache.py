@@ -0,0 +1,277 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+
+CACHE_DIR = '.analysis_cache'
+CACHE_VERSION = 3
+# Content hashes of input files by size and mtime, see `source_digest`
+SOURCE_DIGESTS = 'source_digests.json'
+
+# numpy and pandas are imported by the tabular code paths only, so loading a
+# cached JSON document does not pay for them
+
+
+def file_digest(path, block_size=1 << 20):
+    """Content hash of a file, read in fixed-size blocks"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_digest(path, cache_dir=CACHE_DIR):
+    """
+    `file_digest` of `path`, remembered in `<cache_dir>/source_digests.json`
+    with the file's size and mtime. As for DataCache entries, the file is
+    read again only when those change, so checking an unchanged input costs
+    one stat. With `cache_dir` None the file is always hashed.
+    """
+    if cache_dir is None:
+        return file_digest(path)
+    index_path = os.path.join(cache_dir, SOURCE_DIGESTS)
+    try:
+        with open(index_path, 'r') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    st = os.stat(path)
+    key = os.path.abspath(path)
+    entry = index.get(key)
+    if entry and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns:
+        return entry['digest']
+    index[key] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'digest': file_digest(path)}
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(index_path + '.tmp', 'w') as f:
+        json.dump(index, f)
+    os.replace(index_path + '.tmp', index_path)
+    return index[key]['digest']
+
+
+class DataCache:
+    """
+    On-disk binary cache of parsed input files.
+
+    Each source file gets an entry directory holding one raw binary file per
+    column (read back through `np.memmap`) or, for JSON documents, a pickle.
+    An entry is valid while the source path, size and mtime match; if only
+    the mtime changed the content hash decides, so a `touch` does not force
+    a re-parse.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_dir(self, path):
+        key = hashlib.blake2b(os.path.abspath(path).encode(), digest_size=8).hexdigest()
+        return os.path.join(self.cache_dir, f"{os.path.basename(path)}-{key}")
+
+    def _source_meta(self, path):
+        st = os.stat(path)
+        return {
+            'version': CACHE_VERSION,
+            'path': os.path.abspath(path),
+            'size': st.st_size,
+            'mtime_ns': st.st_mtime_ns,
+            'digest': file_digest(path)
+        }
+
+    def _lookup(self, path):
+        """Return the entry metadata if it still matches the source file, else None"""
+        meta_path = os.path.join(self._entry_dir(path), 'meta.json')
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        st = os.stat(path)
+        if (meta.get('version') != CACHE_VERSION or meta.get('path') != os.path.abspath(path)
+                or meta.get('size') != st.st_size):
+            return None
+        if meta.get('mtime_ns') != st.st_mtime_ns:
+            if meta.get('digest') != file_digest(path):
+                return None
+            meta['mtime_ns'] = st.st_mtime_ns
+            with open(meta_path, 'w') as f:
+                json.dump(meta, f)
+        return meta
+
+    def _commit(self, path, tmp_dir, meta):
+        """Atomically replace the entry for `path` with a fully written temp directory"""
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+        entry = self._entry_dir(path)
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp_dir, entry)
+
+    def _new_tmp_dir(self, path):
+        tmp_dir = self._entry_dir(path) + '.tmp'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        return tmp_dir
+
+    # Tabular sources
+
+    def frame_chunks(self, path, parse_chunks, chunksize=None, annotations=None):
+        """
+        Yield `path` as data frames.
+
+        On a hit the rows come from the memory-mapped column files in slices of
+        `chunksize` rows (one frame if None). On a miss `parse_chunks(path)` is
+        consumed and every chunk is appended to a new cache entry as it passes.
+        The JSON-compatible `annotations` dict (e.g. a validation report) is
+        saved with a new entry once parsing ends, and filled from the entry on a hit.
+        """
+        meta = self._lookup(path)
+        if meta is not None:
+            self.hits += 1
+            if annotations is not None:
+                annotations.update(meta.get('annotations', {}))
+            yield from self._read_chunks(self._entry_dir(path), meta, chunksize)
+            return
+
+        self.misses += 1
+        meta = self._source_meta(path)
+        tmp_dir = self._new_tmp_dir(path)
+        writer = _ColumnWriter(tmp_dir)
+        try:
+            for chunk in parse_chunks(path):
+                writer.append(chunk)
+                yield chunk
+        except BaseException:
+            writer.close()
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        writer.close()
+        meta.update(rows=writer.rows, columns=writer.columns, annotations=annotations or {})
+        self._commit(path, tmp_dir, meta)
+
+    def read_frame(self, path, parse_chunks, annotations=None):
+        """Return the whole of `path` as one data frame"""
+        import pandas as pd
+        chunks = list(self.frame_chunks(path, parse_chunks, annotations=annotations))
+        return chunks[0] if len(chunks) == 1 else pd.concat(chunks, ignore_index=True)
+
+    def _read_chunks(self, entry, meta, chunksize):
+        import pandas as pd
+        rows = meta['rows']
+        arrays = {}
+        for col in meta['columns']:
+            arrays[col['name']] = _open_column(entry, col, rows)
+        step = chunksize or max(rows, 1)
+        for start in range(0, max(rows, 1), step):
+            stop = min(start + step, rows)
+            yield pd.DataFrame({col['name']: _column_slice(col, arrays[col['name']], start, stop)
+                                for col in meta['columns']})
+
+    # JSON sources
+
+    def load_json(self, path):
+        """Return the parsed JSON document at `path`, unpickled on a cache hit"""
+        meta = self._lookup(path)
+        if meta is not None:
+            self.hits += 1
+            with open(os.path.join(self._entry_dir(path), 'document.pkl'), 'rb') as f:
+                return pickle.load(f)
+
+        self.misses += 1
+        meta = self._source_meta(path)
+        with open(path, 'r') as f:
+            document = json.load(f)
+        tmp_dir = self._new_tmp_dir(path)
+        with open(os.path.join(tmp_dir, 'document.pkl'), 'wb') as f:
+            pickle.dump(document, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._commit(path, tmp_dir, meta)
+        return document
+
+
+class _ColumnWriter:
+    """Appends data frame chunks to one raw binary file per column"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.rows = 0
+        self.columns = None
+        self._files = {}
+
+    def append(self, chunk):
+        import numpy as np
+        import pandas as pd
+        if self.columns is None:
+            self.columns = [self._describe(i, name, chunk[name]) for i, name in enumerate(chunk.columns)]
+        for col in self.columns:
+            series = chunk[col['name']]
+            f = self._file(col['file'])
+            if col['kind'] == 'category':
+                categories = col['categories']
+                known = set(categories)
+                categories.extend(c for c in series.cat.categories if c not in known)
+                codes = pd.Categorical(series, categories=categories).codes
+                f.write(codes.astype(col['dtype']).tobytes())
+            elif col['kind'] == 'string':
+                values = series.astype(object).where(series.notna(), '')
+                encoded = [value.encode() for value in values]
+                lengths = np.fromiter((len(b) + 1 for b in encoded), dtype=np.int64, count=len(encoded))
+                self._file(col['offsets']).write((np.cumsum(lengths) + col['bytes']).tobytes())
+                f.write(b''.join(b + b'\x00' for b in encoded))
+                col['bytes'] += int(lengths.sum())
+                # Missing values are stored as '' plus a flag, so they read back as NaN
+                self._file(col['missing']).write(series.isna().to_numpy(dtype=np.bool_).tobytes())
+            else:
+                f.write(series.to_numpy(dtype=col['dtype']).tobytes())
+        self.rows += len(chunk)
+
+    def _file(self, name):
+        if name not in self._files:
+            self._files[name] = open(os.path.join(self.directory, name), 'ab')
+        return self._files[name]
+
+    def _describe(self, i, name, series):
+        import pandas as pd
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            return {'name': name, 'kind': 'category', 'file': f'{i}.bin', 'dtype': 'int32', 'categories': []}
+        if pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_bool_dtype(series.dtype):
+            return {'name': name, 'kind': 'numeric', 'file': f'{i}.bin', 'dtype': series.dtype.str}
+        return {'name': name, 'kind': 'string', 'file': f'{i}.bin', 'offsets': f'{i}.offsets.bin',
+                'missing': f'{i}.missing.bin', 'dtype': str(series.dtype), 'bytes': 0}
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self.columns = self.columns or []
+
+
+def _open_column(entry, col, rows):
+    import numpy as np
+    path = os.path.join(entry, col['file'])
+    if col['kind'] == 'string':
+        offsets = np.memmap(os.path.join(entry, col['offsets']), dtype=np.int64, mode='r', shape=(rows,)) \
+            if rows else np.empty(0, dtype=np.int64)
+        data = np.memmap(path, dtype=np.uint8, mode='r') if col['bytes'] else np.empty(0, dtype=np.uint8)
+        missing = np.memmap(os.path.join(entry, col['missing']), dtype=np.bool_, mode='r', shape=(rows,)) \
+            if rows else np.empty(0, dtype=np.bool_)
+        return offsets, data, missing
+    if rows == 0:
+        return np.empty(0, dtype=col['dtype'])
+    return np.memmap(path, dtype=col['dtype'], mode='r', shape=(rows,))
+
+
+def _column_slice(col, array, start, stop):
+    import numpy as np
+    import pandas as pd
+    if col['kind'] == 'category':
+        return pd.Categorical.from_codes(array[start:stop], categories=col['categories'])
+    if col['kind'] == 'string':
+        offsets, data, missing = array
+        begin = int(offsets[start - 1]) if start else 0
+        end = int(offsets[stop - 1]) if stop else 0
+        values = np.array(data[begin:end].tobytes().decode().split('\x00')[:-1], dtype=object)
+        values[missing[start:stop]] = np.nan
+        # A Series keeps object columns object instead of inferring the string dtype
+        return pd.Series(values, dtype=col['dtype'])
+    return np.asarray(array[start:stop])
@@ -0,0 +1,111 @@
+from collections import namedtuple
+from functools import partial
+
+# Column groups of student_data.csv (see data_sources_specification.markdown)
+DEMOGRAPHIC_COLUMNS = ['Student_ID', 'Age', 'Gender', 'Grade_Level']
+PRE_COLUMNS = ['Pre_Sign_Vocabulary_Score', 'Pre_Comprehension_Score', 'Pre_Production_Score']
+POST_COLUMNS = ['Post_Sign_Vocabulary_Score', 'Post_Comprehension_Score', 'Post_Production_Score']
+VR_COLUMNS = ['VR_Satisfaction_Overall', 'VR_Ease_of_Use', 'VR_Engagement_Level', 'VR_Recommendation']
+GAIN_COLUMNS = ['Vocabulary_Gain', 'Comprehension_Gain', 'Production_Gain']
+
+# (pre column, post column, gain column, display name)
+ASSESSMENT_PAIRS = [
+    ('Pre_Sign_Vocabulary_Score', 'Post_Sign_Vocabulary_Score', 'Vocabulary_Gain', 'Vocabulary'),
+    ('Pre_Comprehension_Score', 'Post_Comprehension_Score', 'Comprehension_Gain', 'Comprehension'),
+    ('Pre_Production_Score', 'Post_Production_Score', 'Production_Gain', 'Production')
+]
+
+# Explicit compact schema so pandas never falls back to int64/object inference.
+# Scores (0-100) fit int8, and signed so post - pre gains cannot wrap around;
+# student_schema validates every row against the spec's domains before the cast
+STUDENT_DTYPES = {
+    'Student_ID': 'string',
+    'Age': 'int8',
+    'Gender': 'category',
+    'Grade_Level': 'int8',
+    **{col: 'int8' for col in PRE_COLUMNS + POST_COLUMNS},
+    **{col: 'int8' for col in VR_COLUMNS}
+}
+
+DEFAULT_CHUNKSIZE = 100_000
+
+# Success-metric masks: name -> (column, minimum value)
+SUCCESS_THRESHOLDS = {
+    'Positive_Experience': ('VR_Satisfaction_Overall', 4),
+    'High_Engagement': ('VR_Engagement_Level', 4),
+    'Would_Recommend': ('VR_Recommendation', 4),
+    'Vocabulary_Improved': ('Vocabulary_Gain', 10),
+    'Comprehension_Improved': ('Comprehension_Gain', 10),
+    'Production_Improved': ('Production_Gain', 10)
+}
+
+
+def _difference(df, post_col, pre_col):
+    return df[post_col] - df[pre_col]
+
+
+def _at_least(df, col, threshold):
+    return df[col] >= threshold
+
+
+# Every derived column, declared once: name -> (source columns, function(frame))
+DerivedColumn = namedtuple('DerivedColumn', ['sources', 'compute'])
+DERIVED_COLUMNS = {
+    **{gain_col: DerivedColumn([pre_col, post_col], partial(_difference, post_col=post_col, pre_col=pre_col))
+       for pre_col, post_col, gain_col, _ in ASSESSMENT_PAIRS},
+    **{name: DerivedColumn([col], partial(_at_least, col=col, threshold=threshold))
+       for name, (col, threshold) in SUCCESS_THRESHOLDS.items()}
+}
+
+
+def add_learning_gains(df):
+    """Add the post - pre gain columns to a student data frame in place"""
+    for gain_col in GAIN_COLUMNS:
+        df[gain_col] = DERIVED_COLUMNS[gain_col].compute(df)
+    return df
+
+
+def read_student_data(csv_file='student_data.csv', cache=None, report=None):
+    """
+    Read the whole student CSV, validated and cast to the compact schema, via
+    `cache` if given. Rows failing validation are left out and counted in
+    `report` (a student_schema.ValidationReport).
+    """
+    chunks = list(read_student_chunks(csv_file, None, cache, report))
+    return chunks[0]
+
+
+def read_student_chunks(csv_file='student_data.csv', chunksize=DEFAULT_CHUNKSIZE, cache=None, report=None):
+    """
+    Yield the student CSV as validated, schema-typed chunks of at most
+    `chunksize` rows (one frame if None). Rows failing validation are left
+    out and counted in `report`; on a cache hit the report saved with the
+    cache entry is merged instead.
+    """
+    from student_schema import ValidationReport
+    if cache is None:
+        validator = yield from _parse_chunks(csv_file, chunksize)
+        if report is not None:
+            report.merge(validator.report)
+        return
+    annotations = {}
+
+    def parse(path):
+        validator = yield from _parse_chunks(path, chunksize)
+        annotations['validation'] = validator.report.as_dict()
+
+    if chunksize is None:
+        yield cache.read_frame(csv_file, parse, annotations)
+    else:
+        yield from cache.frame_chunks(csv_file, parse, chunksize, annotations)
+    if report is not None and 'validation' in annotations:
+        report.merge(ValidationReport.from_dict(annotations['validation']))
+
+
+def _parse_chunks(csv_file, chunksize):
+    """Yield validated chunks; returns the StudentValidator"""
+    from student_schema import StudentValidator, parse_student_csv
+    validator = StudentValidator()
+    for chunk in parse_student_csv(lambda: csv_file, chunksize):
+        yield validator.validate(chunk)
+    return validator
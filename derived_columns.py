@@ -0,0 +1,57 @@
+from data_ingestion import DERIVED_COLUMNS
+
+
+class DerivedFrame:
+    """
+    A student data frame with lazily computed, memoized derived columns.
+
+    Gains and success-metric masks (see `data_ingestion.DERIVED_COLUMNS`)
+    already in the frame are read from it; any other is computed from its
+    source columns on first use and kept, so every analysis step reuses one
+    Series instead of rebuilding it. `with_derived()` hands those same Series
+    to code that needs a plain frame (e.g. the database writer) without
+    adding them to the frame.
+    """
+
+    def __init__(self, frame, derived=DERIVED_COLUMNS):
+        self.frame = frame
+        self.derived = derived
+        self._cache = {}
+
+    def __getitem__(self, name):
+        return self.column(name)
+
+    def __contains__(self, name):
+        return name in self.frame or name in self.derived
+
+    def __len__(self):
+        return len(self.frame)
+
+    def column(self, name):
+        """A column of the frame, or a derived column computed on first use"""
+        if name in self.frame or name not in self.derived:
+            return self.frame[name]
+        values = self._cache.get(name)
+        if values is not None:
+            return values
+        spec = self.derived[name]
+        values = self._cache[name] = spec.compute(_SourceView(self, spec.sources))
+        return values
+
+    def with_derived(self, names):
+        """The frame with the derived columns `names` added, sharing their cached Series"""
+        missing = {name: self.column(name) for name in names if name not in self.frame}
+        return self.frame.assign(**missing) if missing else self.frame
+
+
+class _SourceView:
+    """Column lookups for a derived column's compute function, routed through the store"""
+
+    def __init__(self, store, sources):
+        self.store = store
+        self.sources = sources
+
+    def __getitem__(self, name):
+        if name not in self.sources:
+            raise KeyError(f"'{name}' is not a declared source column")
+        return self.store.column(name)
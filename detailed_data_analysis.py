@@ -1,21 +1,133 @@
+import json
+
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import sqlite3
-from scipy import stats
+
+from cohort_statistics import CohortSummary, summarize_chunks
+from data_cache import CACHE_DIR, DataCache
+from data_ingestion import DEFAULT_CHUNKSIZE, GAIN_COLUMNS, read_student_chunks, read_student_data
+from derived_columns import DerivedFrame
+from figure_cache import FigureCache
+from figure_rendering import DETAILED_FIGURES, RESOLUTION_PROFILES, render_figures, select_figures
+from incremental_statistics import IncrementalStatistics
+from likert_histograms import LikertHistogram
+from mixed_methods import SCORE_SOURCE_COLUMNS, StudentScoreIndex, join_interviews, outcomes_by
+from paired_tests import PairedTestAccumulator, paired_tests_from_summary
+from resampling import DEFAULT_RESAMPLES, resampling_table
+from result_store import DB_FILE, ResultStore
+from score_matrix import open_score_matrix
+from stage_metrics import DEFAULT_SAMPLE_INTERVAL, StageMetrics
+from stage_scheduler import Stage, StageScheduler, source_fingerprint
+from student_schema import ValidationReport
+from transcript_nlp import TranscriptPipeline
+
+# Groupings for the per-subgroup paired tests and reaction levels; exports with extra keys can pass
+# e.g. [['School', 'Class', 'Grade_Level']]
+DEFAULT_TEST_GROUPS = [['Gender'], ['Grade_Level']]
+INTERVIEW_FILES = ['student_interview_data.json', 'educator_interview_data.json']
+
+def _stack_sources(tables, name):
+    """One table of per-source outcome tables, indexed by (Source, name)"""
+    return pd.concat({source: table.rename_axis(name) for source, table in tables.items()}, names=['Source'])
 
 class DetailedDataAnalysis:
-    def __init__(self, csv_file):
-        """Initialize with CSV file path."""
-        self.data = pd.read_csv(csv_file)
-        self.setup_database()
+    def __init__(self, csv_file, chunksize=None, cache_dir=CACHE_DIR, test_groups=None, state_file=None,
+                 db_path=DB_FILE, metrics=None):
+        """
+        Initialize with CSV file path.
+
+        With `chunksize` set the CSV is streamed: chunks are written to the
+        database as they are read and only a CohortSummary plus a bounded
+        plotting sample (`self.data`) are kept in memory. Parsed inputs are
+        cached in binary form under `cache_dir` (None disables the cache),
+        which also holds the manifest of rendered figures.
+        `test_groups` lists the column groupings for subgroup paired tests and
+        reaction histograms.
+        With `state_file` set, statistics persist between runs and only rows
+        appended to the CSV since the last run are read and written.
+        All steps share one `ResultStore` connection to `db_path`.
+        Rows failing ingest validation are left out; `self.validation` reports
+        them and is saved as the `validation_report` table.
+        `metrics` (a StageMetrics) instruments step 1 and every stage of
+        run_complete_analysis; by default its records are kept in memory
+        only (pass a StageMetrics with a log or database sink to keep them).
+        """
+        self.csv_file = csv_file
+        self.chunksize = chunksize
+        self.state_file = state_file
+        self.store = ResultStore(db_path)
+        self.cache = DataCache(cache_dir) if cache_dir else None
+        self.figure_cache = FigureCache(cache_dir) if cache_dir else None
+        self.summary = None
+        self.features = None
+        self.student_interviews = None
+        self.student_transcripts = None
+        test_groups = test_groups or DEFAULT_TEST_GROUPS
+        self.test_groups = test_groups
+        self.subgroup_tests = [PairedTestAccumulator(by=keys) for keys in test_groups]
+        self.subgroup_reactions = [LikertHistogram(by=keys) for keys in test_groups]
+        self.validation = ValidationReport()
+        self.metrics = metrics or StageMetrics('detailed')
+        self.metrics.watch(self.cache)
+        self.metrics.watch(self.figure_cache)
+        with self.metrics.stage('load_data'):
+            if state_file:
+                self.setup_incremental_database(csv_file, state_file, test_groups)
+            elif chunksize:
+                self.data = None
+                self.setup_database(read_student_chunks(csv_file, chunksize, cache=self.cache,
+                                                        report=self.validation))
+            else:
+                self.features = DerivedFrame(read_student_data(csv_file, cache=self.cache, report=self.validation))
+                self.data = self.features.frame
+                self.setup_database()
+            if self.features is None:
+                self.features = DerivedFrame(self.data)
+        if not self.validation.ok:
+            print(self.validation.summary())
 
-    def setup_database(self):
+    def setup_database(self, chunks=None):
         """Step 1: Set up SQLite database."""
-        conn = sqlite3.connect('sign_language.db')
-        self.data.to_sql('student_data', conn, if_exists='replace', index=False)
-        conn.close()
+        # Student rows are upserted only when the CSV changed since the last load
+        write = not self.store.source_unchanged(self.csv_file)
+        with self.store.transaction():
+            if chunks is None:
+                if write:
+                    # Written with the gains the analysis steps reuse
+                    self.store.upsert_students(self.features.with_derived(GAIN_COLUMNS), track_loaded=True)
+            else:
+                def write_chunk(chunk):
+                    if write:
+                        self.store.upsert_students(chunk, track_loaded=True)
+                    for accumulator in self.subgroup_tests + self.subgroup_reactions:
+                        accumulator.update(chunk)
+                self.summary, self.data = summarize_chunks(chunks, on_chunk=write_chunk)
+            self.store.write_results('validation_report', self.validation.to_frame())
+            if write:
+                self.store.prune_students()
+                self.store.record_source(self.csv_file)
+        self.metrics.count(rows=self.summary.n if self.summary is not None else len(self.data))
+
+    def setup_incremental_database(self, csv_file, state_file, test_groups):
+        """Step 1 (incremental): append only new rows and update the saved statistics."""
+        state = IncrementalStatistics.load(state_file, csv_file, test_groups)
+        rebuilt = []
+        def write_chunk(chunk, replace):
+            if replace:
+                rebuilt.append(True)
+            self.store.upsert_students(chunk, track_loaded=bool(rebuilt))
+        with self.store.transaction():
+            new_rows = state.refresh(self.chunksize or DEFAULT_CHUNKSIZE, on_chunk=write_chunk)
+            if rebuilt:
+                self.store.prune_students()
+            self.validation = state.validator.report
+            self.store.write_results('validation_report', self.validation.to_frame())
+        state.save(state_file)
+        
+        self.summary, self.data = state.summary, state.reservoir.sample
+        self.subgroup_tests = state.group_tests
+        self.subgroup_reactions = state.group_reactions
+        self.metrics.count(rows=new_rows)
+        print(f"✓ {new_rows} new student rows folded into saved statistics ({state.rows} total)")
 
     def calculate_learning_gains(self):
         """Step 2: Calculate learning gains."""
@@ -23,13 +135,11 @@ class DetailedDataAnalysis:
         print("STEP 2: CALCULATE LEARNING GAINS")
         print("="*80)
         
-        self.data['Vocabulary_Gain'] = self.data['Post_Sign_Vocabulary_Score'] - self.data['Pre_Sign_Vocabulary_Score']
-        self.data['Comprehension_Gain'] = self.data['Post_Comprehension_Score'] - self.data['Pre_Comprehension_Score']
-        self.data['Production_Gain'] = self.data['Post_Production_Score'] - self.data['Pre_Production_Score']
-        
-        conn = sqlite3.connect('sign_language.db')
-        self.data.to_sql('student_data', conn, if_exists='replace', index=False)
-        conn.close()
+        if self.summary is None:
+            self.summary = CohortSummary.from_frame(self.features)
+            for accumulator in self.subgroup_tests + self.subgroup_reactions:
+                accumulator.update(self.data)
+        self.metrics.count(rows=self.summary.n)
         
         print("✓ Learning gains calculated and saved to database")
 
@@ -39,16 +149,15 @@ class DetailedDataAnalysis:
         print("STEP 3: DESCRIPTIVE STATISTICS")
         print("="*80)
         
-        stats_summary = self.data.describe()
+        stats_summary = self.summary.describe()
+        self.metrics.count(rows=self.summary.n)
         print(stats_summary)
         
-        conn = sqlite3.connect('sign_language.db')
-        stats_summary.to_sql('descriptive_stats', conn, if_exists='replace')
-        conn.close()
+        self.store.write_results('descriptive_stats', stats_summary)
         
         print("✓ Descriptive statistics calculated and saved to database")
 
-    def perform_inferential_statistics(self):
+    def perform_inferential_statistics(self, resamples=DEFAULT_RESAMPLES, seed=0, workers=None):
         """Step 4: Perform inferential statistics."""
         print("\n" + "="*80)
         print("STEP 4: INFERENTIAL STATISTICS")
@@ -56,294 +165,297 @@ class DetailedDataAnalysis:
         
         t_tests = {}
         effect_sizes = {}
-        assessments = {
-            'Vocabulary': ('Pre_Sign_Vocabulary_Score', 'Post_Sign_Vocabulary_Score'),
-            'Comprehension': ('Pre_Comprehension_Score', 'Post_Comprehension_Score'),
-            'Production': ('Pre_Production_Score', 'Post_Production_Score')
-        }
+        test_results = paired_tests_from_summary(self.summary)
+        self.metrics.count(rows=self.summary.n)
         
-        for assessment, (pre_col, post_col) in assessments.items():
-            t_stat, p_val = stats.ttest_rel(self.data[pre_col], self.data[post_col])
-            t_tests[assessment] = {'t-statistic': t_stat, 'p-value': p_val}
-            effect_size = (self.data[post_col].mean() - self.data[pre_col].mean()) / self.data[pre_col].std()
-            effect_sizes[assessment] = effect_size
+        for assessment, result in test_results.iterrows():
+            # Reported as ttest_rel(pre, post), i.e. pre - post
+            t_tests[assessment] = {'t-statistic': -result['t_statistic'], 'p-value': result['p_value']}
+            # Same pooled-SD Cohen's d as the main analysis script; Glass's delta is the pre-SD variant
+            effect_sizes[assessment] = {'Cohen\'s d': result['cohens_d'], 'Glass\'s delta': result['glass_delta']}
         
         print("T-test Results:", t_tests)
-        print("Effect Sizes (Cohen's d):", effect_sizes)
+        print("Effect Sizes (Cohen's d):", {name: sizes['Cohen\'s d'] for name, sizes in effect_sizes.items()})
         
-        conn = sqlite3.connect('sign_language.db')
-        pd.DataFrame(t_tests).T.to_sql('t_test_results', conn, if_exists='replace')
-        pd.DataFrame(effect_sizes, index=['Cohen\'s d']).to_sql('effect_sizes', conn, if_exists='replace')
-        conn.close()
+        inference = None
+        if resamples:
+            # Resampled outside the transaction, which holds the store for its whole body
+            inference = resampling_table(self.resampling_data(), n_resamples=resamples, seed=seed, workers=workers)
+            if inference['n'].iloc[0] < self.summary.n:
+                print(f"Resampling uses the {inference['n'].iloc[0]}-row plotting sample of {self.summary.n} students")
+            print(f"Bootstrap 95% CIs and permutation p-values ({resamples} resamples, seed {seed}):")
+            print(inference[['estimate', 'ci_low', 'ci_high', 'p_value']].round(4).to_string())
+        
+        with self.store.transaction():
+            self.store.write_results('t_test_results', pd.DataFrame(t_tests).T)
+            self.store.write_results('effect_sizes', pd.DataFrame(effect_sizes))
+            if inference is not None:
+                self.store.write_results('resampling_inference', inference)
         
         print("✓ Inferential statistics calculated and saved to database")
 
-def perform_subgroup_analysis(self):
-    """Step 5: Perform subgroup analysis."""
-    print("\n" + "="*80)
-    print("STEP 5: SUBGROUP ANALYSIS")
-    print("="*80)
-    
-    gender_gains = self.data.groupby('Gender')[['Vocabulary_Gain', 'Comprehension_Gain', 'Production_Gain']].mean()
-    grade_gains = self.data.groupby('Grade_Level')[['Vocabulary_Gain', 'Comprehension_Gain', 'Production_Gain']].mean()
-    
-    # Corrected line: observed=True moved to groupby()
-    age_bins = pd.cut(self.data['Age'], bins=range(6, 14))
-    age_gains = self.data.groupby(age_bins, observed=True)[['Vocabulary_Gain', 'Comprehension_Gain', 'Production_Gain']].mean()
-    
-    print("Gender Gains:\n", gender_gains)
-    print("Grade Level Gains:\n", grade_gains)
-    print("Age Group Gains:\n", age_gains)
-    
-    conn = sqlite3.connect('sign_language.db')
-    gender_gains.to_sql('gender_gains', conn, if_exists='replace')
-    grade_gains.to_sql('grade_gains', conn, if_exists='replace')
-    age_gains.to_sql('age_gains', conn, if_exists='replace')
-    conn.close()
-    
-    print("✓ Subgroup analysis completed and saved to database")
-    
-    def perform_qualitative_analysis(self):
-        """Step 6: Perform qualitative analysis (placeholder)."""
+    def resampling_data(self):
+        """
+        Rows to resample: the memory-mapped score matrix of the whole cohort,
+        which resampling workers map instead of receiving pickled columns, or
+        without the input cache or with incremental state (where building it
+        would reread the CSV) the loaded rows.
+        """
+        if self.cache is None or self.state_file:
+            return self.features
+        return open_score_matrix(self.csv_file, self.cache.cache_dir, self.chunksize or DEFAULT_CHUNKSIZE,
+                                 cache=self.cache)
+
+    def perform_subgroup_analysis(self):
+        """Step 5: Perform subgroup analysis."""
+        print("\n" + "="*80)
+        print("STEP 5: SUBGROUP ANALYSIS")
+        print("="*80)
+        
+        gender_gains = self.summary.group_means('Gender')
+        grade_gains = self.summary.group_means('Grade_Level')
+        age_gains = self.summary.group_means('Age', bins=range(6, 14))
+        self.metrics.count(rows=self.summary.n)
+        
+        print("Gender Gains:\n", gender_gains)
+        print("Grade Level Gains:\n", grade_gains)
+        print("Age Group Gains:\n", age_gains)
+        # Every other grouping set comes from the same one-scan cube, e.g.
+        print("Gender x Grade Level Gains:\n", self.summary.cube.means(['Gender', 'Grade_Level']))
+        
+        # Paired t, p, Cohen's d and CI for every assessment in every subgroup
+        subgroup_tables = {}
+        for accumulator in self.subgroup_tests:
+            table_name = '_'.join(key.lower() for key in accumulator.by) + '_paired_tests'
+            subgroup_tables[table_name] = accumulator.results()
+            print(f"Paired Tests by {' x '.join(accumulator.by)}:\n", subgroup_tables[table_name])
+        
+        # High/moderate/low reaction splits per subgroup, from one rating histogram each
+        for histogram in self.subgroup_reactions:
+            table_name = '_'.join(key.lower() for key in histogram.by) + '_reaction_levels'
+            subgroup_tables[table_name] = histogram.results()
+            print(f"Reaction Levels by {' x '.join(histogram.by)}:\n", subgroup_tables[table_name])
+        
+        with self.store.transaction():
+            self.store.write_results('gender_gains', gender_gains)
+            self.store.write_results('grade_gains', grade_gains)
+            # sqlite3 cannot bind pandas Interval labels, so store them as text
+            self.store.write_results('age_gains', age_gains.rename(index=str))
+            # Count, sum and sum of squares of every gain and reaction column for
+            # every grouping set, indexed on (Grouping, Gender, Grade_Level, Age)
+            self.store.write_results('subgroup_cube', self.summary.cube.table())
+            for table_name, results in subgroup_tables.items():
+                self.store.write_results(table_name, results)
+        
+        print("✓ Subgroup analysis completed and saved to database")
+        
+    def perform_qualitative_analysis(self, workers=None):
+        """Step 6: Perform qualitative analysis of the interview transcripts."""
         print("\n" + "="*80)
         print("STEP 6: QUALITATIVE ANALYSIS")
         print("="*80)
-        print("✓ Qualitative analysis completed (placeholder implementation)")
-        # Placeholder for actual qualitative analysis from JSON files
+        
+        interviews = []
+        for path, key in zip(INTERVIEW_FILES, ['Interview_ID', 'Educator_ID']):
+            if self.cache is not None:
+                document = self.cache.load_json(path)
+            else:
+                with open(path, 'r') as f:
+                    document = json.load(f)
+            interviews.extend((interview[key], interview) for interview in document['interviews'])
+        
+        # Only transcripts that are new or edited since the last run are processed
+        pipeline = TranscriptPipeline(self.cache.cache_dir if self.cache else None, workers=workers)
+        results = pipeline.run([interview['Transcript'] for _, interview in interviews])
+        print(f"Transcripts processed: {pipeline.misses} new, {pipeline.hits} cached")
+        self.metrics.count(rows=len(results), cache_hits=pipeline.hits, cache_misses=pipeline.misses)
+        
+        transcript_table = pd.DataFrame({
+            'Student_ID': [interview.get('Student_ID') for _, interview in interviews],
+            'Tokens': [result['n_tokens'] for result in results],
+            'Polarity': [result['polarity'] for result in results],
+            'Subjectivity': [result['subjectivity'] for result in results],
+            'Sentiment': [result['sentiment'] for result in results],
+            'Coded_Sentiment': [interview.get('Sentiment_Score') for _, interview in interviews],
+            'Themes': ['; '.join(result['themes']) for result in results]
+        }, index=pd.Index([interview_id for interview_id, _ in interviews], name='Interview_ID'))
+        source = transcript_table['Student_ID'].isna().map({False: 'Student', True: 'Educator'}).rename('Source')
+        print(transcript_table.groupby(source)[['Polarity', 'Subjectivity']].mean())
+        
+        self.store.write_results('transcript_analysis', transcript_table)
+        # Kept for the integration step
+        students = [i for i, (_, interview) in enumerate(interviews) if interview.get('Student_ID')]
+        self.student_interviews = [interviews[i][1] for i in students]
+        self.student_transcripts = [results[i] for i in students]
+        print("✓ Qualitative analysis completed and saved to database")
 
     def integrate_findings(self):
         """Step 7: Integrate quantitative and qualitative findings."""
         print("\n" + "="*80)
         print("STEP 7: INTEGRATE FINDINGS")
         print("="*80)
-        print("✓ Findings integrated (placeholder implementation)")
-        # Placeholder for integration logic
+        
+        # Student_ID hash index over the scores of every student; when only a
+        # sample is in memory the scores are read back from the database
+        scores = StudentScoreIndex()
+        if len(self.features) < self.summary.n:
+            for chunk in self.store.read_students(SCORE_SOURCE_COLUMNS):
+                scores.update(chunk)
+        else:
+            scores.update(self.features)
+        
+        joined = join_interviews(scores, self.student_interviews, self.student_transcripts)
+        self.metrics.count(rows=len(joined))
+        matched = int(joined[GAIN_COLUMNS[0]].notna().sum())
+        print(f"Interviews joined to student scores: {matched}/{len(joined)}")
+        
+        shown = [f'{col}_mean' for col in GAIN_COLUMNS + ['VR_Satisfaction_Overall']]
+        by_sentiment = {source: outcomes_by(joined, key) for source, key in
+                        [('coded', 'Coded_Sentiment'), ('computed', 'Sentiment')]}
+        by_theme = {source: outcomes_by(joined, key) for source, key in
+                    [('coded', 'Coded_Themes'), ('codebook', 'Themes')]}
+        print("\nOutcomes by coded sentiment:")
+        print(by_sentiment['coded'][['interviews'] + shown].round(2).to_string())
+        print("\nOutcomes by transcript theme (codebook):")
+        print(by_theme['codebook'][['interviews'] + shown].round(2).to_string())
+        
+        joined['Coded_Themes'] = joined['Coded_Themes'].map('; '.join)
+        joined['Themes'] = joined['Themes'].map('; '.join)
+        with self.store.transaction():
+            self.store.write_results('interview_outcomes', joined)
+            self.store.write_results('outcomes_by_sentiment', _stack_sources(by_sentiment, 'Sentiment'))
+            self.store.write_results('outcomes_by_theme', _stack_sources(by_theme, 'Theme'))
+        
+        print("✓ Findings integrated and saved to database")
+
+    def create_comprehensive_visualizations(self, figures=None, profile='print', workers=None):
+        """
+        Step 8: Enhanced Visualization
 
-    def create_comprehensive_visualizations(self):
-        """Step 8: Enhanced Visualization"""
+        `figures` selects a subset of DETAILED_FIGURES by name (all if None),
+        `profile` a resolution from RESOLUTION_PROFILES. Figures are rendered
+        on a process pool of `workers` processes; 1 renders in-process.
+        Figures whose data, style and resolution are unchanged since they
+        were last rendered keep their PNG.
+        """
         print("\n" + "="*80)
         print("STEP 8: COMPREHENSIVE VISUALIZATIONS")
         print("="*80)
         
-        # Set up the plotting style
-        plt.style.use('default')
-        sns.set_palette("husl")
+        # Aggregate panels read the exact cohort summary; the box plot and
+        # scatter use self.features, over self.data (a bounded sample in streaming mode)
+        names = select_figures(figures)
+        self.metrics.count(rows=len(self.features))
+        reused = self.figure_cache.hits if self.figure_cache else 0
+        render_figures(self.summary, self.features, names, profile=profile, workers=workers, cache=self.figure_cache)
+        reused = (self.figure_cache.hits if self.figure_cache else 0) - reused
         
-        # 1. Pre-test vs Post-test Comparison (Box plots)
-        fig1 = plt.figure(figsize=(8, 6))
-        ax1 = plt.subplot()
-        pre_post_data = []
-        labels = []
-        assessment_mapping = {
-            'Vocabulary': ('Pre_Sign_Vocabulary_Score', 'Post_Sign_Vocabulary_Score'),
-            'Comprehension': ('Pre_Comprehension_Score', 'Post_Comprehension_Score'),
-            'Production': ('Pre_Production_Score', 'Post_Production_Score')
-        }
-        for assessment, (pre_col, post_col) in assessment_mapping.items():
-            pre_post_data.extend([self.data[pre_col], self.data[post_col]])
-            labels.extend([f'Pre-{assessment}', f'Post-{assessment}'])
-        bp = ax1.boxplot(pre_post_data, labels=labels, patch_artist=True)
-        colors = ['lightblue', 'lightgreen'] * 3
-        for patch, color in zip(bp['boxes'], colors):
-            patch.set_facecolor(color)
-        ax1.set_title('Pre-test vs Post-test Score Distributions', fontsize=16)
-        ax1.set_ylabel('Score', fontsize=14)
-        ax1.set_xlabel('Assessment Type', fontsize=14)
-        plt.xticks(rotation=45, ha='right', fontsize=12)
-        plt.grid(True, axis='y')
-        plt.tight_layout()
-        plt.savefig('fig_pre_post_scores.png', dpi=300, bbox_inches='tight')
-        plt.close()
-
-        # 2. Learning Gains by Assessment Type
-        fig2 = plt.figure(figsize=(8, 6))
-        ax2 = plt.subplot()
-        gains = [self.data['Vocabulary_Gain'].mean(), self.data['Comprehension_Gain'].mean(), self.data['Production_Gain'].mean()]
-        gain_std = [self.data['Vocabulary_Gain'].std(), self.data['Comprehension_Gain'].std(), self.data['Production_Gain'].std()]
-        bars = ax2.bar(['Vocabulary', 'Comprehension', 'Production'], gains, yerr=gain_std, capsize=5, alpha=0.8, color=['skyblue', 'lightgreen', 'lightcoral'])
-        ax2.set_title('Average Learning Gains with Error Bars', fontsize=16)
-        ax2.set_ylabel('Learning Gain (Points)', fontsize=14)
-        ax2.set_xlabel('Assessment Type', fontsize=14)
-        for bar, gain in zip(bars, gains):
-            height = bar.get_height()
-            ax2.text(bar.get_x() + bar.get_width()/2., height + 1, f'{gain:.1f}', ha='center', va='bottom', fontsize=12)
-        plt.grid(True, axis='y')
-        plt.tight_layout()
-        plt.savefig('fig_learning_gains.png', dpi=300, bbox_inches='tight')
-        plt.close()
-
-        # 3. VR Reaction Scores
-        fig3 = plt.figure(figsize=(8, 6))
-        ax3 = plt.subplot()
-        vr_metrics = ['Satisfaction', 'Ease of Use', 'Engagement', 'Recommendation']
-        vr_scores = [self.data['VR_Satisfaction_Overall'].mean(), self.data['VR_Ease_of_Use'].mean(), self.data['VR_Engagement_Level'].mean(), self.data['VR_Recommendation'].mean()]
-        bars = ax3.bar(vr_metrics, vr_scores, color=['skyblue', 'lightgreen', 'lightcoral', 'orange'], alpha=0.8)
-        ax3.set_title('VR Application Reaction Scores', fontsize=16)
-        ax3.set_ylabel('Average Rating (1-5)', fontsize=14)
-        ax3.set_xlabel('Metric', fontsize=14)
-        ax3.set_ylim(0, 5)
-        ax3.axhline(y=4, color='red', linestyle='--', alpha=0.7, label='Target = 4.0')
-        for bar, score in zip(bars, vr_scores):
-            height = bar.get_height()
-            ax3.text(bar.get_x() + bar.get_width()/2., height + 0.05, f'{score:.2f}', ha='center', va='bottom', fontsize=12)
-        plt.xticks(fontsize=12)
-        plt.legend()
-        plt.grid(True, axis='y')
-        plt.tight_layout()
-        plt.savefig('fig_vr_reaction_scores.png', dpi=300, bbox_inches='tight')
-        plt.close()
-
-        # 4. Demographics - Age Distribution
-        fig4 = plt.figure(figsize=(8, 6))
-        ax4 = plt.subplot()
-        ax4.hist(self.data['Age'], bins=range(6, 14), alpha=0.7, color='skyblue', edgecolor='black')
-        ax4.set_title('Age Distribution (N=100)', fontsize=16)
-        ax4.set_xlabel('Age (Years)', fontsize=14)
-        ax4.set_ylabel('Number of Students', fontsize=14)
-        plt.xticks(fontsize=12)
-        plt.grid(True, axis='y')
-        plt.tight_layout()
-        plt.savefig('fig_age_distribution.png', dpi=300, bbox_inches='tight')
-        plt.close()
-
-        # 5. Demographics - Gender Distribution
-        fig5 = plt.figure(figsize=(6, 6))
-        ax5 = plt.subplot()
-        gender_counts = self.data['Gender'].value_counts()
-        ax5.pie(gender_counts.values, labels=gender_counts.index, autopct='%1.1f%%', startangle=90, textprops={'fontsize': 12}, colors=['blue', 'orange', 'green'])
-        ax5.set_title('Gender Distribution', fontsize=16)
-        plt.tight_layout()
-        plt.savefig('fig_gender_distribution.png', dpi=300, bbox_inches='tight')
-        plt.close()
-
-        # 6. Learning Gains Distribution
-        fig6 = plt.figure(figsize=(8, 6))
-        ax6 = plt.subplot()
-        ax6.hist([self.data['Vocabulary_Gain'], self.data['Comprehension_Gain'], self.data['Production_Gain']], bins=15, alpha=0.7, label=['Vocabulary', 'Comprehension', 'Production'], color=['pink', 'gold', 'lightgreen'])
-        ax6.set_title('Learning Gains Distribution', fontsize=16)
-        ax6.set_xlabel('Learning Gain (Points)', fontsize=14)
-        ax6.set_ylabel('Frequency', fontsize=14)
-        ax6.legend(fontsize=12)
-        plt.grid(True, axis='y')
-        plt.tight_layout()
-        plt.savefig('fig_learning_gains_distribution.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        print(f"✓ {len(names)} individual visualizations saved as separate PNG files ({profile} profile)")
+        if reused:
+            print(f"  {reused} unchanged, reused from the figure cache")
 
-        # 7. Satisfaction vs Vocabulary Gain Scatter
-        fig7 = plt.figure(figsize=(8, 6))
-        ax7 = plt.subplot()
-        scatter = ax7.scatter(self.data['VR_Satisfaction_Overall'], self.data['Vocabulary_Gain'], alpha=0.6, c=self.data['Age'], cmap='viridis')
-        ax7.set_xlabel('VR Satisfaction Rating', fontsize=14)
-        ax7.set_ylabel('Vocabulary Learning Gain', fontsize=14)
-        ax7.set_title('Satisfaction vs Vocabulary Gains (colored by age)', fontsize=16)
-        plt.colorbar(scatter, ax=ax7, label='Age', orientation='vertical')
-        plt.xticks(fontsize=12)
-        plt.yticks(fontsize=12)
-        plt.grid(True)
-        plt.tight_layout()
-        plt.savefig('fig_satisfaction_vs_vocab_gain.png', dpi=300, bbox_inches='tight')
-        plt.close()
+    def pipeline_stages(self, figures=None, profile='print', workers=None, resamples=DEFAULT_RESAMPLES, seed=0):
+        """
+        Steps 2-8 as `Stage`s: what each reads (the 'students' and
+        'interviews' sources or earlier stages), the parameters that change
+        its results and the attributes it leaves for later stages. Step 1
+        runs in the constructor.
+        """
+        names = select_figures(figures)
+        return [
+            Stage('learning_gains', self.calculate_learning_gains, ['students'], cacheable=False),
+            Stage('descriptive_statistics', self.perform_descriptive_statistics, ['learning_gains']),
+            Stage('inferential_statistics', lambda: self.perform_inferential_statistics(resamples, seed, workers),
+                  ['learning_gains'], params=[resamples, seed]),
+            Stage('subgroup_analysis', self.perform_subgroup_analysis, ['learning_gains']),
+            Stage('qualitative_analysis', lambda: self.perform_qualitative_analysis(workers), ['interviews'],
+                  outputs=['student_interviews', 'student_transcripts']),
+            Stage('integrate_findings', self.integrate_findings, ['learning_gains', 'qualitative_analysis']),
+            Stage('visualizations', lambda: self.create_comprehensive_visualizations(figures, profile, workers),
+                  ['learning_gains'], params=[names, profile], thread_safe=False,
+                  products=[DETAILED_FIGURES[name].filename for name in names])
+        ]
 
-        # 8. Grade Level vs Average Gains
-        fig8 = plt.figure(figsize=(10, 6))
-        ax8 = plt.subplot()
-        grade_gains = self.data.groupby('Grade_Level')[['Vocabulary_Gain', 'Comprehension_Gain', 'Production_Gain']].mean()
-        grade_gains.plot(kind='bar', ax=ax8, alpha=0.8, color=['blue', 'orange', 'green'])
-        ax8.set_title('Average Learning Gains by Grade Level', fontsize=16)
-        ax8.set_xlabel('Grade Level', fontsize=14)
-        ax8.set_ylabel('Average Gain (Points)', fontsize=14)
-        ax8.legend(title='Assessment Type', fontsize=12)
-        plt.xticks(rotation=0, fontsize=12)
-        plt.grid(True, axis='y')
-        plt.tight_layout()
-        plt.savefig('fig_grade_level_gains.png', dpi=300, bbox_inches='tight')
-        plt.close()
-
-        # 9. Success Metrics Dashboard
-        fig9 = plt.figure(figsize=(10, 6))
-        ax9 = plt.subplot()
-        positive_exp = (self.data['VR_Satisfaction_Overall'] >= 4).mean() * 100
-        high_engagement = (self.data['VR_Engagement_Level'] >= 4).mean() * 100
-        recommend = (self.data['VR_Recommendation'] >= 4).mean() * 100
-        skill_improvement = (self.data['Vocabulary_Gain'] >= 10).mean() * 100
-        metrics = ['Positive\nExperience\n(≥80%)', 'High\nEngagement\n(≥75%)', 'Recommend\n(≥70%)', 'Skill\nImprovement\n(≥60%)']
-        values = [positive_exp, high_engagement, recommend, skill_improvement]
-        targets = [80, 75, 70, 60]
-        bars = ax9.bar(metrics, values, alpha=0.8, color=['skyblue', 'lightgreen', 'lightcoral', 'orange'])
-        for i, (bar, value, target) in enumerate(zip(bars, values, targets)):
-            if value >= target:
-                bar.set_color('green')
-            else:
-                bar.set_color('red')
-        ax9.set_ylabel('Percentage (%)', fontsize=14)
-        ax9.set_title('Success Metrics Achievement', fontsize=16)
-        ax9.set_xlabel('Metrics', fontsize=14)
-        ax9.set_ylim(0, 100)
-        for i, target in enumerate(targets):
-            ax9.axhline(y=target, color='black', linestyle='--', alpha=0.5)
-        plt.xticks(rotation=45, ha='right', fontsize=12)
-        plt.grid(True, axis='y')
-        plt.tight_layout()
-        plt.savefig('fig_success_metrics.png', dpi=300, bbox_inches='tight')
-        plt.close()
-
-        # 10. Correlation Heatmap
-        fig10 = plt.figure(figsize=(8, 6))
-        ax10 = plt.subplot()
-        corr_vars = ['Age', 'Vocabulary_Gain', 'Comprehension_Gain', 'Production_Gain', 'VR_Satisfaction_Overall', 'VR_Ease_of_Use', 'VR_Engagement_Level', 'VR_Recommendation']
-        corr_matrix = self.data[corr_vars].corr()
-        sns.heatmap(corr_matrix, annot=True, cmap='coolwarm', center=0, square=True, ax=ax10, cbar_kws={'shrink': 0.8}, annot_kws={'size': 12})
-        ax10.set_title('Correlation Matrix', fontsize=16)
-        plt.xticks(rotation=45, ha='right', fontsize=12)
-        plt.yticks(fontsize=12)
-        plt.tight_layout()
-        plt.savefig('fig_correlation_matrix.png', dpi=300, bbox_inches='tight')
-        plt.close()
-
-        # 11. Learning Gains by Gender
-        fig11 = plt.figure(figsize=(8, 6))
-        ax11 = plt.subplot()
-        gender_gains = self.data.groupby('Gender')[['Vocabulary_Gain', 'Comprehension_Gain', 'Production_Gain']].mean()
-        gender_gains.plot(kind='bar', ax=ax11, alpha=0.8, color=['blue', 'orange', 'green'])
-        ax11.set_title('Learning Gains by Gender', fontsize=16)
-        ax11.set_xlabel('Gender', fontsize=14)
-        ax11.set_ylabel('Average Gain (Points)', fontsize=14)
-        ax11.legend(title='Assessment Type', fontsize=12, bbox_to_anchor=(1.05, 1), loc='upper left')
-        plt.xticks(rotation=0, fontsize=12)
-        plt.grid(True, axis='y')
-        plt.tight_layout()
-        plt.savefig('fig_learning_gains_by_gender.png', dpi=300, bbox_inches='tight')
-        plt.close()
+    def sources(self):
+        """Fingerprints of the inputs the stages read, with the options that change how they are loaded"""
+        cache_dir = self.cache.cache_dir if self.cache else None
+        return {
+            'students': source_fingerprint([self.csv_file], {'chunksize': self.chunksize, 'state_file': self.state_file,
+                                                             'test_groups': self.test_groups,
+                                                             'db_path': self.store.db_path}, cache_dir),
+            'interviews': source_fingerprint(INTERVIEW_FILES, cache_dir=cache_dir)
+        }
 
-        # 12. VR Satisfaction Distribution
-        fig12 = plt.figure(figsize=(8, 6))
-        ax12 = plt.subplot()
-        satisfaction_counts = self.data['VR_Satisfaction_Overall'].value_counts().sort_index()
-        ax12.bar(satisfaction_counts.index, satisfaction_counts.values, alpha=0.8, color='skyblue')
-        ax12.set_title('VR Satisfaction Rating Distribution', fontsize=16)
-        ax12.set_xlabel('Satisfaction Rating (1-5)', fontsize=14)
-        ax12.set_ylabel('Number of Students', fontsize=14)
-        for rating, count in satisfaction_counts.items():
-            percentage = (count / len(self.data)) * 100
-            ax12.text(rating, count + 1, f'{percentage:.1f}%', ha='center', va='bottom', fontsize=12)
-        plt.xticks(fontsize=12)
-        plt.grid(True, axis='y')
-        plt.tight_layout()
-        plt.savefig('fig_vr_satisfaction_distribution.png', dpi=300, bbox_inches='tight')
-        plt.close()
+    def run_complete_analysis(self, figures=None, profile='print', workers=None, resamples=DEFAULT_RESAMPLES,
+                              seed=0, stage_workers=None):
+        """
+        Run the complete analysis pipeline.
 
-        print("✓ Individual visualizations saved as separate PNG files")
+        Independent stages run concurrently on `stage_workers` threads (one
+        per CPU by default). A stage whose inputs, parameters and code are
+        unchanged since the last run is skipped and its output replayed;
+        fingerprints live in the `stage_cache` table, so they are committed
+        with the results they describe.
+        """
+        scheduler = StageScheduler(self.pipeline_stages(figures, profile, workers, resamples, seed), self,
+                                   self.sources(), cache=self.store, workers=stage_workers, metrics=self.metrics)
+        try:
+            # All result tables of a run are committed together
+            with self.store.transaction():
+                completed = scheduler.run()
+        finally:
+            # Stage metrics are written once the results are committed
+            self.metrics.flush()
+        if self.metrics.enabled:
+            print("\nStage metrics:")
+            print(self.metrics.report())
+        return completed
 
-    def run_complete_analysis(self):
-        """Run the complete analysis pipeline."""
-        self.calculate_learning_gains()
-        self.perform_descriptive_statistics()
-        self.perform_inferential_statistics()
-        self.perform_subgroup_analysis()
-        self.perform_qualitative_analysis()
-        self.integrate_findings()
-        self.create_comprehensive_visualizations()
+    def close(self):
+        """Close the shared database connection."""
+        self.store.close()
 
 if __name__ == "__main__":
-    analyzer = DetailedDataAnalysis('student_data.csv')
-    analyzer.run_complete_analysis()
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description="Detailed VR sign language evaluation analysis")
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help="stream student_data.csv in chunks of this many rows")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="always re-parse the input files instead of using the binary cache")
+    parser.add_argument('--state-file', default=None,
+                        help="keep statistics in this file and only read rows appended since the last run")
+    parser.add_argument('--figures', nargs='+', choices=list(DETAILED_FIGURES), default=None, metavar='NAME',
+                        help=f"render only these figures (from: {', '.join(DETAILED_FIGURES)})")
+    parser.add_argument('--profile', choices=list(RESOLUTION_PROFILES), default='print',
+                        help="figure resolution profile")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="figure rendering, resampling and transcript NLP processes (default: one per CPU, 1 runs in-process)")
+    parser.add_argument('--resamples', type=int, default=DEFAULT_RESAMPLES,
+                        help="bootstrap and permutation resamples for inference (0 skips them)")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="random seed of the resampling; results do not depend on --workers")
+    parser.add_argument('--metrics-log', default=None,
+                        help="append wall/CPU time, peak RSS, rows and cache hits of every stage to this JSON lines file")
+    parser.add_argument('--metrics-db', default=None,
+                        help="also insert the stage metrics into the stage_metrics table of this SQLite database")
+    parser.add_argument('--sample-stages', nargs='+', default=(), metavar='STAGE',
+                        help="run the sampling profiler during these stages (e.g. qualitative_analysis visualizations)")
+    parser.add_argument('--sample-interval', type=float, default=DEFAULT_SAMPLE_INTERVAL,
+                        help="seconds between profiler samples")
+    parser.add_argument('--stage-workers', type=int, default=None,
+                        help="threads running independent pipeline stages concurrently (default: one per CPU)")
+    parser.add_argument('--report', action='store_true',
+                        help="afterwards, update the LaTeX/Markdown report in report/ (only changed sections)")
+    args = parser.parse_args()
+    metrics = StageMetrics('detailed', args.metrics_log, args.metrics_db, args.sample_stages, args.sample_interval)
+    analyzer = DetailedDataAnalysis('student_data.csv', chunksize=args.chunksize,
+                                    cache_dir=None if args.no_cache else CACHE_DIR,
+                                    state_file=args.state_file, metrics=metrics)
+    completed = analyzer.run_complete_analysis(args.figures, args.profile, args.workers, args.resamples, args.seed,
+                                               args.stage_workers)
+    analyzer.close()
+    if args.report and completed:
+        from report_builder import ReportBuilder
+        rendered, reassembled = ReportBuilder(analyzer.store.db_path).build()
+        print(f"✓ Report {'updated' if reassembled else 'unchanged'} in report/ "
+              f"({len(rendered)} sections regenerated)")
\ No newline at end of file
@@ -0,0 +1,52 @@
+import math
+
+import numpy as np
+
+# Student scores, ratings, ages and gains are whole numbers (validation rejects
+# anything else), so the accumulators keep their counts, sums, sums of squares
+# and cross products as int64. Integer sums are exact, so they do not depend on
+# how the rows were split into chunks, files or shards; statistics are rounded
+# to float once, from the exact totals, when they are read.
+
+
+def integer_values(values):
+    """int64 copy of integer-valued data; zero out missing entries beforehand"""
+    values = np.asarray(values, dtype=np.float64)
+    whole = np.round(values)
+    if not np.array_equal(values, whole):
+        raise ValueError("exact sums need whole-number values without NaN")
+    return whole.astype(np.int64)
+
+
+def _exact(values):
+    return np.asarray(values, dtype=object)
+
+
+def _ratio(numerator, denominator):
+    """Elementwise ratio of exact integers, rounded once (NaN where the denominator is 0)"""
+    numerator, denominator = np.broadcast_arrays(_exact(numerator), _exact(denominator))
+    ratios = [int(a) / int(b) if b else np.nan for a, b in zip(numerator.ravel(), denominator.ravel())]
+    return np.array(ratios, dtype=np.float64).reshape(numerator.shape)
+
+
+def means(n, sums):
+    """Means from counts and sums"""
+    return _ratio(sums, n)
+
+
+def variances(n, sums, squares):
+    """Sample variances, (n * sum(x^2) - sum(x)^2) / (n (n - 1)); NaN below two values"""
+    n, sums, squares = _exact(n), _exact(sums), _exact(squares)
+    return _ratio(n * squares - sums * sums, n * (n - 1))
+
+
+def correlations(n, sums_a, sums_b, squares_a, squares_b, cross):
+    """Pearson r from counts, sums, sums of squares and cross products"""
+    n, sums_a, sums_b = _exact(n), _exact(sums_a), _exact(sums_b)
+    covariance = n * _exact(cross) - sums_a * sums_b
+    spread_a = n * _exact(squares_a) - sums_a * sums_a
+    spread_b = n * _exact(squares_b) - sums_b * sums_b
+    covariance, spread_a, spread_b = np.broadcast_arrays(covariance, spread_a, spread_b)
+    r = [int(c) / math.sqrt(int(a) * int(b)) if a * b > 0 else np.nan
+         for c, a, b in zip(covariance.ravel(), spread_a.ravel(), spread_b.ravel())]
+    return np.array(r, dtype=np.float64).reshape(covariance.shape)
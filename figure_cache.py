@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import time
+
+from data_cache import CACHE_DIR, file_digest
+
+FIGURE_MANIFEST = 'figure_manifest.json'
+MANIFEST_VERSION = 1
+
+
+def _update_digest(digest, value):
+    """Feed `value` (payload dicts, lists, arrays, pandas objects, scalars) into `digest`"""
+    import numpy as np
+    import pandas as pd
+    if isinstance(value, dict):
+        digest.update(b'd%d' % len(value))
+        for key in sorted(value, key=repr):
+            digest.update(repr(key).encode())
+            _update_digest(digest, value[key])
+    elif isinstance(value, (list, tuple)):
+        digest.update(b'l%d' % len(value))
+        for item in value:
+            _update_digest(digest, item)
+    elif isinstance(value, (pd.Series, pd.DataFrame)):
+        digest.update(b'p' + type(value).__name__.encode())
+        _update_digest(digest, value.index)
+        if isinstance(value, pd.DataFrame):
+            _update_digest(digest, value.columns)
+        _update_digest(digest, value.to_numpy())
+    elif isinstance(value, pd.Index):
+        digest.update(repr(value.names).encode())
+        _update_digest(digest, value.to_numpy())
+    elif isinstance(value, np.ndarray):
+        digest.update(f'a{value.dtype.str}{value.shape}'.encode())
+        if value.dtype.hasobject:
+            digest.update(repr(value.tolist()).encode())
+        else:
+            digest.update(np.ascontiguousarray(value).tobytes())
+    else:
+        digest.update(repr(value).encode())
+
+
+def payload_digest(payload):
+    """Content hash of a figure payload: the data version of the figure"""
+    digest = hashlib.blake2b(digest_size=16)
+    _update_digest(digest, payload)
+    return digest.hexdigest()
+
+
+class FigureCache:
+    """
+    Manifest of rendered figures, so a figure whose inputs are unchanged is
+    never re-rendered.
+
+    Every PNG written through the cache is recorded in `<cache_dir>/
+    figure_manifest.json` under its absolute path, with its key (a hash of
+    the payload digest, the figure's style and the resolution), the
+    payload digest as its data version, the profile and the time it was
+    rendered. A later render of the same figure with the same key reuses the
+    PNG on disk, provided the file is still the one recorded: as in
+    DataCache, size and mtime are compared and the content hash decides if
+    only the mtime changed.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.path = os.path.join(cache_dir, FIGURE_MANIFEST)
+        self.hits = 0
+        self.misses = 0
+        try:
+            with open(self.path, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+        self.figures = manifest.get('figures', {}) if manifest.get('version') == MANIFEST_VERSION else {}
+
+    def lookup(self, path, key):
+        """True if the PNG at `path` was rendered with `key` and is unchanged since"""
+        entry = self.figures.get(os.path.abspath(path))
+        if entry is None or entry['key'] != key:
+            return False
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        if st.st_size != entry['size']:
+            return False
+        if st.st_mtime_ns != entry['mtime_ns']:
+            if file_digest(path) != entry['digest']:
+                return False
+            entry['mtime_ns'] = st.st_mtime_ns
+        return True
+
+    def record(self, path, name, key, data_version, profile):
+        """Enter the PNG just rendered at `path` in the manifest"""
+        st = os.stat(path)
+        self.figures[os.path.abspath(path)] = {
+            'figure': name, 'key': key, 'data_version': data_version, 'profile': profile,
+            'rendered': time.strftime('%Y-%m-%dT%H:%M:%S'), 'size': st.st_size, 'mtime_ns': st.st_mtime_ns,
+            'digest': file_digest(path)
+        }
+
+    def save(self):
+        """Atomically write the manifest"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': MANIFEST_VERSION, 'figures': self.figures}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,617 @@
+import hashlib
+import os
+from collections import namedtuple
+from contextlib import contextmanager
+
+import numpy as np
+import matplotlib
+import matplotlib.style
+from matplotlib.figure import Figure
+
+from correlation_engine import HEATMAP_COLUMNS
+from data_cache import file_digest
+from figure_cache import payload_digest
+from data_ingestion import ASSESSMENT_PAIRS, GAIN_COLUMNS, VR_COLUMNS
+from process_pool import process_pool
+
+# Output resolution per profile: quick previews vs publication figures
+RESOLUTION_PROFILES = {
+    'draft': 100,
+    'print': 300
+}
+
+# filename: output PNG; payload: function(summary, sample) returning the plain
+# arrays the figure needs; draw: function(payload) returning a Figure;
+# palette: seaborn palette set while drawing (None keeps the default cycle)
+FigureSpec = namedtuple('FigureSpec', ['filename', 'payload', 'draw', 'palette'])
+
+SUCCESS_METRICS = ['Positive\nExperience\n(≥80%)', 'High\nEngagement\n(≥75%)', 'Recommend\n(≥70%)',
+                   'Skill\nImprovement\n(≥60%)']
+SUCCESS_TARGETS = [80, 75, 70, 60]
+
+# Above this many students, scatter and box plot payloads are built from the
+# summary's exact counts and the figures draw bins instead of points
+BINNED_ROWS = 50_000
+# Most bins per axis of a binned scatter; integer axes with fewer distinct values get one bin per value
+MAX_BINS = 60
+
+# Digest of this module's drawing code, part of every figure's cache key
+CODE_DIGEST = file_digest(os.path.abspath(__file__))
+
+
+def _success_rates(summary):
+    """Percentage of students meeting each success metric"""
+    names = ['Positive_Experience', 'High_Engagement', 'Would_Recommend', 'Vocabulary_Improved']
+    return [summary.mask_count(name) / summary.n * 100 for name in names]
+
+
+def _color_by_target(bars, values):
+    for bar, value, target in zip(bars, values, SUCCESS_TARGETS):
+        bar.set_color('green' if value >= target else 'red')
+
+
+def _style_ticks(ax, axis='x', **kwargs):
+    """Object-oriented stand-in for plt.xticks/plt.yticks(**kwargs)"""
+    labels = ax.get_xticklabels() if axis == 'x' else ax.get_yticklabels()
+    for label in labels:
+        label.update(kwargs)
+
+
+def _bin_edges(values, max_bins=MAX_BINS):
+    """Bin edges over `values`: one bin per integer if they fit in `max_bins`, else equal widths"""
+    low, high = float(values.min()), float(values.max())
+    if high - low < max_bins and np.all(values == np.round(values)):
+        return np.arange(low - 0.5, high + 1.5)
+    return np.linspace(low, high, max_bins + 1)
+
+
+def _bin_index(values, edges):
+    # Equal-width and unit bins alike: the last edge belongs to the last bin
+    return np.clip(np.searchsorted(edges, values, side='right') - 1, 0, len(edges) - 2)
+
+
+def _binned_grid(x, y, counts, color_sums=None):
+    """
+    2D histogram of distinct (x, y) points seen `counts` times, with one
+    bincount pass: edges, counts and, given the sum of a color variable per
+    point, its mean per bin (NaN in empty bins). The cost depends on the
+    distinct points, not the rows.
+    """
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    x_edges, y_edges = _bin_edges(x), _bin_edges(y)
+    cells = _bin_index(x, x_edges) * (len(y_edges) - 1) + _bin_index(y, y_edges)
+    shape = (len(x_edges) - 1, len(y_edges) - 1)
+    binned = np.bincount(cells, weights=np.asarray(counts, dtype=np.float64), minlength=shape[0] * shape[1])
+    grid = {'x_edges': x_edges, 'y_edges': y_edges, 'counts': binned.astype(np.int64).reshape(shape)}
+    if color_sums is not None:
+        sums = np.bincount(cells, weights=np.asarray(color_sums, dtype=np.float64), minlength=binned.size)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            grid['means'] = sums.reshape(shape) / grid['counts']
+    return grid
+
+
+def _scatter_grid(summary, color=True):
+    """Binned satisfaction x vocabulary gain grid of the whole cohort, colored by mean age"""
+    joint = summary.scatter
+    return _binned_grid(joint.index.get_level_values(0), joint.index.get_level_values(1), joint['count'],
+                        joint['Age_sum'] if color else None)
+
+
+def _box_stats(counts, label):
+    """
+    Box plot statistics (as `matplotlib.cbook.boxplot_stats`, whiskers at 1.5
+    IQR) of a column from its exact value counts; each outlying value is
+    drawn once
+    """
+    counts = counts.sort_index()
+    values = counts.index.to_numpy(dtype=np.float64)
+    weights = counts.to_numpy()
+    cumulative = weights.cumsum()
+    n = int(cumulative[-1])
+
+    def quantile(q):
+        # Linear interpolation between order statistics, as np.percentile
+        position = q * (n - 1)
+        lower = values[np.searchsorted(cumulative, int(np.floor(position)), side='right')]
+        upper = values[np.searchsorted(cumulative, int(np.ceil(position)), side='right')]
+        return lower + (upper - lower) * (position - np.floor(position))
+
+    q1, med, q3 = quantile(0.25), quantile(0.5), quantile(0.75)
+    iqr = q3 - q1
+    inside_high = values[values <= q3 + 1.5 * iqr]
+    inside_low = values[values >= q1 - 1.5 * iqr]
+    whishi = q3 if len(inside_high) == 0 or inside_high.max() < q3 else inside_high.max()
+    whislo = q1 if len(inside_low) == 0 or inside_low.min() > q1 else inside_low.min()
+    notch = 1.57 * iqr / np.sqrt(n)
+    return {'label': label, 'mean': float(values @ weights / n), 'iqr': iqr, 'q1': q1, 'med': med, 'q3': q3,
+            'whislo': whislo, 'whishi': whishi, 'cilo': med - notch, 'cihi': med + notch,
+            'fliers': values[(values < whislo) | (values > whishi)]}
+
+
+def _draw_grid(ax, grid, values, cmap):
+    """Draw a binned scatter grid colored by `values` (empty bins left blank); returns the mesh"""
+    shown = np.ma.masked_where(grid['counts'] == 0, values)
+    return ax.pcolormesh(grid['x_edges'], grid['y_edges'], shown.T, cmap=cmap, shading='flat')
+
+
+# Payloads: only the aggregates (or plotting sample columns) a figure draws, so
+# they are cheap to send to a worker process. Cohorts above BINNED_ROWS are
+# drawn from the summary's counts of every student (the streaming sample holds
+# only some of them), so drawing cost depends on the bins, not the rows
+
+def _pre_post_payload(summary, sample):
+    columns, labels = [], []
+    for pre_col, post_col, _, name in ASSESSMENT_PAIRS:
+        columns.extend([pre_col, post_col])
+        labels.extend([f'Pre-{name}', f'Post-{name}'])
+    if summary.n > BINNED_ROWS:
+        return {'boxes': [_box_stats(summary.counts[col], label) for col, label in zip(columns, labels)]}
+    return {'series': [sample[col].to_numpy() for col in columns], 'labels': labels}
+
+
+def _learning_gains_payload(summary, sample):
+    return {'means': [summary.mean(col) for col in GAIN_COLUMNS],
+            'stds': [summary.std(col) for col in GAIN_COLUMNS]}
+
+
+def _vr_reaction_payload(summary, sample):
+    return {'means': [summary.mean(col) for col in VR_COLUMNS]}
+
+
+def _age_payload(summary, sample):
+    counts = summary.counts['Age']
+    return {'ages': counts.index.to_numpy(), 'counts': counts.to_numpy(), 'n': summary.n}
+
+
+def _gender_payload(summary, sample):
+    counts = summary.value_counts('Gender')
+    return {'labels': list(counts.index), 'counts': counts.to_numpy()}
+
+
+def _gain_distribution_payload(summary, sample):
+    counts = [summary.counts[col] for col in GAIN_COLUMNS]
+    return {'values': [c.index.to_numpy() for c in counts], 'weights': [c.to_numpy() for c in counts]}
+
+
+def _satisfaction_scatter_payload(summary, sample):
+    if summary.n > BINNED_ROWS:
+        return {'grid': _scatter_grid(summary)}
+    return {'satisfaction': sample['VR_Satisfaction_Overall'].to_numpy(),
+            'gain': sample['Vocabulary_Gain'].to_numpy(), 'age': sample['Age'].to_numpy()}
+
+
+def _grade_gains_payload(summary, sample):
+    return {'means': summary.group_means('Grade_Level')}
+
+
+def _success_payload(summary, sample):
+    return {'values': _success_rates(summary)}
+
+
+def _correlation_payload(summary, sample):
+    return {'matrix': summary.corr_matrix(HEATMAP_COLUMNS)}
+
+
+def _gender_gains_payload(summary, sample):
+    return {'means': summary.group_means('Gender')}
+
+
+def _satisfaction_distribution_payload(summary, sample):
+    counts = summary.counts['VR_Satisfaction_Overall'].sort_index()
+    return {'ratings': counts.index.to_numpy(), 'counts': counts.to_numpy(), 'n': summary.n}
+
+
+def _evaluation_payload(summary, sample):
+    payload = {
+        'pre': [summary.mean(pair[0]) for pair in ASSESSMENT_PAIRS],
+        'post': [summary.mean(pair[1]) for pair in ASSESSMENT_PAIRS],
+        'gains': [summary.mean(col) for col in GAIN_COLUMNS],
+        'vr': [summary.mean(col) for col in VR_COLUMNS],
+        'success': _success_rates(summary)
+    }
+    if summary.n > BINNED_ROWS:
+        # Mean gain per age and a count grid replace the two scatter panels
+        means = summary.group_means('Age')
+        payload.update(age_means=[(means.index.to_numpy(), means[col].to_numpy()) for col in GAIN_COLUMNS],
+                       satisfaction_grid=_scatter_grid(summary, color=False))
+    else:
+        payload.update(age=sample['Age'].to_numpy(), sample_gains=[sample[col].to_numpy() for col in GAIN_COLUMNS],
+                       satisfaction=sample['VR_Satisfaction_Overall'].to_numpy())
+    return payload
+
+
+# Drawing: pyplot-free, so figures render the same in a worker or in-process
+# regardless of the caller's interactive backend
+
+def _draw_pre_post(p):
+    fig = Figure(figsize=(8, 6))
+    ax = fig.add_subplot()
+    if 'boxes' in p:
+        # Large cohorts: statistics computed in the payload
+        bp = ax.bxp(p['boxes'], patch_artist=True)
+    else:
+        bp = ax.boxplot(p['series'], labels=p['labels'], patch_artist=True)
+    colors = ['lightblue', 'lightgreen'] * 3
+    for patch, color in zip(bp['boxes'], colors):
+        patch.set_facecolor(color)
+    ax.set_title('Pre-test vs Post-test Score Distributions', fontsize=16)
+    ax.set_ylabel('Score', fontsize=14)
+    ax.set_xlabel('Assessment Type', fontsize=14)
+    _style_ticks(ax, rotation=45, ha='right', fontsize=12)
+    ax.grid(True, axis='y')
+    fig.tight_layout()
+    return fig
+
+
+def _draw_learning_gains(p):
+    fig = Figure(figsize=(8, 6))
+    ax = fig.add_subplot()
+    gains = p['means']
+    bars = ax.bar(['Vocabulary', 'Comprehension', 'Production'], gains, yerr=p['stds'], capsize=5, alpha=0.8,
+                  color=['skyblue', 'lightgreen', 'lightcoral'])
+    ax.set_title('Average Learning Gains with Error Bars', fontsize=16)
+    ax.set_ylabel('Learning Gain (Points)', fontsize=14)
+    ax.set_xlabel('Assessment Type', fontsize=14)
+    for bar, gain in zip(bars, gains):
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height + 1, f'{gain:.1f}', ha='center', va='bottom', fontsize=12)
+    ax.grid(True, axis='y')
+    fig.tight_layout()
+    return fig
+
+
+def _draw_vr_reaction(p):
+    fig = Figure(figsize=(8, 6))
+    ax = fig.add_subplot()
+    vr_scores = p['means']
+    bars = ax.bar(['Satisfaction', 'Ease of Use', 'Engagement', 'Recommendation'], vr_scores,
+                  color=['skyblue', 'lightgreen', 'lightcoral', 'orange'], alpha=0.8)
+    ax.set_title('VR Application Reaction Scores', fontsize=16)
+    ax.set_ylabel('Average Rating (1-5)', fontsize=14)
+    ax.set_xlabel('Metric', fontsize=14)
+    ax.set_ylim(0, 5)
+    ax.axhline(y=4, color='red', linestyle='--', alpha=0.7, label='Target = 4.0')
+    for bar, score in zip(bars, vr_scores):
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height + 0.05, f'{score:.2f}', ha='center', va='bottom', fontsize=12)
+    _style_ticks(ax, fontsize=12)
+    ax.legend()
+    ax.grid(True, axis='y')
+    fig.tight_layout()
+    return fig
+
+
+def _draw_age(p):
+    fig = Figure(figsize=(8, 6))
+    ax = fig.add_subplot()
+    ax.hist(p['ages'], weights=p['counts'], bins=range(6, 14), alpha=0.7, color='skyblue', edgecolor='black')
+    ax.set_title(f"Age Distribution (N={p['n']})", fontsize=16)
+    ax.set_xlabel('Age (Years)', fontsize=14)
+    ax.set_ylabel('Number of Students', fontsize=14)
+    _style_ticks(ax, fontsize=12)
+    ax.grid(True, axis='y')
+    fig.tight_layout()
+    return fig
+
+
+def _draw_gender(p):
+    fig = Figure(figsize=(6, 6))
+    ax = fig.add_subplot()
+    ax.pie(p['counts'], labels=p['labels'], autopct='%1.1f%%', startangle=90, textprops={'fontsize': 12},
+           colors=['blue', 'orange', 'green'])
+    ax.set_title('Gender Distribution', fontsize=16)
+    fig.tight_layout()
+    return fig
+
+
+def _draw_gain_distribution(p):
+    fig = Figure(figsize=(8, 6))
+    ax = fig.add_subplot()
+    ax.hist(p['values'], weights=p['weights'], bins=15, alpha=0.7, label=['Vocabulary', 'Comprehension', 'Production'],
+            color=['pink', 'gold', 'lightgreen'])
+    ax.set_title('Learning Gains Distribution', fontsize=16)
+    ax.set_xlabel('Learning Gain (Points)', fontsize=14)
+    ax.set_ylabel('Frequency', fontsize=14)
+    ax.legend(fontsize=12)
+    ax.grid(True, axis='y')
+    fig.tight_layout()
+    return fig
+
+
+def _draw_satisfaction_scatter(p):
+    fig = Figure(figsize=(8, 6))
+    ax = fig.add_subplot()
+    if 'grid' in p:
+        # Large cohorts: one cell per (rating, gain) bin, colored by the mean age of its students
+        scatter = _draw_grid(ax, p['grid'], p['grid']['means'], 'viridis')
+        label = 'Mean age'
+    else:
+        scatter = ax.scatter(p['satisfaction'], p['gain'], alpha=0.6, c=p['age'], cmap='viridis')
+        label = 'Age'
+    ax.set_xlabel('VR Satisfaction Rating', fontsize=14)
+    ax.set_ylabel('Vocabulary Learning Gain', fontsize=14)
+    ax.set_title('Satisfaction vs Vocabulary Gains (colored by age)', fontsize=16)
+    fig.colorbar(scatter, ax=ax, label=label, orientation='vertical')
+    _style_ticks(ax, fontsize=12)
+    _style_ticks(ax, 'y', fontsize=12)
+    ax.grid(True)
+    fig.tight_layout()
+    return fig
+
+
+def _draw_group_gains(p, title, xlabel, figsize, legend_kwargs):
+    fig = Figure(figsize=figsize)
+    ax = fig.add_subplot()
+    p['means'].plot(kind='bar', ax=ax, alpha=0.8, color=['blue', 'orange', 'green'])
+    ax.set_title(title, fontsize=16)
+    ax.set_xlabel(xlabel, fontsize=14)
+    ax.set_ylabel('Average Gain (Points)', fontsize=14)
+    ax.legend(title='Assessment Type', fontsize=12, **legend_kwargs)
+    _style_ticks(ax, rotation=0, fontsize=12)
+    ax.grid(True, axis='y')
+    fig.tight_layout()
+    return fig
+
+
+def _draw_grade_gains(p):
+    return _draw_group_gains(p, 'Average Learning Gains by Grade Level', 'Grade Level', (10, 6), {})
+
+
+def _draw_gender_gains(p):
+    return _draw_group_gains(p, 'Learning Gains by Gender', 'Gender', (8, 6),
+                             {'bbox_to_anchor': (1.05, 1), 'loc': 'upper left'})
+
+
+def _draw_success(p):
+    fig = Figure(figsize=(10, 6))
+    ax = fig.add_subplot()
+    values = p['values']
+    bars = ax.bar(SUCCESS_METRICS, values, alpha=0.8, color=['skyblue', 'lightgreen', 'lightcoral', 'orange'])
+    _color_by_target(bars, values)
+    ax.set_ylabel('Percentage (%)', fontsize=14)
+    ax.set_title('Success Metrics Achievement', fontsize=16)
+    ax.set_xlabel('Metrics', fontsize=14)
+    ax.set_ylim(0, 100)
+    for target in SUCCESS_TARGETS:
+        ax.axhline(y=target, color='black', linestyle='--', alpha=0.5)
+    _style_ticks(ax, rotation=45, ha='right', fontsize=12)
+    ax.grid(True, axis='y')
+    fig.tight_layout()
+    return fig
+
+
+def _draw_correlation(p):
+    import seaborn as sns
+    fig = Figure(figsize=(8, 6))
+    ax = fig.add_subplot()
+    sns.heatmap(p['matrix'], annot=True, cmap='coolwarm', center=0, square=True, ax=ax, cbar_kws={'shrink': 0.8},
+                annot_kws={'size': 12})
+    ax.set_title('Correlation Matrix', fontsize=16)
+    _style_ticks(ax, rotation=45, ha='right', fontsize=12)
+    _style_ticks(ax, 'y', fontsize=12)
+    fig.tight_layout()
+    return fig
+
+
+def _draw_satisfaction_distribution(p):
+    fig = Figure(figsize=(8, 6))
+    ax = fig.add_subplot()
+    ax.bar(p['ratings'], p['counts'], alpha=0.8, color='skyblue')
+    ax.set_title('VR Satisfaction Rating Distribution', fontsize=16)
+    ax.set_xlabel('Satisfaction Rating (1-5)', fontsize=14)
+    ax.set_ylabel('Number of Students', fontsize=14)
+    for rating, count in zip(p['ratings'], p['counts']):
+        percentage = (count / p['n']) * 100
+        ax.text(rating, count + 1, f'{percentage:.1f}%', ha='center', va='bottom', fontsize=12)
+    _style_ticks(ax, fontsize=12)
+    ax.grid(True, axis='y')
+    fig.tight_layout()
+    return fig
+
+
+def _draw_evaluation(p):
+    fig = Figure(figsize=(18, 12))
+    axes = fig.subplots(2, 3)
+    fig.suptitle('VR Sign Language Learning Evaluation Results', fontsize=16, fontweight='bold')
+    names = ['Vocabulary', 'Comprehension', 'Production']
+
+    # 1. Pre-Post Comparison
+    ax1 = axes[0, 0]
+    x = np.arange(3)
+    width = 0.35
+    ax1.bar(x - width/2, p['pre'], width, label='Pre-test', alpha=0.8)
+    ax1.bar(x + width/2, p['post'], width, label='Post-test', alpha=0.8)
+    ax1.set_xlabel('Assessment Type')
+    ax1.set_ylabel('Score')
+    ax1.set_title('Pre-test vs Post-test Scores')
+    ax1.set_xticks(x)
+    ax1.set_xticklabels(names)
+    ax1.legend()
+    ax1.grid(True, alpha=0.3)
+
+    # 2. Learning Gains Distribution
+    ax2 = axes[0, 1]
+    bars = ax2.bar(names, p['gains'], color=['skyblue', 'lightgreen', 'lightcoral'], alpha=0.8)
+    ax2.set_ylabel('Average Gain (Points)')
+    ax2.set_title('Learning Gains by Assessment Type')
+    ax2.grid(True, alpha=0.3)
+    for bar, gain in zip(bars, p['gains']):
+        height = bar.get_height()
+        ax2.text(bar.get_x() + bar.get_width()/2., height + 0.5, f'{gain:.1f}', ha='center', va='bottom')
+
+    # 3. VR Reaction Scores
+    ax3 = axes[0, 2]
+    bars = ax3.bar(['Satisfaction', 'Ease of Use', 'Engagement', 'Recommendation'], p['vr'], color='orange', alpha=0.8)
+    ax3.set_ylabel('Average Rating (1-5)')
+    ax3.set_title('VR Application Reaction Scores')
+    ax3.set_ylim(0, 5)
+    ax3.grid(True, alpha=0.3)
+    for bar, score in zip(bars, p['vr']):
+        height = bar.get_height()
+        ax3.text(bar.get_x() + bar.get_width()/2., height + 0.05, f'{score:.2f}', ha='center', va='bottom')
+
+    # 4. Age vs Learning Gains
+    ax4 = axes[1, 0]
+    if 'age_means' in p:
+        for name, (ages, means) in zip(names, p['age_means']):
+            ax4.plot(ages, means, marker='o', label=name)
+        ax4.set_ylabel('Mean Learning Gain')
+    else:
+        for name, gain in zip(names, p['sample_gains']):
+            ax4.scatter(p['age'], gain, alpha=0.6, label=name)
+        ax4.set_ylabel('Learning Gain')
+    ax4.set_xlabel('Age')
+    ax4.set_title('Age vs Learning Gains')
+    ax4.legend()
+    ax4.grid(True, alpha=0.3)
+
+    # 5. Satisfaction vs Learning Gains
+    ax5 = axes[1, 1]
+    if 'satisfaction_grid' in p:
+        grid = p['satisfaction_grid']
+        fig.colorbar(_draw_grid(ax5, grid, grid['counts'], 'Blues'), ax=ax5, label='Students')
+    else:
+        ax5.scatter(p['satisfaction'], p['sample_gains'][0], alpha=0.6)
+    ax5.set_xlabel('VR Satisfaction Rating')
+    ax5.set_ylabel('Vocabulary Learning Gain')
+    ax5.set_title('VR Satisfaction vs Vocabulary Gains')
+    ax5.grid(True, alpha=0.3)
+
+    # 6. Success Metrics Dashboard
+    ax6 = axes[1, 2]
+    bars = ax6.bar(SUCCESS_METRICS, p['success'], alpha=0.8)
+    _color_by_target(bars, p['success'])
+    ax6.set_ylabel('Percentage (%)')
+    ax6.set_title('Success Metrics Achievement')
+    ax6.set_ylim(0, 100)
+    for target in SUCCESS_TARGETS:
+        ax6.axhline(y=target, color='black', linestyle='--', alpha=0.5)
+
+    fig.tight_layout()
+    return fig
+
+
+# The twelve individual figures of DetailedDataAnalysis, in report order
+DETAILED_FIGURES = {
+    'pre_post_scores': FigureSpec('fig_pre_post_scores.png', _pre_post_payload, _draw_pre_post, 'husl'),
+    'learning_gains': FigureSpec('fig_learning_gains.png', _learning_gains_payload, _draw_learning_gains, 'husl'),
+    'vr_reaction_scores': FigureSpec('fig_vr_reaction_scores.png', _vr_reaction_payload, _draw_vr_reaction, 'husl'),
+    'age_distribution': FigureSpec('fig_age_distribution.png', _age_payload, _draw_age, 'husl'),
+    'gender_distribution': FigureSpec('fig_gender_distribution.png', _gender_payload, _draw_gender, 'husl'),
+    'learning_gains_distribution': FigureSpec('fig_learning_gains_distribution.png', _gain_distribution_payload,
+                                              _draw_gain_distribution, 'husl'),
+    'satisfaction_vs_vocab_gain': FigureSpec('fig_satisfaction_vs_vocab_gain.png', _satisfaction_scatter_payload,
+                                             _draw_satisfaction_scatter, 'husl'),
+    'grade_level_gains': FigureSpec('fig_grade_level_gains.png', _grade_gains_payload, _draw_grade_gains, 'husl'),
+    'success_metrics': FigureSpec('fig_success_metrics.png', _success_payload, _draw_success, 'husl'),
+    'correlation_matrix': FigureSpec('fig_correlation_matrix.png', _correlation_payload, _draw_correlation, 'husl'),
+    'learning_gains_by_gender': FigureSpec('fig_learning_gains_by_gender.png', _gender_gains_payload,
+                                           _draw_gender_gains, 'husl'),
+    'vr_satisfaction_distribution': FigureSpec('fig_vr_satisfaction_distribution.png',
+                                               _satisfaction_distribution_payload, _draw_satisfaction_distribution,
+                                               'husl')
+}
+
+# The 2x3 summary grid of VRSignLanguageDataAnalyzer
+EVALUATION_FIGURE = FigureSpec('vr_evaluation_results.png', _evaluation_payload, _draw_evaluation, None)
+
+FIGURES = {**DETAILED_FIGURES, 'evaluation_results': EVALUATION_FIGURE}
+
+
+def select_figures(names=None, registry=DETAILED_FIGURES):
+    """Validate a figure subset against `registry`; None selects every figure"""
+    if names is None:
+        return list(registry)
+    unknown = [name for name in names if name not in registry]
+    if unknown:
+        raise ValueError(f"Unknown figure(s) {', '.join(unknown)}; choose from {', '.join(registry)}")
+    return list(names)
+
+
+def _dpi(profile):
+    if profile not in RESOLUTION_PROFILES:
+        raise ValueError(f"Unknown resolution profile '{profile}'; choose from {', '.join(RESOLUTION_PROFILES)}")
+    return RESOLUTION_PROFILES[profile]
+
+
+@contextmanager
+def _figure_style(spec):
+    """The report style, applied only while a figure is drawn and saved"""
+    with matplotlib.rc_context():
+        matplotlib.style.use('default')
+        if spec.palette is not None:
+            import seaborn as sns
+            sns.set_palette(spec.palette)
+        yield
+
+
+def draw_figure(name, payload):
+    """Build figure `name` from its payload; returns a pyplot-free Figure"""
+    spec = FIGURES[name]
+    with _figure_style(spec):
+        return spec.draw(payload)
+
+
+def render_figure(name, payload, dpi, output_dir='.'):
+    """Draw figure `name` and save it to its PNG file; returns the path"""
+    spec = FIGURES[name]
+    path = os.path.join(output_dir, spec.filename)
+    with _figure_style(spec):
+        spec.draw(payload).savefig(path, dpi=dpi, bbox_inches='tight')
+    return path
+
+
+def figure_key(name, data_version, dpi):
+    """
+    Cache key of figure `name` drawn from a payload with digest `data_version`
+    at `dpi`: also covers its file name and palette, this module's drawing
+    code and the matplotlib version, so a style change re-renders it.
+    """
+    spec = FIGURES[name]
+    digest = hashlib.blake2b(digest_size=16)
+    for part in [name, spec.filename, spec.palette, dpi, data_version, matplotlib.__version__, CODE_DIGEST]:
+        digest.update(repr(part).encode() + b'\0')
+    return digest.hexdigest()
+
+
+def _pin_backend():
+    # Worker processes never open windows, whatever backend the parent uses
+    matplotlib.use('Agg', force=True)
+
+
+def render_figures(summary, sample, names=None, profile='print', workers=None, output_dir='.', cache=None):
+    """
+    Render the selected figures from a `CohortSummary` and plotting sample.
+
+    Payloads are built in the calling process; drawing and PNG encoding run
+    on a process pool pinned to the Agg backend, one task per figure.
+    `workers=1` (or a single figure) renders in-process instead. With a
+    `FigureCache`, figures whose PNG was already rendered from the same
+    payload, style and resolution are not rendered again. Returns the paths
+    of all selected figures, in the order of `names`.
+    """
+    names = select_figures(names, FIGURES)
+    dpi = _dpi(profile)
+    payloads = [FIGURES[name].payload(summary, sample) for name in names]
+    paths = [os.path.join(output_dir, FIGURES[name].filename) for name in names]
+    stale = list(range(len(names)))
+    if cache is not None:
+        versions = [payload_digest(payload) for payload in payloads]
+        keys = [figure_key(name, version, dpi) for name, version in zip(names, versions)]
+        stale = [i for i in stale if not cache.lookup(paths[i], keys[i])]
+        cache.hits += len(names) - len(stale)
+        cache.misses += len(stale)
+    if workers is None:
+        workers = min(len(stale), os.cpu_count() or 1)
+    if workers <= 1 or len(stale) <= 1:
+        for i in stale:
+            render_figure(names[i], payloads[i], dpi, output_dir)
+    else:
+        with process_pool(workers, initializer=_pin_backend) as pool:
+            list(pool.map(render_figure, [names[i] for i in stale], [payloads[i] for i in stale],
+                          [dpi] * len(stale), [output_dir] * len(stale)))
+    if cache is not None:
+        for i in stale:
+            cache.record(paths[i], names[i], keys[i], versions[i], profile)
+        cache.save()
+    return paths
@@ -0,0 +1,172 @@
+import hashlib
+import io
+import os
+import pickle
+
+import pandas as pd
+
+from cohort_statistics import CohortSummary, SampleReservoir
+from data_ingestion import DEFAULT_CHUNKSIZE, add_learning_gains
+from likert_histograms import LikertHistogram
+from paired_tests import PairedTestAccumulator
+from student_schema import StudentValidator, parse_student_csv
+
+STATE_VERSION = 8
+ANCHOR_BYTES = 1 << 16
+
+
+class IncrementalStatistics:
+    """
+    Persisted, mergeable statistics over an append-only student CSV.
+
+    Holds the `CohortSummary` (count, means and co-moments per column, value
+    counts, subgroup cube), per-group `PairedTestAccumulator`s and
+    `LikertHistogram`s and the plotting
+    `SampleReservoir`, together with the byte offset of the last row folded in
+    and the `StudentValidator`, whose report and Student_IDs span every batch.
+    `refresh()` parses only the bytes appended since then, so a daily batch
+    costs time proportional to the batch rather than the whole history.
+
+    The already-processed prefix is verified by its header line and a hash of
+    its last `ANCHOR_BYTES` bytes; if either changed, or the file shrank, the
+    state is rebuilt from the start of the file.
+    """
+
+    def __init__(self, csv_file, test_groups=(), sample_size=10_000, seed=0):
+        self.version = STATE_VERSION
+        self.csv_file = os.path.abspath(csv_file)
+        self.test_groups = [list(keys) for keys in test_groups]
+        self.sample_size = sample_size
+        self.seed = seed
+        self._reset()
+
+    def _reset(self):
+        self.summary = CohortSummary()
+        self.reservoir = SampleReservoir(self.sample_size, self.seed)
+        self.group_tests = [PairedTestAccumulator(by=keys) for keys in self.test_groups]
+        self.group_reactions = [LikertHistogram(by=keys) for keys in self.test_groups]
+        self.validator = StudentValidator()
+        self.rows = 0
+        self.offset = 0
+        self.header = None
+        self.anchor = None
+
+    @classmethod
+    def load(cls, state_file, csv_file, test_groups=(), sample_size=10_000, seed=0):
+        """Load saved state for `csv_file`, or start empty if it is missing or incompatible"""
+        fresh = cls(csv_file, test_groups, sample_size, seed)
+        try:
+            with open(state_file, 'rb') as f:
+                state = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            return fresh
+        compatible = (isinstance(state, cls) and state.version == fresh.version
+                      and state.csv_file == fresh.csv_file and state.test_groups == fresh.test_groups
+                      and state.sample_size == sample_size)
+        return state if compatible else fresh
+
+    def save(self, state_file):
+        """Atomically write the state to `state_file`"""
+        directory = os.path.dirname(state_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_file = state_file + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, state_file)
+
+    def add_batch(self, chunk):
+        """Fold a batch of new rows into every accumulator"""
+        chunk = add_learning_gains(chunk)
+        self.summary.update(chunk)
+        for accumulator in self.group_tests + self.group_reactions:
+            accumulator.update(chunk)
+        self.reservoir.update(chunk)
+        self.rows += len(chunk)
+        return chunk
+
+    def refresh(self, chunksize=DEFAULT_CHUNKSIZE, on_chunk=None):
+        """
+        Fold the rows appended to the CSV since the last refresh.
+
+        `on_chunk(chunk, replace)` is called for every new chunk; `replace` is
+        True for the first chunk after a rebuild. Returns the number of new rows.
+        """
+        size = os.path.getsize(self.csv_file)
+        with open(self.csv_file, 'rb') as f:
+            end = _last_line_end(f, size)
+            rebuild = not self._prefix_unchanged(f, end)
+            if rebuild:
+                self._reset()
+                f.seek(0)
+                self.header = f.readline()
+                self.offset = f.tell()
+            if end <= self.offset:
+                return 0
+
+            names = list(pd.read_csv(io.BytesIO(self.header), nrows=0).columns)
+
+            def tail():
+                f.seek(self.offset)
+                return io.BufferedReader(_BoundedReader(f, end - self.offset))
+
+            new_rows = 0
+            for chunk in parse_student_csv(tail, chunksize, names=names):
+                chunk = self.validator.validate(chunk)
+                if chunk.empty:
+                    continue
+                chunk = self.add_batch(chunk)
+                if on_chunk is not None:
+                    on_chunk(chunk, rebuild and new_rows == 0)
+                new_rows += len(chunk)
+
+            self.offset = end
+            self.anchor = _anchor_digest(f, len(self.header), end)
+        return new_rows
+
+    def _prefix_unchanged(self, f, end):
+        if self.header is None or end < self.offset:
+            return False
+        f.seek(0)
+        if f.read(len(self.header)) != self.header:
+            return False
+        return _anchor_digest(f, len(self.header), self.offset) == self.anchor
+
+
+class _BoundedReader(io.RawIOBase):
+    """Read-only view of the next `length` bytes of an open binary file"""
+
+    def __init__(self, f, length):
+        self.f = f
+        self.remaining = length
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self.remaining)
+        data = self.f.read(size)
+        buffer[:len(data)] = data
+        self.remaining -= len(data)
+        return len(data)
+
+
+def _last_line_end(f, size, block_size=1 << 16):
+    """Offset just past the last newline, so a row still being written is left for later"""
+    position = size
+    while position > 0:
+        start = max(0, position - block_size)
+        f.seek(start)
+        block = f.read(position - start)
+        newline = block.rfind(b'\n')
+        if newline >= 0:
+            return start + newline + 1
+        position = start
+    return 0
+
+
+def _anchor_digest(f, start, stop):
+    """Hash of the last ANCHOR_BYTES bytes before `stop` (but after the header)"""
+    begin = max(start, stop - ANCHOR_BYTES)
+    f.seek(begin)
+    return hashlib.blake2b(f.read(stop - begin), digest_size=16).hexdigest()
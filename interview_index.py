@@ -0,0 +1,308 @@
+import os
+import pickle
+import re
+from bisect import bisect_left
+
+import numpy as np
+
+from data_cache import CACHE_DIR, file_digest
+from transcript_nlp import tokenize
+
+# Bump when the index layout or tokenization changes, so saved indexes are rebuilt
+INDEX_VERSION = 1
+
+INTERVIEW_SOURCES = [('student_interview_data.json', 'student', 'Interview_ID'),
+                     ('educator_interview_data.json', 'educator', 'Educator_ID')]
+
+# Indexed fields: query prefix -> interview record key
+FIELDS = {'transcript': 'Transcript', 'theme': 'Key_Themes', 'assessment': 'Professional_Assessment'}
+DEFAULT_FIELD = 'transcript'
+
+# Low bits of a posting key hold the token position, the high bits the document number
+POSITION_BITS = 24
+
+# Position gap between list entries (themes) so phrases never span two of them
+_ENTRY_GAP = 1000
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+_QUERY_TOKEN = re.compile(r'\s*(?:(\()|(\))|(?:(\w+):)?(?:"([^"]*)"|([^\s()"]+)))')
+
+
+class InterviewIndex:
+    """
+    Positional inverted index over the student and educator interviews.
+
+    Every indexed field maps each term to its sorted document numbers and to
+    a sorted array of packed (document << POSITION_BITS | position) keys, so
+    a term lookup is one dict access, boolean queries are merges of sorted document arrays and a
+    phrase is an intersection of its terms' keys shifted by their offsets.
+    `source:student` and `source:educator` select a corpus. Query syntax:
+
+        controller                      transcript term
+        theme:"controller difficulty"   phrase in a field (theme, assessment, transcript)
+        train*                          prefix
+        source:educator AND (training OR support) NOT theme:fatigue
+
+    Terms next to each other are ANDed; NOT binds tighter than AND, which
+    binds tighter than OR.
+    """
+
+    def __init__(self):
+        self.documents = []  # per document number: {'id', 'source', 'Student_ID'/'Educator_ID', ...}
+        self.postings = {field: {} for field in FIELDS}  # field -> term -> sorted int64 keys
+        self.term_documents = {field: {} for field in FIELDS}  # field -> term -> sorted document numbers
+        self.sources = {}  # source value -> sorted document numbers
+        self._pending = {field: {} for field in FIELDS}  # keys added since the last lookup
+        self._pending_sources = {}
+        self._vocabulary = {}
+
+    def add(self, interview, source, id_key):
+        """Index one interview record"""
+        doc = len(self.documents)
+        record = {'id': interview.get(id_key), 'source': source}
+        for key in ('Student_ID', 'Educator_ID', 'Role'):
+            if key in interview:
+                record[key] = interview[key]
+        self.documents.append(record)
+        self._pending_sources.setdefault(source, []).append(doc)
+        base = doc << POSITION_BITS
+        for field, key in FIELDS.items():
+            value = interview.get(key)
+            if not value:
+                continue
+            entries = value if isinstance(value, list) else [value]
+            pending = self._pending[field]
+            offset = base
+            for entry in entries:
+                tokens = tokenize(entry)
+                for position, token in enumerate(tokens, offset):
+                    pending.setdefault(token, []).append(position)
+                offset += len(tokens) + _ENTRY_GAP
+        return doc
+
+    def _flush(self):
+        """Merge keys added since the last lookup into the sorted posting arrays"""
+        if not self._pending_sources:
+            return
+        for field, pending in self._pending.items():
+            postings = self.postings[field]
+            documents = self.term_documents[field]
+            for term, keys in pending.items():
+                keys = np.array(keys, dtype=np.int64)
+                if term in postings:
+                    keys = np.sort(np.concatenate([postings[term], keys]))
+                postings[term] = keys
+                documents[term] = np.unique(keys >> POSITION_BITS)
+            pending.clear()
+        for source, docs in self._pending_sources.items():
+            self.sources[source] = np.union1d(self.sources.get(source, _EMPTY), docs)
+        self._pending_sources = {}
+        self._vocabulary = {}
+
+    @classmethod
+    def build(cls, sources=None, load_json=None):
+        """Index every interview of the (path, source, id key) JSON sources"""
+        index = cls()
+        for path, source, id_key in sources or INTERVIEW_SOURCES:
+            document = load_json(path) if load_json else _read_json(path)
+            for interview in document['interviews']:
+                index.add(interview, source, id_key)
+        return index
+
+    @classmethod
+    def load(cls, cache_dir=CACHE_DIR, sources=None, load_json=None):
+        """
+        The saved index under `cache_dir`, rebuilt and saved again when any
+        source file changed (size, or content hash when only the mtime moved).
+        """
+        sources = sources or INTERVIEW_SOURCES
+        path = os.path.join(cache_dir, 'interview_index.pkl')
+        try:
+            with open(path, 'rb') as f:
+                saved = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            saved = None
+        signatures = saved['signatures'] if saved and saved.get('version') == INDEX_VERSION else None
+        current = _signatures(sources, signatures)
+        if signatures is not None and _contents(current) == _contents(signatures):
+            if current != signatures:
+                # Touched, not edited: keep the index, remember the new mtimes
+                _save(path, current, saved['index'])
+            return saved['index']
+
+        index = cls.build(sources, load_json)
+        os.makedirs(cache_dir, exist_ok=True)
+        _save(path, current, index)
+        return index
+
+    def __getstate__(self):
+        self._flush()
+        state = self.__dict__.copy()
+        state['_vocabulary'] = {}
+        return state
+
+    # Lookups
+
+    def _keys(self, token, field):
+        self._flush()
+        return self.postings[field].get(token, _EMPTY)
+
+    def term(self, token, field=DEFAULT_FIELD):
+        """Sorted document numbers whose `field` contains `token`"""
+        self._flush()
+        return self.term_documents[field].get(token, _EMPTY)
+
+    def prefix(self, stem, field=DEFAULT_FIELD):
+        """Sorted document numbers whose `field` contains a term starting with `stem`"""
+        self._flush()
+        vocabulary = self._vocabulary.get(field)
+        if vocabulary is None:
+            vocabulary = self._vocabulary[field] = sorted(self.postings[field])
+        documents = self.term_documents[field]
+        matches = [_EMPTY]
+        for i in range(bisect_left(vocabulary, stem), len(vocabulary)):
+            if not vocabulary[i].startswith(stem):
+                break
+            matches.append(documents[vocabulary[i]])
+        return np.unique(np.concatenate(matches))
+
+    def phrase(self, tokens, field=DEFAULT_FIELD):
+        """Sorted document numbers whose `field` contains `tokens` consecutively"""
+        if len(tokens) <= 1:
+            return self.term(tokens[0], field) if tokens else _EMPTY
+        starts = self._keys(tokens[0], field)
+        for i, token in enumerate(tokens[1:], 1):
+            if not len(starts):
+                break
+            # A phrase start s needs token i at key s + i
+            starts = np.intersect1d(starts, self._keys(token, field) - i, assume_unique=True)
+        return np.unique(starts >> POSITION_BITS)
+
+    # Queries
+
+    def match(self, query):
+        """Sorted document numbers matching a boolean / phrase query"""
+        self._flush()
+        return _QueryParser(self, _lex(query)).parse().tolist()
+
+    def search(self, query):
+        """Records (id, source, Student_ID or Educator_ID, ...) of the matching interviews"""
+        return [self.documents[doc] for doc in self.match(query)]
+
+
+def _read_json(path):
+    import json
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _signatures(sources, previous=None):
+    """(size, mtime, digest) of every source; a digest is reused while size and mtime match"""
+    previous = previous or {}
+    signatures = {}
+    for path, _, _ in sources:
+        st = os.stat(path)
+        old = previous.get(path)
+        if old and old[0] == st.st_size and old[1] == st.st_mtime_ns:
+            signatures[path] = old
+        else:
+            signatures[path] = (st.st_size, st.st_mtime_ns, file_digest(path))
+    return signatures
+
+
+def _contents(signatures):
+    return {path: (size, digest) for path, (size, _, digest) in signatures.items()}
+
+
+def _save(path, signatures, index):
+    with open(path + '.tmp', 'wb') as f:
+        pickle.dump({'version': INDEX_VERSION, 'signatures': signatures, 'index': index}, f,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(path + '.tmp', path)
+
+
+def _lex(query):
+    tokens = []
+    position = 0
+    query = query.rstrip()
+    while position < len(query):
+        found = _QUERY_TOKEN.match(query, position)
+        if not found or found.end() == position:
+            raise ValueError(f"Cannot parse query at: {query[position:]!r}")
+        position = found.end()
+        opening, closing, field, quoted, word = found.groups()
+        if opening:
+            tokens.append(('(',))
+        elif closing:
+            tokens.append((')',))
+        elif quoted is None and field is None and word in ('AND', 'OR', 'NOT'):
+            tokens.append((word,))
+        else:
+            tokens.append(('TERM', field, quoted if quoted is not None else word, quoted is not None))
+    return tokens
+
+
+class _QueryParser:
+    """Recursive-descent evaluation of the query grammar over sorted document-number arrays"""
+
+    def __init__(self, index, tokens):
+        self.index = index
+        self.tokens = tokens
+        self.position = 0
+
+    def _peek(self):
+        return self.tokens[self.position][0] if self.position < len(self.tokens) else None
+
+    def _take(self):
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def parse(self):
+        docs = self._or()
+        if self.position != len(self.tokens):
+            raise ValueError(f"Unexpected {self.tokens[self.position][0]!r} in query")
+        return docs
+
+    def _or(self):
+        docs = self._and()
+        while self._peek() == 'OR':
+            self._take()
+            docs = np.union1d(docs, self._and())
+        return docs
+
+    def _and(self):
+        docs = self._not()
+        while self._peek() in ('AND', 'NOT', 'TERM', '('):
+            if self._peek() == 'AND':
+                self._take()
+            docs = np.intersect1d(docs, self._not(), assume_unique=True)
+        return docs
+
+    def _not(self):
+        if self._peek() == 'NOT':
+            self._take()
+            return np.setdiff1d(np.arange(len(self.index.documents)), self._not(), assume_unique=True)
+        return self._atom()
+
+    def _atom(self):
+        kind = self._peek()
+        if kind == '(':
+            self._take()
+            docs = self._or()
+            if self._peek() != ')':
+                raise ValueError("Missing ')' in query")
+            self._take()
+            return docs
+        if kind != 'TERM':
+            raise ValueError(f"Expected a term, got {kind!r}")
+        _, field, text, quoted = self._take()
+        field = (field or DEFAULT_FIELD).lower()
+        if field == 'source':
+            return self.index.sources.get(text.lower(), _EMPTY)
+        if field not in FIELDS:
+            raise ValueError(f"Unknown field '{field}'; use one of {', '.join(['source', *FIELDS])}")
+        if not quoted and text.endswith('*'):
+            return self.index.prefix(text[:-1].lower(), field)
+        return self.index.phrase(tokenize(text), field)
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+from data_ingestion import VR_COLUMNS
+
+LIKERT_LEVELS = 5
+
+
+def likert_histogram(values, codes=None, n_groups=1, levels=LIKERT_LEVELS):
+    """
+    Count histogram of every rating column and group in one `np.bincount`.
+
+    `values` is an (n, k) array of ratings and `codes` the group code of each
+    row (0..n_groups-1; rows whose code is NaN or negative, as `ngroup()`
+    gives missing keys, are skipped). Every rating is packed with its group and column into the code
+    (group * k + column) * levels + rating - 1, so a single bincount fills the
+    whole (n_groups, k, levels) table. Ratings outside 1..levels or missing
+    are not counted.
+    """
+    values = np.asarray(values)
+    n, k = values.shape
+    if codes is None:
+        codes, grouped = np.zeros(n, dtype=np.int64), np.ones(n, dtype=bool)
+    else:
+        codes = np.asarray(codes, dtype=np.float64)
+        grouped = codes >= 0
+        codes = np.where(grouped, codes, 0).astype(np.int64)
+    valid = (values >= 1) & (values <= levels) & grouped[:, None]
+    base = (codes[:, None] * k + np.arange(k)) * levels - 1
+    packed = (base + values)[valid].astype(np.int64)
+    return np.bincount(packed, minlength=n_groups * k * levels).reshape(n_groups, k, levels)
+
+
+def likert_levels(counts, low=2, high=4):
+    """
+    High (>= high), moderate and low (<= low) counts, n and mean rating for
+    every row and column of a (groups x (column, level)) count frame.
+    """
+    columns = counts.columns.unique(level=0)
+    ratings = counts.columns.unique(level=1)
+    counts = counts.reindex(columns=pd.MultiIndex.from_product([columns, ratings]), fill_value=0)
+    ratings = ratings.to_numpy()
+    table = counts.to_numpy().reshape(len(counts), len(columns), len(ratings))
+    n = table.sum(axis=2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = {
+            'n': n,
+            'high': table[:, :, ratings >= high].sum(axis=2),
+            'moderate': table[:, :, (ratings > low) & (ratings < high)].sum(axis=2),
+            'low': table[:, :, ratings <= low].sum(axis=2),
+            'mean': (table * ratings).sum(axis=2) / n
+        }
+    index = pd.MultiIndex.from_tuples(
+        [(*(g if isinstance(g, tuple) else (g,)), col) for g in counts.index for col in columns],
+        names=[*counts.index.names, 'Item'])
+    return pd.DataFrame({key: value.ravel() for key, value in values.items()}, index=index)
+
+
+class LikertHistogram:
+    """
+    Mergeable per-group rating histograms of the Likert columns.
+
+    One update factorizes the grouping keys once and counts every column and
+    group with a single `likert_histogram` call; chunks, files and saved
+    states merge by adding aligned group rows. High/moderate/low splits and
+    target checks are then read from the counts with `results()`.
+    """
+
+    def __init__(self, columns=None, by=None, levels=LIKERT_LEVELS):
+        self.columns = list(columns or VR_COLUMNS)
+        self.by = [by] if isinstance(by, str) else list(by or [])
+        self.levels = levels
+        self.counts = None  # DataFrame: group rows x (column, rating) counts
+
+    def update(self, data):
+        """Fold a data frame (or chunk) into the per-group counts"""
+        if len(data) == 0:
+            return self
+        if self.by:
+            grouped = data.groupby(self.by, observed=True, sort=True)
+            codes = grouped.ngroup().to_numpy(dtype=np.float64, na_value=np.nan)
+            group_index = grouped.size().index
+        else:
+            codes = None
+            group_index = pd.Index(['All'], name='Group')
+        histogram = likert_histogram(data[self.columns].to_numpy(), codes, len(group_index), self.levels)
+        columns = pd.MultiIndex.from_product([self.columns, range(1, self.levels + 1)], names=['Item', 'Rating'])
+        counts = pd.DataFrame(histogram.reshape(len(group_index), -1), index=group_index, columns=columns)
+        return self._add(counts)
+
+    def merge(self, other):
+        """Fold another histogram over the same columns and grouping into this one"""
+        if other.counts is not None:
+            self._add(other.counts)
+        return self
+
+    def _add(self, counts):
+        self.counts = counts if self.counts is None else self.counts.add(counts, fill_value=0).astype(np.int64)
+        return self
+
+    def results(self, low=2, high=4):
+        """`likert_levels` table with one row per (group..., item)"""
+        return likert_levels(self.counts.sort_index(), low, high)
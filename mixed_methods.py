@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+from data_ingestion import ASSESSMENT_PAIRS, GAIN_COLUMNS, VR_COLUMNS
+from derived_columns import DerivedFrame
+
+# Quantitative outcomes joined to every interview
+OUTCOME_COLUMNS = GAIN_COLUMNS + VR_COLUMNS
+
+# Stored student columns the outcomes are derived from
+SCORE_SOURCE_COLUMNS = ['Student_ID'] + [pair[i] for i in range(2) for pair in ASSESSMENT_PAIRS] + VR_COLUMNS
+
+
+class StudentScoreIndex:
+    """
+    Student_ID hash index over the outcome columns of the score table.
+
+    `update()` appends the outcome values of a data frame, `DerivedFrame` or
+    chunk (gains are derived when missing); when an ID repeats, its last row
+    wins, as with the database upsert. `lookup()` probes the hash table of a
+    `pd.Index` once for a whole array of IDs, so building and probing are
+    both linear in the number of rows.
+    """
+
+    def __init__(self, columns=OUTCOME_COLUMNS):
+        self.columns = list(columns)
+        self._ids = []
+        self._values = []
+        self._index = None
+
+    def update(self, data):
+        """Add the rows of a data frame (or chunk) to the index"""
+        if len(data) == 0:
+            return self
+        frame = data if isinstance(data, DerivedFrame) else DerivedFrame(data)
+        self._ids.append(np.asarray(frame['Student_ID'], dtype=object))
+        self._values.append(np.column_stack([np.asarray(frame[col], dtype=np.float64) for col in self.columns]))
+        self._index = None
+        return self
+
+    def _build(self):
+        ids = np.concatenate(self._ids) if self._ids else np.empty(0, dtype=object)
+        values = np.vstack(self._values) if self._values else np.empty((0, len(self.columns)))
+        keep = ~pd.Series(ids).duplicated(keep='last').to_numpy()
+        self._ids, self._values = [ids[keep]], [values[keep]]
+        self._index = pd.Index(ids[keep])
+
+    def __len__(self):
+        if self._index is None:
+            self._build()
+        return len(self._index)
+
+    def lookup(self, ids):
+        """Row positions of `ids` in the index, -1 where an ID is not present"""
+        if self._index is None:
+            self._build()
+        return self._index.get_indexer(pd.Index(ids, dtype=object))
+
+    def outcomes(self, ids):
+        """(len(ids) x outcome columns) values of `ids`, NaN where an ID is not present"""
+        positions = self.lookup(ids)
+        values = self._values[0][np.maximum(positions, 0)] if len(self._values[0]) else \
+            np.full((len(positions), len(self.columns)), np.nan)
+        values[positions < 0] = np.nan
+        return values
+
+
+def join_interviews(index, interviews, results=None):
+    """
+    One row per student interview with its coded sentiment and themes, the
+    computed sentiment and codebook themes of its transcript when
+    `transcript_nlp` `results` are given, and the student's outcome columns
+    (NaN when the Student_ID is not in the score table). A single hash probe
+    joins every interview.
+    """
+    ids = [interview.get('Student_ID') for interview in interviews]
+    joined = pd.DataFrame({
+        'Student_ID': ids,
+        'Coded_Sentiment': [interview.get('Sentiment_Score') for interview in interviews],
+        'Coded_Themes': [list(interview.get('Key_Themes') or []) for interview in interviews]
+    }, index=pd.Index([interview.get('Interview_ID') for interview in interviews], name='Interview_ID'))
+    if results is not None:
+        joined['Sentiment'] = [result['sentiment'] for result in results]
+        joined['Themes'] = [result['themes'] for result in results]
+    outcomes = pd.DataFrame(index.outcomes(ids), columns=index.columns, index=joined.index)
+    return pd.concat([joined, outcomes], axis=1)
+
+
+def outcomes_by(joined, key, columns=OUTCOME_COLUMNS):
+    """
+    Interview count and n, mean and SD of every outcome per value of `key`.
+
+    A list-valued key (themes) counts an interview once under each of its
+    entries. Rows are expanded and labels factorized once, and every sum is
+    a single `np.bincount`, so the table is linear in the number of
+    (interview, label) pairs. Sums are taken about the overall column means
+    to limit cancellation.
+    """
+    labels = joined[key]
+    if labels.map(lambda value: isinstance(value, list)).any():
+        lengths = labels.map(len).to_numpy()
+        rows = np.repeat(np.arange(len(joined)), lengths)
+        labels = [label for entries in labels for label in entries]
+    else:
+        rows = np.arange(len(joined))
+        labels = labels.to_numpy()
+    codes, uniques = pd.factorize(pd.Series(labels, dtype=object))
+    groups = len(uniques)
+    values = joined[columns].to_numpy(dtype=np.float64)[rows]
+    present = ~np.isnan(values)
+    with np.errstate(invalid='ignore'):
+        shift = np.nanmean(values, axis=0) if len(values) else np.zeros(len(columns))
+    centered = np.where(present, values - np.nan_to_num(shift), 0)
+
+    table = {'interviews': np.bincount(codes[codes >= 0], minlength=groups)}
+    valid = codes >= 0
+    for i, col in enumerate(columns):
+        n = np.bincount(codes[valid], weights=present[valid, i], minlength=groups)
+        s1 = np.bincount(codes[valid], weights=centered[valid, i], minlength=groups)
+        s2 = np.bincount(codes[valid], weights=centered[valid, i] ** 2, minlength=groups)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            table[f'{col}_n'] = n.astype(np.int64)
+            table[f'{col}_mean'] = shift[i] + s1 / n
+            table[f'{col}_sd'] = np.sqrt(np.maximum(s2 - s1 * s1 / n, 0) / (n - 1))
+    result = pd.DataFrame(table, index=pd.Index(uniques, name=key))
+    return result.sort_values('interviews', ascending=False, kind='stable')
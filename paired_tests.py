@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from data_ingestion import ASSESSMENT_PAIRS
+from exact_sums import integer_values, means, variances
+
+RESULT_COLUMNS = ['n', 'mean_pre', 'mean_post', 'mean_diff', 'sd_diff', 't_statistic', 'p_value',
+                  'cohens_d', 'glass_delta', 'ci_low', 'ci_high']
+
+
+def paired_statistics(n, mean_pre, mean_post, var_pre, var_post, mean_diff, var_diff, confidence=0.95):
+    """
+    Vectorized paired t-test, Cohen's d and confidence interval of the mean gain.
+
+    All arguments broadcast, so one call covers every group and assessment.
+    t matches `stats.ttest_rel(post, pre)`. Cohen's d is the mean gain over the
+    pooled pre/post SD, the effect size both analysis scripts report; Glass's
+    delta standardizes by the pre-test SD alone.
+    Groups with fewer than two rows get NaN statistics.
+    """
+    n = np.asarray(n, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df = np.where(n > 1, n - 1, np.nan)
+        sd_diff = np.sqrt(var_diff)
+        se = sd_diff / np.sqrt(n)
+        t_stat = mean_diff / se
+        p_value = 2 * stats.t.sf(np.abs(t_stat), df)
+        cohens_d = mean_diff / np.sqrt((var_pre + var_post) / 2)
+        glass_delta = mean_diff / np.sqrt(var_pre)
+        margin = stats.t.ppf((1 + confidence) / 2, df) * se
+    return {
+        'n': n.astype(np.int64),
+        'mean_pre': mean_pre,
+        'mean_post': mean_post,
+        'mean_diff': mean_diff,
+        'sd_diff': sd_diff,
+        't_statistic': t_stat,
+        'p_value': p_value,
+        'cohens_d': cohens_d,
+        'glass_delta': glass_delta,
+        'ci_low': mean_diff - margin,
+        'ci_high': mean_diff + margin
+    }
+
+
+def _result_frame(results, pairs, group_index=None):
+    """Lay out (groups x assessments) result arrays as one long data frame"""
+    names = [name for _, _, _, name in pairs]
+    columns = {}
+    for key in RESULT_COLUMNS:
+        value = np.broadcast_to(results[key], results['mean_diff'].shape)
+        columns[key] = np.asarray(value).ravel()
+    if group_index is None:
+        index = pd.Index(names, name='Assessment')
+    else:
+        index = pd.MultiIndex.from_tuples(
+            [(*(g if isinstance(g, tuple) else (g,)), name) for g in group_index for name in names],
+            names=[*group_index.names, 'Assessment'])
+    return pd.DataFrame(columns, index=index)
+
+
+class PairedTestAccumulator:
+    """
+    Per-group sufficient statistics for paired tests of every assessment pair.
+
+    Each update stacks the pre, post and gain columns into one matrix, sorts
+    rows by group code once and reduces [x, x^2] for all columns and groups
+    with a single `np.add.reduceat`. Sums are exact integers (see
+    `exact_sums`), so accumulators from separate chunks or files merge by
+    adding aligned group rows to the same result in any split.
+    """
+
+    def __init__(self, pairs=None, by=None):
+        self.pairs = pairs or ASSESSMENT_PAIRS
+        self.by = [by] if isinstance(by, str) else list(by or [])
+        self.sums = None  # int64 DataFrame: group rows x [count, S1..., S2...]
+
+    def _stack(self, data):
+        pre = data[[pair[0] for pair in self.pairs]].to_numpy(dtype=np.float64)
+        post = data[[pair[1] for pair in self.pairs]].to_numpy(dtype=np.float64)
+        return integer_values(np.hstack([pre, post, post - pre]))
+
+    def update(self, data):
+        """Fold a data frame (or chunk) into the per-group sums"""
+        if len(data) == 0:
+            return self
+        stacked = self._stack(data)
+        block = np.hstack([np.ones((len(data), 1), dtype=np.int64), stacked, stacked * stacked])
+
+        if self.by:
+            grouped = data.groupby(self.by, observed=True, sort=True)
+            codes = grouped.ngroup().to_numpy(dtype=np.float64, na_value=np.nan)
+            group_index = grouped.size().index
+            # Rows with a missing group key have no group (NaN or -1) and are left out
+            keep = codes >= 0
+            if not keep.any():
+                return self
+            codes, block = codes[keep].astype(np.int64), block[keep]
+            order = np.argsort(codes, kind='stable')
+            starts = np.flatnonzero(np.r_[True, np.diff(codes[order]) != 0])
+            totals = np.add.reduceat(block[order], starts, axis=0)
+        else:
+            group_index = pd.Index(['All'], name='Group')
+            totals = block.sum(axis=0, keepdims=True)
+
+        return self._add(pd.DataFrame(totals, index=group_index))
+
+    def _add(self, sums):
+        if self.sums is None:
+            self.sums = sums.copy()
+        else:
+            self.sums = self.sums.add(sums, fill_value=0).astype(np.int64)
+        return self
+
+    def merge(self, other):
+        """Fold another accumulator over the same pairs and grouping into this one"""
+        if other.sums is not None:
+            self._add(other.sums)
+        return self
+
+    def results(self, confidence=0.95):
+        """Paired-test table with one row per (group..., assessment)"""
+        k = len(self.pairs)
+        m = k * 3
+        values = self.sums.sort_index().to_numpy()
+        n = values[:, :1]
+        s1, s2 = values[:, 1:m + 1], values[:, m + 1:]
+        mean, var = means(n, s1), variances(n, s1, s2)
+        results = paired_statistics(
+            n, mean[:, :k], mean[:, k:2 * k], var[:, :k], var[:, k:2 * k],
+            mean[:, 2 * k:], var[:, 2 * k:], confidence)
+        group_index = self.sums.sort_index().index if self.by else None
+        return _result_frame(results, self.pairs, group_index)
+
+
+def paired_test_table(data, pairs=None, by=None, confidence=0.95):
+    """Paired tests for every assessment pair, per group of `by` (all rows if None)"""
+    return PairedTestAccumulator(pairs, by).update(data).results(confidence)
+
+
+def paired_tests_from_summary(summary, pairs=None, confidence=0.95):
+    """Whole-cohort paired-test table read from a `CohortSummary`'s moments"""
+    pairs = pairs or ASSESSMENT_PAIRS
+    pre, post, gain = ([summary.mean(pair[i]) for pair in pairs] for i in range(3))
+    pre_var, post_var, gain_var = ([summary.var(pair[i]) for pair in pairs] for i in range(3))
+    results = paired_statistics(summary.n, np.array(pre), np.array(post), np.array(pre_var),
+                                np.array(post_var), np.array(gain), np.array(gain_var), confidence)
+    return _result_frame(results, pairs)
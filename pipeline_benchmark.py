@@ -0,0 +1,258 @@
+import contextlib
+import json
+import os
+import platform
+import shutil
+import sys
+import time
+import tracemalloc
+
+from data_cache import CACHE_DIR
+from result_store import DB_FILE
+from synthetic_cohort import EDUCATOR_INTERVIEW_RATE, STUDENT_INTERVIEW_RATE, write_cohort
+
+BENCHMARK_DIR = 'benchmark_data'
+BASELINE_FILE = 'benchmark_baselines.json'
+DEFAULT_SIZES = [100, 10_000, 100_000]
+PIPELINES = ['summary', 'detailed']
+
+# A stage regresses when it is slower (or needs more memory) than its baseline
+# by this fraction ...
+TIME_TOLERANCE = 0.25
+MEMORY_TOLERANCE = 0.10
+# ... and by at least this much, so noise in tiny stages is not reported
+MIN_TIME_DELTA = 0.05  # seconds
+MIN_MEMORY_DELTA = 1 << 20  # bytes
+
+# Bump when the generator changes, so saved cohorts are regenerated
+COHORT_VERSION = 1
+
+# Modules the steps import lazily; loaded once up front so stage times exclude them
+_WARM_IMPORTS = ['pandas', 'scipy.stats', 'matplotlib.pyplot', 'seaborn', 'textblob']
+
+
+def prepare_cohort(size, seed=0, interview_rate=STUDENT_INTERVIEW_RATE, educator_rate=EDUCATOR_INTERVIEW_RATE,
+                   root=BENCHMARK_DIR):
+    """Directory holding the synthetic input files of a cohort, generated on first use"""
+    directory = os.path.join(root, f'{size}_seed{seed}')
+    marker = os.path.join(directory, 'cohort.json')
+    spec = {'version': COHORT_VERSION, 'size': size, 'seed': seed, 'interview_rate': interview_rate,
+            'educator_rate': educator_rate}
+    try:
+        with open(marker) as f:
+            if json.load(f) == spec:
+                return directory
+    except (OSError, ValueError):
+        pass
+    write_cohort(directory, size, seed, interview_rate, educator_rate)
+    with open(marker, 'w') as f:
+        json.dump(spec, f)
+    return directory
+
+
+def _clear_outputs():
+    """Remove the caches and database of an earlier run in the current directory"""
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
+    for suffix in ('', '-wal', '-shm'):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(DB_FILE + suffix)
+
+
+class StageTimer:
+    """
+    Wall time, CPU time and (when tracing) peak Python heap growth of each
+    step run through `measure()`, keyed by stage name.
+    """
+
+    def __init__(self, trace=False):
+        self.trace = trace
+        self.stages = {}
+
+    def measure(self, name, step):
+        if self.trace:
+            tracemalloc.reset_peak()
+            start_bytes = tracemalloc.get_traced_memory()[0]
+        wall, cpu = time.perf_counter(), time.process_time()
+        result = step()
+        record = {'seconds': time.perf_counter() - wall, 'cpu_seconds': time.process_time() - cpu}
+        if self.trace:
+            record['peak_bytes'] = tracemalloc.get_traced_memory()[1] - start_bytes
+        self.stages[name] = record
+        return result
+
+
+def run_summary_pipeline(timer, options):
+    """Every stage of data_analysis_script's run_complete_analysis, one after the other and never skipped"""
+    from data_analysis_script import VRSignLanguageDataAnalyzer
+    analyzer = timer.measure('setup', lambda: VRSignLanguageDataAnalyzer(chunksize=options.get('chunksize')))
+    for stage in analyzer.pipeline_stages(options.get('profile', 'draft')):
+        if timer.measure(stage.name, stage.run) is False:
+            raise RuntimeError(f"summary pipeline stopped at {stage.name}")
+
+
+def run_detailed_pipeline(timer, options):
+    """Step 1 and every stage of detailed_data_analysis's run_complete_analysis, one after the other"""
+    from detailed_data_analysis import DetailedDataAnalysis
+    analyzer = timer.measure('load_data',
+                             lambda: DetailedDataAnalysis('student_data.csv', chunksize=options.get('chunksize')))
+    try:
+        stages = analyzer.pipeline_stages(options.get('figures'), options.get('profile', 'draft'),
+                                          options.get('workers', 1), options.get('resamples', 1000))
+        with analyzer.store.transaction():
+            for stage in stages:
+                timer.measure(stage.name, stage.run)
+    finally:
+        analyzer.close()
+
+
+PIPELINE_RUNNERS = {'summary': run_summary_pipeline, 'detailed': run_detailed_pipeline}
+
+
+def run_pipeline(pipeline, directory, options, trace=False, warm=False):
+    """
+    Stage measurements of one run of `pipeline` on the cohort in `directory`.
+    Runs start from an empty cache and database, unless `warm`, where one
+    unmeasured run fills them first. Pipeline output is discarded.
+    """
+    timer = StageTimer(trace)
+    with contextlib.chdir(directory), open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        _clear_outputs()
+        if warm:
+            PIPELINE_RUNNERS[pipeline](StageTimer(), options)
+        PIPELINE_RUNNERS[pipeline](timer, options)
+    return timer.stages
+
+
+def run_benchmarks(sizes=None, pipelines=None, options=None, repeat=1, memory=True, warm=False, seed=0,
+                   interview_rate=STUDENT_INTERVIEW_RATE, educator_rate=EDUCATOR_INTERVIEW_RATE, root=BENCHMARK_DIR):
+    """
+    Measurements keyed by 'pipeline/mode/size/stage'. Times are the best of
+    `repeat` untraced runs; peak memory comes from one extra run under
+    tracemalloc (skipped when `memory` is False), since tracing slows
+    Python-heavy stages.
+    """
+    options = {'workers': 1, **(options or {})}
+    for module in _WARM_IMPORTS:
+        __import__(module)
+    mode = 'warm' if warm else 'cold'
+    results = {}
+    for size in sizes or DEFAULT_SIZES:
+        directory = prepare_cohort(size, seed, interview_rate, educator_rate, root)
+        for pipeline in pipelines or PIPELINES:
+            runs = [run_pipeline(pipeline, directory, options, warm=warm) for _ in range(repeat)]
+            if memory:
+                tracemalloc.start()
+                try:
+                    traced = run_pipeline(pipeline, directory, options, trace=True, warm=warm)
+                finally:
+                    tracemalloc.stop()
+            for stage in runs[0]:
+                record = {key: min(run[stage][key] for run in runs) for key in ('seconds', 'cpu_seconds')}
+                if memory:
+                    record['peak_bytes'] = traced[stage]['peak_bytes']
+                results[f'{pipeline}/{mode}/{size}/{stage}'] = record
+            print(f"✓ {pipeline} pipeline at {size} students: "
+                  f"{sum(results[f'{pipeline}/{mode}/{size}/{stage}']['seconds'] for stage in runs[0]):.2f}s")
+    return results
+
+
+def load_baselines(path=BASELINE_FILE):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'environment': None, 'stages': {}}
+
+
+def save_baselines(results, path=BASELINE_FILE):
+    """Store `results` as the baselines of their stages, keeping the other stored stages"""
+    baselines = load_baselines(path)
+    baselines['environment'] = environment()
+    baselines['stages'].update(results)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def environment():
+    return {'python': platform.python_version(), 'machine': platform.machine(), 'processor': platform.processor(),
+            'cpus': os.cpu_count()}
+
+
+def compare(results, baselines, time_tolerance=TIME_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE):
+    """
+    One row per measured stage with its baseline and relative change; a stage
+    regresses when its time or peak memory exceeds the baseline by more than
+    the tolerance and the absolute margin.
+    """
+    import pandas as pd
+    rows = []
+    for key, record in results.items():
+        pipeline, mode, size, stage = key.split('/')
+        base = baselines['stages'].get(key, {})
+        row = {'pipeline': pipeline, 'mode': mode, 'size': int(size), 'stage': stage,
+               'seconds': record['seconds'], 'baseline_seconds': base.get('seconds'),
+               'peak_mb': record.get('peak_bytes', float('nan')) / (1 << 20),
+               'baseline_peak_mb': base['peak_bytes'] / (1 << 20) if 'peak_bytes' in base else None}
+        slower = base.get('seconds') is not None and \
+            record['seconds'] > base['seconds'] * (1 + time_tolerance) and \
+            record['seconds'] - base['seconds'] > MIN_TIME_DELTA
+        larger = 'peak_bytes' in record and 'peak_bytes' in base and \
+            record['peak_bytes'] > base['peak_bytes'] * (1 + memory_tolerance) and \
+            record['peak_bytes'] - base['peak_bytes'] > MIN_MEMORY_DELTA
+        row['status'] = 'new' if not base else 'REGRESSION' if slower or larger else 'ok'
+        rows.append(row)
+    table = pd.DataFrame(rows).set_index(['pipeline', 'mode', 'size', 'stage'])
+    table['time_change'] = table['seconds'] / table['baseline_seconds'].astype(float) - 1
+    return table
+
+
+if __name__ == "__main__":
+    import argparse
+    from figure_rendering import RESOLUTION_PROFILES
+    parser = argparse.ArgumentParser(description="Benchmark every stage of both analysis pipelines on synthetic cohorts")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="cohort sizes (students)")
+    parser.add_argument('--pipelines', nargs='+', choices=PIPELINES, default=PIPELINES,
+                        help="summary: data_analysis_script.py, detailed: detailed_data_analysis.py")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per pipeline and size (best is kept)")
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc run")
+    parser.add_argument('--warm', action='store_true', help="measure runs with the input and result caches filled")
+    parser.add_argument('--chunksize', type=int, default=None, help="stream the student CSV in chunks")
+    parser.add_argument('--resamples', type=int, default=1000, help="bootstrap and permutation resamples")
+    parser.add_argument('--profile', choices=list(RESOLUTION_PROFILES), default='draft',
+                        help="figure resolution profile")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the synthetic cohorts")
+    parser.add_argument('--interview-rate', type=float, default=STUDENT_INTERVIEW_RATE,
+                        help="share of students interviewed")
+    parser.add_argument('--baselines', default=BASELINE_FILE, help="baseline file")
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the new baselines")
+    parser.add_argument('--time-tolerance', type=float, default=TIME_TOLERANCE,
+                        help="allowed relative slowdown of a stage")
+    parser.add_argument('--memory-tolerance', type=float, default=MEMORY_TOLERANCE,
+                        help="allowed relative growth of a stage's peak memory")
+    parser.add_argument('--output', default=None, help="also write the measurements to this JSON file")
+    args = parser.parse_args()
+
+    options = {'chunksize': args.chunksize, 'resamples': args.resamples, 'profile': args.profile}
+    results = run_benchmarks(args.sizes, args.pipelines, options, args.repeat, not args.no_memory, args.warm,
+                             args.seed, args.interview_rate)
+    table = compare(results, load_baselines(args.baselines), args.time_tolerance, args.memory_tolerance)
+    print(table.round(3).to_string())
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'environment': environment(), 'stages': results}, f, indent=2, sort_keys=True)
+    if args.save_baseline:
+        save_baselines(results, args.baselines)
+        print(f"✓ Baselines saved to {args.baselines}")
+    regressions = table[table['status'] == 'REGRESSION']
+    if len(regressions):
+        print(f"✗ {len(regressions)} stage(s) regressed beyond the thresholds")
+        sys.exit(1)
+    missing = table[table['status'] == 'new']
+    if len(missing) and not args.save_baseline:
+        if not os.path.exists(args.baselines):
+            print(f"✗ No baselines file {args.baselines}; record one on this machine with --save-baseline")
+        else:
+            print(f"✗ {len(missing)} stage(s) have no baseline in {args.baselines}; record them with --save-baseline")
+        sys.exit(1)
+    print("✓ No regressions against the baselines")
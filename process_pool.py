@@ -0,0 +1,26 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# Imported once by the fork server, so its workers start without re-importing them
+PRELOAD_MODULES = ['numpy', 'pandas']
+
+
+def pool_context():
+    """
+    Start method of the analysis process pools. Stages run on scheduler
+    threads, and forking a process while other threads hold locks (the
+    result store, the figure cache, library internals) can leave the child
+    deadlocked; a fork server forks from a single-threaded process instead.
+    Falls back to spawn where there is no fork server.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(PRELOAD_MODULES)
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+def process_pool(workers, initializer=None, initargs=()):
+    """ProcessPoolExecutor of `workers` processes that never forks the calling (threaded) process"""
+    return ProcessPoolExecutor(max_workers=workers, mp_context=pool_context(), initializer=initializer,
+                               initargs=initargs)
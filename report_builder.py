@@ -0,0 +1,402 @@
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+from collections import namedtuple
+
+from data_cache import file_digest
+from result_store import DB_FILE
+
+REPORT_DIR = 'report'
+REPORT_NAME = 'vr_evaluation_summary'
+REPORT_MANIFEST = 'report_manifest.json'
+# LaTeX aux, log and toc files stay in here instead of next to the sources
+BUILD_DIR = 'build'
+FORMATS = ['tex', 'md']
+REPORT_VERSION = 1
+
+# name: fragment file stem; title: section heading; tables: result tables of
+# the results database it reads; files: other inputs (figure PNGs), relative
+# to the working directory; render: function(doc, tables, files) writing the
+# section body through a _LatexWriter or _MarkdownWriter
+ReportSection = namedtuple('ReportSection', ['name', 'title', 'tables', 'files', 'render'])
+
+ASSESSMENTS = ['Vocabulary', 'Comprehension', 'Production']
+REACTION_ITEMS = {'VR_Satisfaction_Overall': 'Satisfaction', 'VR_Ease_of_Use': 'Ease of use',
+                  'VR_Engagement_Level': 'Engagement', 'VR_Recommendation': 'Recommendation'}
+SCORE_LABELS = {'Age': 'Age', 'Grade_Level': 'Grade level',
+                'Pre_Sign_Vocabulary_Score': 'Pre vocabulary', 'Post_Sign_Vocabulary_Score': 'Post vocabulary',
+                'Pre_Comprehension_Score': 'Pre comprehension', 'Post_Comprehension_Score': 'Post comprehension',
+                'Pre_Production_Score': 'Pre production', 'Post_Production_Score': 'Post production'}
+SUMMARY_FIGURE = 'vr_evaluation_results.png'
+TOP_THEMES = 8
+
+
+def _format_value(value, digits):
+    if value is None or value != value:
+        return '-'
+    if isinstance(value, float):
+        return f'{value:.{digits}f}'
+    return str(value)
+
+
+_TEX_ESCAPES = {'\\': r'\textbackslash{}', '&': r'\&', '%': r'\%', '$': r'\$', '#': r'\#', '_': r'\_',
+                '{': r'\{', '}': r'\}', '~': r'\textasciitilde{}', '^': r'\textasciicircum{}'}
+
+
+def _tex(text):
+    return ''.join(_TEX_ESCAPES.get(char, char) for char in str(text))
+
+
+class _FragmentWriter:
+    """Lines of one section fragment; figure paths are made relative to `output_dir`"""
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.lines = []
+
+    def relative(self, path):
+        return os.path.relpath(path, self.output_dir).replace(os.sep, '/')
+
+    def text(self):
+        return '\n'.join(self.lines)
+
+
+class _LatexWriter(_FragmentWriter):
+    """Section fragment as LaTeX"""
+
+    def heading(self, title, level=0):
+        self.lines += [f"\\{'sub' * level}section{{{_tex(title)}}}", '']
+
+    def paragraph(self, text):
+        self.lines += [_tex(text), '']
+
+    def bullets(self, items):
+        self.lines += ['\\begin{itemize}'] + [f'  \\item {_tex(item)}' for item in items] + ['\\end{itemize}', '']
+
+    def table(self, frame, caption, digits=2):
+        """`frame` with its index as the first column(s)"""
+        frame = frame.reset_index()
+        self.lines += ['\\begin{table}[htbp]', '\\centering', f'\\caption{{{_tex(caption)}}}',
+                       f"\\begin{{tabular}}{{l{'r' * (len(frame.columns) - 1)}}}", '\\hline',
+                       ' & '.join(_tex(col) for col in frame.columns) + r' \\', '\\hline']
+        for row in frame.itertuples(index=False):
+            self.lines.append(' & '.join(_tex(_format_value(value, digits)) for value in row) + r' \\')
+        self.lines += ['\\hline', '\\end{tabular}', '\\end{table}', '']
+
+    def figure(self, path, caption):
+        self.lines += ['\\begin{figure}[htbp]', '\\centering',
+                       f'\\includegraphics[width=0.8\\textwidth]{{{self.relative(path)}}}',
+                       f'\\caption{{{_tex(caption)}}}', '\\end{figure}', '']
+
+
+class _MarkdownWriter(_FragmentWriter):
+    """Section fragment as Markdown"""
+
+    def heading(self, title, level=0):
+        self.lines += [f"{'#' * (level + 2)} {title}", '']
+
+    def paragraph(self, text):
+        self.lines += [text, '']
+
+    def bullets(self, items):
+        self.lines += [f'- {item}' for item in items] + ['']
+
+    def table(self, frame, caption, digits=2):
+        frame = frame.reset_index()
+        self.lines += [f'*{caption}*', '', '| ' + ' | '.join(str(col) for col in frame.columns) + ' |',
+                       '|' + '|'.join(['---'] + ['---:'] * (len(frame.columns) - 1)) + '|']
+        for row in frame.itertuples(index=False):
+            self.lines.append('| ' + ' | '.join(_format_value(value, digits) for value in row) + ' |')
+        self.lines.append('')
+
+    def figure(self, path, caption):
+        self.lines += [f'![{caption}]({self.relative(path)})', '']
+
+
+def _p_value(p):
+    return '< 0.001' if p < 0.001 else f'{p:.3f}'
+
+
+def _indexed(frame, *columns):
+    return None if frame is None else frame.set_index(list(columns))
+
+
+WRITERS = {'tex': _LatexWriter, 'md': _MarkdownWriter}
+
+
+# Section bodies: every number comes from the result tables of
+# detailed_data_analysis.py, so the report matches the database
+
+def _render_descriptive(doc, tables, files):
+    stats = _indexed(tables['descriptive_stats'], 'index')
+    if stats is None:
+        doc.paragraph('No descriptive statistics stored yet; run detailed_data_analysis.py first.')
+        return
+    doc.paragraph(f"The analysis covers {int(stats.loc['count', 'Age'])} students aged "
+                  f"{int(stats.loc['min', 'Age'])} to {int(stats.loc['max', 'Age'])} years.")
+    table = stats.loc[['mean', 'std', 'min', 'max'], list(SCORE_LABELS)].T.rename(index=SCORE_LABELS)
+    doc.table(table.rename_axis('Variable').rename(columns=str.capitalize), 'Demographics and assessment scores', 1)
+    validation = _indexed(tables['validation_report'], 'Rule', 'Column')
+    if validation is not None and len(validation):
+        doc.paragraph('Rows failing ingest validation were left out of every result:')
+        doc.table(validation[['Rows']], 'Ingest validation', 0)
+
+
+def _render_reaction(doc, tables, files):
+    stats = _indexed(tables['descriptive_stats'], 'index')
+    levels = tables['gender_reaction_levels']
+    if stats is None or levels is None:
+        doc.paragraph('No reaction results stored yet; run detailed_data_analysis.py first.')
+        return
+    overall = levels.groupby('Item', sort=False)[['n', 'high', 'moderate', 'low']].sum()
+    table = stats.loc[['mean', 'std'], list(REACTION_ITEMS)].T.rename(columns={'mean': 'Mean', 'std': 'SD'})
+    table['High (4-5) %'] = overall['high'] / overall['n'] * 100
+    table['Low (1-2) %'] = overall['low'] / overall['n'] * 100
+    doc.paragraph('Kirkpatrick Level 1: ratings of the VR application on a 1-5 scale.')
+    doc.table(table.rename(index=REACTION_ITEMS).rename_axis('Item'), 'VR reaction ratings', 2)
+    by_gender = levels.pivot(index='Gender', columns='Item', values='mean')[list(REACTION_ITEMS)]
+    doc.table(by_gender.rename(columns=REACTION_ITEMS), 'Mean rating by gender', 2)
+
+
+def _render_learning(doc, tables, files):
+    tests = _indexed(tables['t_test_results'], 'index')
+    effects = _indexed(tables['effect_sizes'], 'index')
+    stats = _indexed(tables['descriptive_stats'], 'index')
+    if tests is None or effects is None or stats is None:
+        doc.paragraph('No learning results stored yet; run detailed_data_analysis.py first.')
+        return
+    table = tests.rename(columns={'t-statistic': 't', 'p-value': 'p'})
+    table['p'] = table['p'].map(_p_value)
+    table.insert(0, 'Mean gain', [stats.loc['mean', f'{name}_Gain'] for name in table.index])
+    table = table.join(effects.T)
+    doc.paragraph('Kirkpatrick Level 2: paired pre/post comparisons of the three sign language assessments.')
+    doc.table(table.rename_axis('Assessment'), 'Learning gains, paired t-tests and effect sizes', 3)
+    inference = tables['resampling_inference']
+    if inference is not None:
+        gains = inference[inference['Statistic'] == 'mean_gain'].set_index('Variable')
+        gains = gains.assign(p_value=gains['p_value'].map(_p_value))
+        labels = {'estimate': 'Mean gain', 'ci_low': 'CI low', 'ci_high': 'CI high', 'p_value': 'p'}
+        doc.table(gains[list(labels)].rename(columns=labels).rename_axis('Assessment'),
+                  f"Bootstrap 95% confidence intervals and permutation p-values (n = {int(gains['n'].iloc[0])})", 3)
+    grade = _indexed(tables['grade_gains'], 'Grade_Level')
+    if grade is not None:
+        doc.table(grade.rename(columns=lambda col: col.replace('_Gain', '')).rename_axis('Grade'),
+                  'Mean gain by grade level', 1)
+
+
+def _render_qualitative(doc, tables, files):
+    transcripts = tables['transcript_analysis']
+    if transcripts is None:
+        doc.paragraph('No interview analysis stored yet; run detailed_data_analysis.py first.')
+        return
+    sentiment = transcripts['Sentiment'].value_counts()
+    doc.paragraph(f"{len(transcripts)} student interviews were analyzed: "
+                  + ', '.join(f'{count} {label.lower()}' for label, count in sentiment.items()) + '.')
+    themes = transcripts['Themes'].dropna().str.split('; ').explode()
+    themes = themes[themes != ''].value_counts().head(TOP_THEMES)
+    doc.heading('Most frequent themes', 1)
+    doc.bullets(f'{theme} ({count} interviews)' for theme, count in themes.items())
+    outcomes = tables['outcomes_by_sentiment']
+    if outcomes is not None:
+        coded = outcomes[outcomes['Source'] == 'coded'].set_index('Sentiment')
+        columns = {f'{name}_Gain_mean': name for name in ASSESSMENTS}
+        columns['VR_Satisfaction_Overall_mean'] = 'Satisfaction'
+        table = coded[['interviews'] + list(columns)].rename(columns=columns | {'interviews': 'Interviews'})
+        doc.table(table, 'Mean outcomes by coded interview sentiment', 2)
+
+
+def _figure_files():
+    from figure_rendering import DETAILED_FIGURES
+    return [SUMMARY_FIGURE] + [spec.filename for spec in DETAILED_FIGURES.values()]
+
+
+def _render_figures(doc, tables, files):
+    present = [path for path in files if os.path.exists(path)]
+    if not present:
+        doc.paragraph('No figures rendered yet; run detailed_data_analysis.py first.')
+        return
+    for path in present:
+        title = os.path.splitext(os.path.basename(path))[0].removeprefix('fig_').replace('_', ' ')
+        doc.figure(path, title.capitalize())
+
+
+def report_sections():
+    """The sections of the report, in document order"""
+    figures = _figure_files()
+    return [
+        ReportSection('descriptive', 'Descriptive Statistics', ['descriptive_stats', 'validation_report'], [],
+                      _render_descriptive),
+        ReportSection('reaction', 'Level 1: Reaction', ['descriptive_stats', 'gender_reaction_levels'], [],
+                      _render_reaction),
+        ReportSection('learning', 'Level 2: Learning',
+                      ['descriptive_stats', 't_test_results', 'effect_sizes', 'resampling_inference', 'grade_gains'],
+                      [], _render_learning),
+        ReportSection('qualitative', 'Qualitative Findings', ['transcript_analysis', 'outcomes_by_sentiment'], [],
+                      _render_qualitative),
+        ReportSection('figures', 'Figures', [], figures, _render_figures)
+    ]
+
+
+def _read_tables(conn, names):
+    """Stored result tables by name (None where missing) and a digest of each one's rows"""
+    import pandas as pd
+    stored = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    tables, digests = {}, {}
+    for name in names:
+        if name not in stored:
+            tables[name], digests[name] = None, 'missing'
+            continue
+        cursor = conn.execute(f'SELECT * FROM "{name}"')
+        columns = [column[0] for column in cursor.description]
+        rows = cursor.fetchall()
+        tables[name] = pd.DataFrame(rows, columns=columns)
+        digests[name] = hashlib.blake2b(repr((columns, rows)).encode(), digest_size=16).hexdigest()
+    return tables, digests
+
+
+def section_fingerprint(section, table_digests, extension):
+    """Digest of everything a section fragment is rendered from, including this module's code"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in [REPORT_VERSION, section.name, section.title, extension, file_digest(os.path.abspath(__file__))]:
+        digest.update(repr(part).encode() + b'\0')
+    for name in section.tables:
+        digest.update(f'{name}={table_digests[name]}'.encode() + b'\0')
+    for path in section.files:
+        digest.update(f"{path}={file_digest(path) if os.path.exists(path) else 'missing'}".encode() + b'\0')
+    return digest.hexdigest()
+
+
+def _write(path, text):
+    with open(path + '.tmp', 'w') as f:
+        f.write(text)
+    os.replace(path + '.tmp', path)
+
+
+class ReportBuilder:
+    """
+    Section-level incremental builder of the evaluation report.
+
+    Every section (descriptive statistics, Level 1, Level 2, qualitative
+    findings, figures) is rendered from the stored result tables, or the
+    figure PNGs, into `<output_dir>/sections/<name>.tex` and `.md`. A
+    section's fingerprint covers the rows of every table it reads, the
+    digests of its files and this module's code; the manifest keeps the
+    fingerprint of each fragment written, so only changed sections are
+    rendered again. The full documents are reassembled, and the LaTeX one
+    recompiled in `<output_dir>/build`, only when a fragment changed or an
+    output is missing.
+    """
+
+    def __init__(self, db_path=DB_FILE, output_dir=REPORT_DIR, sections=None):
+        self.db_path = db_path
+        self.output_dir = output_dir
+        self.sections = sections or report_sections()
+        self.manifest_path = os.path.join(output_dir, REPORT_MANIFEST)
+        try:
+            with open(self.manifest_path, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+        self.manifest = manifest if manifest.get('version') == REPORT_VERSION else {'version': REPORT_VERSION}
+
+    def build(self, formats=FORMATS, compile_pdf=False):
+        """
+        Bring the fragments and documents of `formats` up to date; with
+        `compile_pdf`, also the PDF (needs pdflatex). Returns the names of
+        the sections rendered again and whether a document was rewritten.
+        """
+        names = sorted({name for section in self.sections for name in section.tables})
+        conn = sqlite3.connect(self.db_path)
+        try:
+            tables, digests = _read_tables(conn, names)
+        finally:
+            conn.close()
+        os.makedirs(os.path.join(self.output_dir, 'sections'), exist_ok=True)
+        fragments = self.manifest.setdefault('sections', {})
+        documents = self.manifest.setdefault('documents', {})
+        rendered, reassembled = [], False
+        for extension in formats:
+            changed = False
+            for section in self.sections:
+                key = f'{section.name}.{extension}'
+                path = os.path.join(self.output_dir, 'sections', key)
+                fingerprint = section_fingerprint(section, digests, extension)
+                if fragments.get(key) == fingerprint and os.path.exists(path):
+                    continue
+                doc = WRITERS[extension](self.output_dir)
+                doc.heading(section.title)
+                section.render(doc, tables, section.files)
+                _write(path, doc.text())
+                fragments[key] = fingerprint
+                rendered.append(key)
+                changed = True
+            document = os.path.join(self.output_dir, f'{REPORT_NAME}.{extension}')
+            fingerprint = hashlib.blake2b(repr([fragments[f'{section.name}.{extension}']
+                                                for section in self.sections]).encode(), digest_size=16).hexdigest()
+            if changed or documents.get(extension) != fingerprint or not os.path.exists(document):
+                _write(document, self._assemble(extension))
+                documents[extension] = fingerprint
+                reassembled = True
+        # Saved before compiling, so a failed compile does not re-render the fragments
+        self.save()
+        if compile_pdf and 'tex' in formats and self._compile(documents['tex']):
+            self.save()
+        return rendered, reassembled
+
+    def _assemble(self, extension):
+        """The full document: LaTeX inputs the fragments, Markdown concatenates them"""
+        if extension == 'tex':
+            return '\n'.join([r'\documentclass{article}', r'\usepackage[utf8]{inputenc}', r'\usepackage{graphicx}',
+                              r'\usepackage[margin=1in]{geometry}', r'\title{VR Sign Language Learning Evaluation}',
+                              r'\date{}', r'\begin{document}', r'\maketitle']
+                             + [f'\\input{{sections/{section.name}}}' for section in self.sections]
+                             + [r'\end{document}', ''])
+        parts = ['# VR Sign Language Learning Evaluation', '']
+        for section in self.sections:
+            with open(os.path.join(self.output_dir, 'sections', f'{section.name}.md'), 'r') as f:
+                parts.append(f.read())
+        return '\n'.join(parts)
+
+    def _compile(self, fingerprint):
+        """Run pdflatex twice in the build directory unless the PDF is of this document version"""
+        pdf = os.path.join(self.output_dir, f'{REPORT_NAME}.pdf')
+        if self.manifest.get('pdf') == fingerprint and os.path.exists(pdf):
+            return False
+        if shutil.which('pdflatex') is None:
+            raise RuntimeError("pdflatex not found; install a TeX distribution (see latex_compilation_guide.md)")
+        os.makedirs(os.path.join(self.output_dir, BUILD_DIR), exist_ok=True)
+        # Two passes resolve figure and table numbering
+        for _ in range(2):
+            subprocess.run(['pdflatex', '-interaction=nonstopmode', '-halt-on-error', f'-output-directory={BUILD_DIR}',
+                            f'{REPORT_NAME}.tex'], cwd=self.output_dir, check=True, stdout=subprocess.DEVNULL)
+        os.replace(os.path.join(self.output_dir, BUILD_DIR, f'{REPORT_NAME}.pdf'), pdf)
+        self.manifest['pdf'] = fingerprint
+        return True
+
+    def save(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        _write(self.manifest_path, json.dumps(self.manifest, indent=1, sort_keys=True))
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Build the evaluation report from the stored analysis results, "
+                                                 "regenerating only the sections whose inputs changed")
+    parser.add_argument('--db', default=DB_FILE, help="results database written by detailed_data_analysis.py")
+    parser.add_argument('--output-dir', default=REPORT_DIR, help="directory of the fragments and documents")
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=FORMATS, help="output formats")
+    parser.add_argument('--pdf', action='store_true', help="also compile the LaTeX document with pdflatex")
+    args = parser.parse_args()
+
+    builder = ReportBuilder(args.db, args.output_dir)
+    try:
+        rendered, reassembled = builder.build(args.formats, compile_pdf=args.pdf)
+    except (RuntimeError, subprocess.CalledProcessError) as e:
+        print(f"✗ Report not compiled: {e}")
+        raise SystemExit(1)
+    print(f"✓ {len(rendered)} of {len(builder.sections) * len(args.formats)} report sections regenerated"
+          + (f" ({', '.join(rendered)})" if rendered else ''))
+    print(f"✓ Report {'reassembled' if reassembled else 'unchanged'} in {args.output_dir}/")
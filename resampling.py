@@ -0,0 +1,265 @@
+import json
+import os
+import shutil
+import tempfile
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from correlation_engine import REPORT_PAIRS
+from data_ingestion import ASSESSMENT_PAIRS
+from derived_columns import DerivedFrame
+from process_pool import process_pool
+from score_matrix import ScoreMatrix
+
+# Enough for stable 95% intervals on every run; pass more (e.g. 10000) for reported p-values
+DEFAULT_RESAMPLES = 1000
+
+# Cells of one block's (resamples x rows) index matrix; bounds the memory of a block
+BLOCK_CELLS = 1 << 22
+# Score matrix rows prepared at a time when the prepared columns are streamed to disk
+PREPARE_ROWS = 1 << 16
+
+# Relative slack when comparing resampled statistics with the observed one, so
+# rounding noise does not turn ties into misses
+_TIE_TOLERANCE = 1e-9
+
+# Shifted columns of a cohort: pre, post and gain of every assessment pair and
+# the standardized variables of every correlation pair
+ResampleData = namedtuple('ResampleData', ['n', 'shift', 'columns', 'gains', 'z', 'correlation_index'])
+
+
+def _prepare(data, pairs, correlation_pairs):
+    """Complete rows of every used column, shifted by their means to limit cancellation"""
+    names, variables = _prepared_names(pairs, correlation_pairs)
+    values = np.column_stack([np.asarray(data[name], dtype=np.float64) for name in names])
+    values = values[~np.isnan(values).any(axis=1)]
+    n = len(values)
+    shift = values.mean(axis=0)
+    centered = values - shift
+    k = len(pairs)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = centered[:, 3 * k:] / centered[:, 3 * k:].std(axis=0, ddof=1)
+    position = {col: i for i, col in enumerate(variables)}
+    correlation_index = np.array([[position[a], position[b]] for a, b in correlation_pairs],
+                                 dtype=np.int64).reshape(-1, 2)
+    # Products of each correlation pair, so one matrix product gives every moment
+    products = centered[:, 3 * k:][:, correlation_index[:, 0]] * centered[:, 3 * k:][:, correlation_index[:, 1]]
+    columns = np.hstack([centered, centered * centered, products])
+    return ResampleData(n, shift, columns, values[:, 2 * k:3 * k], z, correlation_index)
+
+
+def _prepared_names(pairs, correlation_pairs):
+    variables = list(dict.fromkeys(col for pair in correlation_pairs for col in pair))
+    return [pair[i] for i in range(3) for pair in pairs] + variables, variables
+
+
+def _matrix_blocks(matrix, names, block_rows):
+    """float64 blocks of the `names` columns of a ScoreMatrix (derived ones computed per block)"""
+    for start in range(0, len(matrix), block_rows):
+        # Widened first, so post - pre cannot wrap around in int8
+        block = DerivedFrame(matrix.frame(start, start + block_rows).astype(np.int16))
+        yield np.column_stack([np.asarray(block[name], dtype=np.float64) for name in names])
+
+
+def _prepare_shared(matrix, pairs, correlation_pairs, directory, block_rows=PREPARE_ROWS):
+    """
+    `_prepare` of a ScoreMatrix, streamed over row blocks into float64 files
+    under `directory` (read back by `_open_prepared`). Neither this process
+    nor the workers, which map the files, hold the prepared columns in
+    private memory. Score matrix rows are never missing values.
+    """
+    names, variables = _prepared_names(pairs, correlation_pairs)
+    n, k, v = len(matrix), len(pairs), len(variables)
+    # Integer sums are exact, so the shift equals the mean `_prepare` takes
+    totals = sum((block.sum(axis=0) for block in _matrix_blocks(matrix, names, block_rows)),
+                 np.zeros(len(names)))
+    shift = totals / n
+    position = {col: i for i, col in enumerate(variables)}
+    correlation_index = np.array([[position[a], position[b]] for a, b in correlation_pairs],
+                                 dtype=np.int64).reshape(-1, 2)
+    width = 2 * len(names) + len(correlation_index)
+    files = {name: np.lib.format.open_memmap(os.path.join(directory, f'{name}.npy'), mode='w+',
+                                             dtype=np.float64, shape=shape)
+             for name, shape in [('columns', (n, width)), ('gains', (n, k)), ('z', (n, v))]}
+    squares = np.zeros(v)
+    start = 0
+    for values in _matrix_blocks(matrix, names, block_rows):
+        stop = start + len(values)
+        centered = values - shift
+        measures = centered[:, 3 * k:]
+        products = measures[:, correlation_index[:, 0]] * measures[:, correlation_index[:, 1]]
+        files['columns'][start:stop] = np.hstack([centered, centered * centered, products])
+        files['gains'][start:stop] = values[:, 2 * k:3 * k]
+        squares += (measures * measures).sum(axis=0)
+        start = stop
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sd = np.sqrt(squares / (n - 1))
+        for start in range(0, n, block_rows):
+            files['z'][start:start + block_rows] = files['columns'][start:start + block_rows, 3 * k:len(names)] / sd
+    for array in files.values():
+        array.flush()
+    with open(os.path.join(directory, 'prepared.json'), 'w') as f:
+        json.dump({'n': n, 'shift': shift.tolist(), 'correlation_index': correlation_index.tolist()}, f)
+
+
+def _open_prepared(directory):
+    """ResampleData over the files `_prepare_shared` wrote, memory-mapped read-only"""
+    with open(os.path.join(directory, 'prepared.json')) as f:
+        meta = json.load(f)
+    arrays = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r') for name in ('columns', 'gains', 'z')}
+    return ResampleData(meta['n'], np.array(meta['shift']), arrays['columns'], arrays['gains'], arrays['z'],
+                        np.array(meta['correlation_index'], dtype=np.int64).reshape(-1, 2))
+
+
+def _statistics(weights, data, k):
+    """
+    Mean gains, Cohen's d, Glass's delta and correlations for every row of a
+    (resamples x rows) weight matrix of row multiplicities.
+    """
+    n = data.n
+    m = data.shift.size
+    moments = weights @ data.columns / n
+    means = moments[:, :m]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variances = (moments[:, m:2 * m] - means * means) * n / (n - 1)
+        mean_gain = data.shift[2 * k:3 * k] + means[:, 2 * k:3 * k]
+        var_pre, var_post = variances[:, :k], variances[:, k:2 * k]
+        cohens_d = mean_gain / np.sqrt((var_pre + var_post) / 2)
+        glass_delta = mean_gain / np.sqrt(var_pre)
+        a = 3 * k + data.correlation_index[:, 0]
+        b = 3 * k + data.correlation_index[:, 1]
+        covariance = moments[:, 2 * m:] - means[:, a] * means[:, b]
+        r = covariance * n / (n - 1) / np.sqrt(variances[:, a] * variances[:, b])
+    return np.hstack([mean_gain, cohens_d, glass_delta, r])
+
+
+def bootstrap_block(seed, size, data, k):
+    """
+    Statistics of `size` bootstrap resamples. The resample indices are drawn as
+    one (size x rows) matrix and turned into row multiplicities with a single
+    bincount over (resample, row) codes.
+    """
+    rng = np.random.default_rng(seed)
+    n = data.n
+    indices = rng.integers(0, n, size=(size, n))
+    packed = (indices + np.arange(size)[:, None] * n).ravel()
+    weights = np.bincount(packed, minlength=size * n).reshape(size, n).astype(np.float64)
+    return _statistics(weights, data, k)
+
+
+def permutation_block(seed, size, data, observed):
+    """
+    Exceedance counts of `size` permutations: pre/post swaps (sign flips of
+    the gains) for the mean gains, and permutations of one variable of each
+    pair for the correlations. Each kind is drawn as one matrix.
+    """
+    rng = np.random.default_rng(seed)
+    n = data.n
+    signs = rng.integers(0, 2, size=(size, n)) * 2.0 - 1.0
+    gain_stats = np.abs(signs @ data.gains) / n
+    order = rng.permuted(np.tile(np.arange(n), (size, 1)), axis=1)
+    r_stats = np.column_stack([np.abs((data.z[:, a][order] * data.z[:, b]).sum(axis=1)) / (n - 1)
+                               for a, b in data.correlation_index]).reshape(size, -1)
+    stats = np.hstack([gain_stats, r_stats])
+    threshold = np.abs(observed) * (1 - _TIE_TOLERANCE)
+    return (stats >= threshold).sum(axis=0)
+
+
+def _block_sizes(n_resamples, n_rows):
+    size = max(1, min(n_resamples, BLOCK_CELLS // max(n_rows, 1)))
+    return [min(size, n_resamples - start) for start in range(0, n_resamples, size)]
+
+
+_worker_data = None
+
+
+def _load_worker(data):
+    """Pool initializer: prepared columns, or the directory of shared ones to map"""
+    global _worker_data
+    _worker_data = _open_prepared(data) if isinstance(data, str) else data
+
+
+def _run_block(task):
+    kind, seed, size, extra = task
+    if kind == 'bootstrap':
+        return bootstrap_block(seed, size, _worker_data, extra)
+    return permutation_block(seed, size, _worker_data, extra)
+
+
+def resampling_table(data, pairs=None, correlation_pairs=None, n_resamples=DEFAULT_RESAMPLES, seed=0,
+                     workers=None, confidence=0.95):
+    """
+    Bootstrap confidence intervals and permutation p-values for the mean gain,
+    Cohen's d and Glass's delta of every assessment pair and for the
+    correlation of every pair in `correlation_pairs`.
+
+    `data` is a data frame, `DerivedFrame` or `ScoreMatrix`; rows missing any
+    used value are dropped. The columns of a ScoreMatrix are prepared once,
+    block by block, into memory-mapped files next to it: workers receive
+    their path and map the same pages, so a worker's private memory is
+    bounded by BLOCK_CELLS whatever the cohort size.
+    Resamples are split into fixed-size blocks and every block draws from its
+    own stream spawned from `np.random.SeedSequence(seed)`, so the block plan
+    and the draws depend only on the seed and the data: any number of
+    `workers` gives identical results. `workers=1` (or a single block)
+    runs in-process. Effect sizes get confidence intervals only; their
+    direction is tested by the mean gain's p-value.
+    """
+    if n_resamples < 1:
+        raise ValueError(f"n_resamples must be at least 1, got {n_resamples}")
+    pairs = pairs or ASSESSMENT_PAIRS
+    correlation_pairs = REPORT_PAIRS if correlation_pairs is None else correlation_pairs
+    shared = None
+    if isinstance(data, ScoreMatrix):
+        shared = tempfile.mkdtemp(prefix='resampling-', dir=os.path.dirname(os.path.abspath(data.path)))
+        _prepare_shared(data, pairs, correlation_pairs, shared)
+        prepared = _open_prepared(shared)
+    else:
+        prepared = _prepare(data, pairs, correlation_pairs)
+    try:
+        return _resample(prepared, shared, pairs, correlation_pairs, n_resamples, seed, workers, confidence)
+    finally:
+        if shared is not None:
+            shutil.rmtree(shared, ignore_errors=True)
+
+
+def _resample(prepared, shared, pairs, correlation_pairs, n_resamples, seed, workers, confidence):
+    k = len(pairs)
+    observed = _statistics(np.ones((1, prepared.n)), prepared, k)[0]
+    tested = np.r_[observed[:k], observed[3 * k:]]
+
+    sizes = _block_sizes(n_resamples, prepared.n)
+    bootstrap_seeds, permutation_seeds = (root.spawn(len(sizes))
+                                          for root in np.random.SeedSequence(seed).spawn(2))
+    tasks = [('bootstrap', s, size, k) for s, size in zip(bootstrap_seeds, sizes)] + \
+            [('permutation', s, size, tested) for s, size in zip(permutation_seeds, sizes)]
+    if workers is None:
+        workers = min(len(tasks), os.cpu_count() or 1)
+    if workers <= 1 or len(sizes) <= 1:
+        _load_worker(prepared)
+        try:
+            outputs = [_run_block(task) for task in tasks]
+        finally:
+            _load_worker(None)
+    else:
+        with process_pool(workers, initializer=_load_worker, initargs=(shared or prepared,)) as pool:
+            outputs = list(pool.map(_run_block, tasks))
+
+    resampled = np.vstack(outputs[:len(sizes)])
+    exceed = np.sum(outputs[len(sizes):], axis=0)
+    alpha = 1 - confidence
+    with np.errstate(invalid='ignore'):
+        ci_low, ci_high = np.nanquantile(resampled, [alpha / 2, 1 - alpha / 2], axis=0)
+    # Phipson & Smyth: the observed arrangement counts as one of the permutations
+    p_tested = (exceed + 1) / (n_resamples + 1)
+    p_value = np.full(observed.shape, np.nan)
+    p_value[:k], p_value[3 * k:] = p_tested[:k], p_tested[k:]
+
+    names = [name for _, _, _, name in pairs]
+    index = pd.MultiIndex.from_tuples(
+        [(statistic, name) for statistic in ('mean_gain', 'cohens_d', 'glass_delta') for name in names] +
+        [('r', f"{a} ~ {b}") for a, b in correlation_pairs], names=['Statistic', 'Variable'])
+    return pd.DataFrame({'n': prepared.n, 'estimate': observed, 'ci_low': ci_low, 'ci_high': ci_high,
+                         'p_value': p_value}, index=index)
@@ -0,0 +1,235 @@
+import os
+import pickle
+import sqlite3
+import threading
+from contextlib import contextmanager
+from itertools import count
+
+import pandas as pd
+
+from data_cache import file_digest
+
+DB_FILE = 'sign_language.db'
+STUDENT_TABLE = 'student_data'
+STUDENT_KEY = 'Student_ID'
+STUDENT_INDEXES = ['Gender', 'Grade_Level', 'Age']
+STAGE_CACHE_TABLE = 'stage_cache'
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _sql_type(dtype):
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'REAL'
+    return 'TEXT'
+
+
+def _rows(df):
+    """Data frame rows as tuples of plain Python values, NA as None"""
+    values = df.astype(object)
+    return values.where(df.notna(), None).itertuples(index=False, name=None)
+
+
+class ResultStore:
+    """
+    One SQLite connection shared by every step of DetailedDataAnalysis.
+
+    The database runs in WAL mode and transactions are explicit: `transaction()`
+    nests, and only the outermost block commits, so a whole analysis run is
+    written atomically. Student rows are upserted on Student_ID instead of the
+    table being dropped and rewritten; small result tables are cleared and
+    refilled in place. Pipeline stages running on threads share the
+    connection: every block nested in the open transaction, whichever thread
+    enters it, holds the lock for its whole body and runs in its own
+    SAVEPOINT, so a stage that fails rolls back only its own writes and the
+    writes of concurrent stages never interleave. Chunked reads take the
+    lock too.
+    """
+
+    def __init__(self, db_path=DB_FILE):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self._root = None  # thread whose block began the open transaction
+        self._lock = threading.RLock()
+        self._savepoints = count(1)
+
+    def close(self):
+        self.conn.close()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Group writes; the outermost block commits, or rolls back on error. A
+        nested block is a savepoint, undone on its own if it raises.
+        """
+        with self._lock:
+            root = self._root is None
+            if root:
+                self.conn.execute('BEGIN')
+                self._root = threading.get_ident()
+        if root:
+            # The lock is free while the outermost block runs, so stage
+            # threads can nest their savepoints into it
+            try:
+                yield self.conn
+            except BaseException:
+                with self._lock:
+                    self._root = None
+                    self.conn.execute('ROLLBACK')
+                raise
+            with self._lock:
+                self._root = None
+                self.conn.execute('COMMIT')
+            return
+        with self._lock:
+            name = f'sp{next(self._savepoints)}'
+            self.conn.execute(f'SAVEPOINT {name}')
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute(f'ROLLBACK TO {name}')
+                self.conn.execute(f'RELEASE {name}')
+                raise
+            self.conn.execute(f'RELEASE {name}')
+
+    def _columns(self, table):
+        return [row[1] for row in self.conn.execute(f'PRAGMA table_info({_quote(table)})')]
+
+    # Student rows
+
+    def upsert_students(self, chunk, track_loaded=False):
+        """
+        Insert or update student rows keyed on Student_ID.
+
+        With `track_loaded` the IDs are remembered so `prune_students()` can
+        drop students missing from a full reload.
+        """
+        with self._lock, self.transaction():
+            existing = self._columns(STUDENT_TABLE)
+            if not existing:
+                definitions = ', '.join(
+                    f'{_quote(col)} {_sql_type(chunk[col].dtype)}' + (' PRIMARY KEY' if col == STUDENT_KEY else '')
+                    for col in chunk.columns)
+                self.conn.execute(f'CREATE TABLE {_quote(STUDENT_TABLE)} ({definitions})')
+            else:
+                # Older databases were written by pandas without a key or gain columns
+                for col in chunk.columns:
+                    if col not in existing:
+                        self.conn.execute(f'ALTER TABLE {_quote(STUDENT_TABLE)} '
+                                          f'ADD COLUMN {_quote(col)} {_sql_type(chunk[col].dtype)}')
+            self.conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS {_quote("ux_student_data_" + STUDENT_KEY)} '
+                              f'ON {_quote(STUDENT_TABLE)} ({_quote(STUDENT_KEY)})')
+            for col in STUDENT_INDEXES:
+                if col in chunk.columns:
+                    self.conn.execute(f'CREATE INDEX IF NOT EXISTS {_quote("ix_student_data_" + col)} '
+                                      f'ON {_quote(STUDENT_TABLE)} ({_quote(col)})')
+
+            columns = ', '.join(_quote(col) for col in chunk.columns)
+            placeholders = ', '.join('?' for _ in chunk.columns)
+            updates = ', '.join(f'{_quote(col)} = excluded.{_quote(col)}'
+                                for col in chunk.columns if col != STUDENT_KEY)
+            self.conn.executemany(
+                f'INSERT INTO {_quote(STUDENT_TABLE)} ({columns}) VALUES ({placeholders}) '
+                f'ON CONFLICT({_quote(STUDENT_KEY)}) DO UPDATE SET {updates}', _rows(chunk))
+
+            if track_loaded:
+                self.conn.execute('CREATE TEMP TABLE IF NOT EXISTS loaded_students (Student_ID TEXT PRIMARY KEY)')
+                self.conn.executemany('INSERT OR IGNORE INTO temp.loaded_students VALUES (?)',
+                                      ((sid,) for sid in chunk[STUDENT_KEY].astype(object)))
+
+    def prune_students(self):
+        """Delete students not upserted with `track_loaded` since the last prune"""
+        with self.transaction():
+            if self._columns(STUDENT_TABLE):
+                self.conn.execute('CREATE TEMP TABLE IF NOT EXISTS loaded_students (Student_ID TEXT PRIMARY KEY)')
+                self.conn.execute(f'DELETE FROM {_quote(STUDENT_TABLE)} WHERE {_quote(STUDENT_KEY)} '
+                                  f'NOT IN (SELECT Student_ID FROM temp.loaded_students)')
+            self.conn.execute('DROP TABLE IF EXISTS temp.loaded_students')
+
+    def read_students(self, columns, chunksize=50000):
+        """
+        Yield `columns` of every stored student row, in chunks of `chunksize`
+        rows. The lock is held until the rows are exhausted or the generator
+        is closed, so other stage threads cannot write through the shared
+        connection in the middle of the read.
+        """
+        query = f'SELECT {", ".join(_quote(col) for col in columns)} FROM {_quote(STUDENT_TABLE)}'
+        with self._lock:
+            yield from pd.read_sql_query(query, self.conn, chunksize=chunksize)
+
+    # Source bookkeeping
+
+    def source_unchanged(self, path):
+        """True if `path` has the same size, mtime and content as at the last recorded load"""
+        self.conn.execute('CREATE TABLE IF NOT EXISTS loaded_sources '
+                          '(path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, digest TEXT)')
+        row = self.conn.execute('SELECT size, mtime_ns, digest FROM loaded_sources WHERE path = ?',
+                                (os.path.abspath(path),)).fetchone()
+        if row is None or not self._columns(STUDENT_TABLE):
+            return False
+        st = os.stat(path)
+        if row[0] != st.st_size:
+            return False
+        return row[1] == st.st_mtime_ns or row[2] == file_digest(path)
+
+    def record_source(self, path):
+        st = os.stat(path)
+        with self.transaction():
+            self.conn.execute('CREATE TABLE IF NOT EXISTS loaded_sources '
+                              '(path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, digest TEXT)')
+            self.conn.execute('INSERT OR REPLACE INTO loaded_sources VALUES (?, ?, ?, ?)',
+                              (os.path.abspath(path), st.st_size, st.st_mtime_ns, file_digest(path)))
+
+    # Result tables
+
+    def write_results(self, table, df, index=True):
+        """
+        Replace the rows of a small result table in place.
+
+        Columns follow `DataFrame.to_sql` naming (index levels first, unnamed
+        index as "index"); the table is only recreated if its columns change.
+        """
+        if index:
+            names = [name if name is not None else ('index' if df.index.nlevels == 1 else f'level_{i}')
+                     for i, name in enumerate(df.index.names)]
+            df = df.reset_index(names=names)
+        else:
+            names = []
+
+        with self._lock, self.transaction():
+            if self._columns(table) != [str(col) for col in df.columns]:
+                self.conn.execute(f'DROP TABLE IF EXISTS {_quote(table)}')
+                definitions = ', '.join(f'{_quote(col)} {_sql_type(df[col].dtype)}' for col in df.columns)
+                self.conn.execute(f'CREATE TABLE {_quote(table)} ({definitions})')
+                if names:
+                    self.conn.execute(f'CREATE INDEX {_quote("ix_" + table + "_" + "_".join(names))} '
+                                      f'ON {_quote(table)} ({", ".join(_quote(n) for n in names)})')
+            else:
+                self.conn.execute(f'DELETE FROM {_quote(table)}')
+            placeholders = ', '.join('?' for _ in df.columns)
+            self.conn.executemany(f'INSERT INTO {_quote(table)} VALUES ({placeholders})', _rows(df))
+
+    # Stage cache
+
+    def stage_entry(self, name):
+        """(fingerprint, payload) last recorded for pipeline stage `name`, or None"""
+        with self._lock:
+            self.conn.execute(f'CREATE TABLE IF NOT EXISTS {STAGE_CACHE_TABLE} '
+                              '(name TEXT PRIMARY KEY, fingerprint TEXT, payload BLOB)')
+            row = self.conn.execute(f'SELECT fingerprint, payload FROM {STAGE_CACHE_TABLE} WHERE name = ?',
+                                    (name,)).fetchone()
+        return (row[0], pickle.loads(row[1])) if row else None
+
+    def record_stage(self, name, fingerprint, payload):
+        """Remember the fingerprint and outputs of a stage, committed with the results it wrote"""
+        with self._lock, self.transaction():
+            self.conn.execute(f'CREATE TABLE IF NOT EXISTS {STAGE_CACHE_TABLE} '
+                              '(name TEXT PRIMARY KEY, fingerprint TEXT, payload BLOB)')
+            self.conn.execute(f'INSERT OR REPLACE INTO {STAGE_CACHE_TABLE} VALUES (?, ?, ?)',
+                              (name, fingerprint, pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)))
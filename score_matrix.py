@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_cache import CACHE_DIR, file_digest
+from data_ingestion import (DEFAULT_CHUNKSIZE, DERIVED_COLUMNS, POST_COLUMNS, PRE_COLUMNS, VR_COLUMNS,
+                            read_student_chunks)
+from likert_histograms import LikertHistogram
+from paired_tests import PairedTestAccumulator
+from process_pool import process_pool
+
+# Every small-integer column of student_data.csv; Gender and Student_ID stay in the frame cache
+SCORE_COLUMNS = ['Age', 'Grade_Level'] + PRE_COLUMNS + POST_COLUMNS + VR_COLUMNS
+# Scores are 0-100 and ratings 1-5, so one byte per value is enough
+SCORE_DTYPE = 'int8'
+MATRIX_VERSION = 1
+# Rows per task of `map_row_blocks`
+BLOCK_ROWS = 1 << 20
+
+
+class ScoreMatrix:
+    """
+    Read-only (rows x columns) small-int matrix of the score columns,
+    memory-mapped from one contiguous row-major file.
+
+    The JSON sidecar `<path>.json` is the column index: column names, dtype,
+    row count and the source file it was built from. Opening a matrix maps
+    the file without reading it, and pickling one sends only its path, so
+    worker processes map the same pages of the OS page cache instead of
+    receiving copies: a cohort costs the same RAM in 32 workers as in one.
+    """
+
+    def __init__(self, path):
+        with open(path + '.json') as f:
+            self.meta = json.load(f)
+        self.path = path
+        self.columns = self.meta['columns']
+        self.index = {col: i for i, col in enumerate(self.columns)}
+        shape = (self.meta['rows'], len(self.columns))
+        self.values = np.memmap(path, dtype=self.meta['dtype'], mode='r', shape=shape) if shape[0] \
+            else np.empty(shape, dtype=self.meta['dtype'])
+
+    def __reduce__(self):
+        return ScoreMatrix, (os.path.abspath(self.path),)
+
+    def __len__(self):
+        return len(self.values)
+
+    def column(self, name):
+        """Strided view of one stored column (no copy)"""
+        return self.values[:, self.index[name]]
+
+    def __getitem__(self, name):
+        """A stored column, or a derived one (gains, success masks) computed from its sources"""
+        if name in self.index:
+            return self.column(name)
+        derived = DERIVED_COLUMNS[name]
+        # Widened first, so post - pre cannot wrap around in int8
+        return derived.compute({col: np.asarray(self[col], dtype=np.int16) for col in derived.sources})
+
+    def frame(self, start=0, stop=None):
+        """Rows [start, stop) as a data frame over the mapped memory"""
+        return pd.DataFrame(self.values[start:stop], columns=self.columns, copy=False)
+
+    def chunks(self, chunksize=DEFAULT_CHUNKSIZE):
+        for start in range(0, len(self), chunksize):
+            yield self.frame(start, start + chunksize)
+
+
+def write_score_matrix(chunks, path, columns=None, dtype=SCORE_DTYPE, source=None):
+    """
+    Append the `columns` of every chunk as rows of a new matrix at `path` and
+    write its sidecar; both replace any previous matrix atomically. Values
+    that do not fit `dtype` raise ValueError rather than wrapping around.
+    """
+    columns = list(columns or SCORE_COLUMNS)
+    limits = np.iinfo(dtype)
+    rows = 0
+    with open(path + '.tmp', 'wb') as f:
+        for chunk in chunks:
+            block = chunk[columns].to_numpy()
+            if not np.issubdtype(block.dtype, np.integer):
+                raise ValueError(f"score matrix columns must be integers without missing values, got {block.dtype}")
+            if len(block):
+                outside = (block.min(axis=0) < limits.min) | (block.max(axis=0) > limits.max)
+                if outside.any():
+                    raise ValueError(f"{', '.join(np.array(columns)[outside])} outside the {dtype} range "
+                                     f"[{limits.min}, {limits.max}] of the score matrix")
+            f.write(np.ascontiguousarray(block, dtype=dtype).tobytes())
+            rows += len(block)
+    meta = {'version': MATRIX_VERSION, 'columns': columns, 'dtype': np.dtype(dtype).str, 'rows': rows,
+            'source': source}
+    with open(path + '.json.tmp', 'w') as f:
+        json.dump(meta, f)
+    os.replace(path + '.tmp', path)
+    os.replace(path + '.json.tmp', path + '.json')
+    return ScoreMatrix(path)
+
+
+def _source_meta(path):
+    st = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def _matrix_current(path, csv_file):
+    """True if the matrix at `path` was built by this version from the current `csv_file`"""
+    try:
+        with open(path + '.json') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+    source, current = meta.get('source') or {}, _source_meta(csv_file)
+    if meta.get('version') != MATRIX_VERSION or source.get('path') != current['path'] \
+            or source.get('size') != current['size']:
+        return False
+    # As in DataCache, a touched but unchanged file keeps its matrix
+    return source.get('mtime_ns') == current['mtime_ns'] or source.get('digest') == file_digest(csv_file)
+
+
+def open_score_matrix(csv_file='student_data.csv', cache_dir=CACHE_DIR, chunksize=DEFAULT_CHUNKSIZE, cache=None):
+    """
+    ScoreMatrix of `csv_file`, kept under `cache_dir` and rebuilt in one
+    streaming pass (through the DataCache `cache` if given) when the CSV changed.
+    """
+    key = hashlib.blake2b(os.path.abspath(csv_file).encode(), digest_size=8).hexdigest()
+    path = os.path.join(cache_dir, f"{os.path.basename(csv_file)}-{key}.scores")
+    if _matrix_current(path, csv_file):
+        return ScoreMatrix(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    source = dict(_source_meta(csv_file), digest=file_digest(csv_file))
+    return write_score_matrix(read_student_chunks(csv_file, chunksize, cache=cache), path, source=source)
+
+
+def _run_block(task):
+    matrix, start, stop, function = task
+    return function(matrix.frame(start, stop))
+
+
+def map_row_blocks(matrix, function, workers=None, block_rows=BLOCK_ROWS):
+    """
+    `function(frame)` of every block of `block_rows` rows, in row order, on
+    `workers` processes (one per CPU by default, 1 runs in-process). Workers
+    receive the matrix path and map the blocks they read; `function` must be
+    a module-level function.
+    """
+    tasks = [(matrix, start, min(start + block_rows, len(matrix)), function)
+             for start in range(0, len(matrix), block_rows)]
+    if workers is None:
+        workers = min(len(tasks), os.cpu_count() or 1)
+    if workers <= 1 or len(tasks) <= 1:
+        return [_run_block(task) for task in tasks]
+    with process_pool(workers) as pool:
+        return list(pool.map(_run_block, tasks))
+
+
+def _score_block(frame):
+    return PairedTestAccumulator().update(frame), LikertHistogram().update(frame)
+
+
+def score_statistics(matrix, workers=None, block_rows=BLOCK_ROWS):
+    """Paired-test sums and rating histograms of the whole matrix, merged over row blocks in order"""
+    tests, reactions = PairedTestAccumulator(), LikertHistogram()
+    for block_tests, block_reactions in map_row_blocks(matrix, _score_block, workers, block_rows):
+        tests.merge(block_tests)
+        reactions.merge(block_reactions)
+    return tests, reactions
+
+
+if __name__ == "__main__":
+    import argparse
+    from data_cache import DataCache
+    parser = argparse.ArgumentParser(description="Build the memory-mapped score matrix of a student CSV and "
+                                                 "compute paired tests and reaction levels from it")
+    parser.add_argument('csv_file', nargs='?', default='student_data.csv', help="student_data.csv-shaped file")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="processes reading row blocks (default: one per CPU, 1 runs in-process)")
+    parser.add_argument('--block-rows', type=int, default=BLOCK_ROWS, help="rows per worker task")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="parse the CSV directly instead of through the binary frame cache")
+    args = parser.parse_args()
+
+    matrix = open_score_matrix(args.csv_file, cache=None if args.no_cache else DataCache())
+    print(f"✓ Score matrix {matrix.path}: {len(matrix)} rows x {len(matrix.columns)} {matrix.meta['dtype']} columns "
+          f"({matrix.values.nbytes / (1 << 20):.1f} MB)")
+    tests, reactions = score_statistics(matrix, args.workers, args.block_rows)
+    print(tests.results().round(4).to_string())
+    print(reactions.results().to_string())
@@ -0,0 +1,250 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+METRICS_TABLE = 'stage_metrics'
+METRIC_COLUMNS = [('run_id', 'TEXT'), ('pipeline', 'TEXT'), ('stage', 'TEXT'), ('status', 'TEXT'),
+                  ('started', 'REAL'), ('wall_seconds', 'REAL'), ('cpu_seconds', 'REAL'),
+                  ('peak_rss_bytes', 'INTEGER'), ('rows', 'INTEGER'), ('cache_hits', 'INTEGER'),
+                  ('cache_misses', 'INTEGER'), ('profile_path', 'TEXT')]
+
+# Seconds between stack samples of the sampling profiler
+DEFAULT_SAMPLE_INTERVAL = 0.005
+PROFILE_DIR = 'stage_profiles'
+
+
+def peak_rss():
+    """Peak resident set size of this process in bytes (None where unavailable)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def reset_peak_rss():
+    """Restart the peak RSS count (Linux only); elsewhere a stage reports the peak so far"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def _cpu_time():
+    """User + system time of this process and of its finished workers"""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler: a background thread records the call stack of one
+    thread every `interval` seconds. Samples are kept as collapsed stacks
+    ('outer;inner;leaf' -> count), the input format of flame graph tools.
+    """
+
+    def __init__(self, interval=DEFAULT_SAMPLE_INTERVAL, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self
+
+    def _sample(self):
+        own = sys._getframe()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None and frame is not own:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def top(self, n=10):
+        """The `n` functions most often on top of the stack, with their share of the samples"""
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        return [(name, count / total) for name, count in leaves.most_common(n)]
+
+    def write(self, path):
+        """Write the collapsed stacks, one 'stack count' line each"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class StageMetrics:
+    """
+    Per-stage instrumentation of an analysis pipeline.
+
+    Every `stage()` block records its wall time, CPU time (including finished
+    worker processes), peak RSS, the rows it reported through `count()` and
+    the hits and misses of every cache registered with `watch()`. Process
+    CPU time, peak RSS and cache counters cannot be split between stages
+    that run at the same time on threads, so a stage that overlapped another
+    records only the CPU time of its own thread and no peak RSS or cache
+    counts (None; '-' and '*' in `report()`). Records are
+    appended to `log_path` as JSON lines when the stage ends, and inserted
+    into the `stage_metrics` table of the SQLite database `db_path` by
+    `flush()`, which is called after the pipeline's own transaction so it
+    never waits on it. Stages named in `sample_stages` also run under a
+    `SamplingProfiler`, whose stacks are written under `profile_dir`.
+    """
+
+    def __init__(self, pipeline, log_path=None, db_path=None, sample_stages=(),
+                 sample_interval=DEFAULT_SAMPLE_INTERVAL, profile_dir=PROFILE_DIR):
+        self.pipeline = pipeline
+        self.log_path = log_path
+        self.db_path = db_path
+        self.sample_stages = set(sample_stages or ())
+        self.sample_interval = sample_interval
+        self.profile_dir = profile_dir
+        self.run_id = time.strftime('%Y%m%dT%H%M%S') + '-' + uuid.uuid4().hex[:6]
+        self.records = []
+        self.profiles = {}
+        self._sources = []
+        self._unsaved = []
+        # Stages may run concurrently on threads; count() adds to the calling thread's stage
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._active = {}
+
+    @property
+    def enabled(self):
+        """True when the records go to a sink or a stage is profiled"""
+        return bool(self.log_path or self.db_path or self.sample_stages)
+
+    def watch(self, cache):
+        """Count the `hits` / `misses` of `cache` towards the stage running when they occur"""
+        if cache is not None:
+            self._sources.append(cache)
+
+    def count(self, rows=None, cache_hits=0, cache_misses=0):
+        """Add rows processed and cache hits / misses to the running stage (no-op outside one)"""
+        record = getattr(self._local, 'record', None)
+        if record is None:
+            return
+        if rows is not None:
+            record['rows'] = (record['rows'] or 0) + int(rows)
+        record['cache_hits'] += cache_hits
+        record['cache_misses'] += cache_misses
+
+    @contextmanager
+    def stage(self, name):
+        """Instrument the enclosed block as stage `name`"""
+        record = {'run_id': self.run_id, 'pipeline': self.pipeline, 'stage': name, 'status': 'ok',
+                  'started': time.time(), 'rows': None, 'cache_hits': 0, 'cache_misses': 0, 'profile_path': None,
+                  'overlapped': False}
+        with self._lock:
+            for other in self._active.values():
+                other['overlapped'] = True
+            record['overlapped'] = bool(self._active)
+            self._active[id(record)] = record
+        counters = [(cache.hits, cache.misses) for cache in self._sources]
+        profiler = SamplingProfiler(self.sample_interval).start() if name in self.sample_stages else None
+        self._local.record = record
+        reset_peak_rss()
+        wall, cpu, thread_cpu = time.perf_counter(), _cpu_time(), time.thread_time()
+        try:
+            yield record
+        except BaseException:
+            record['status'] = 'error'
+            raise
+        finally:
+            record['wall_seconds'] = time.perf_counter() - wall
+            self._local.record = None
+            with self._lock:
+                del self._active[id(record)]
+            if record['overlapped']:
+                record['cpu_seconds'] = time.thread_time() - thread_cpu
+                record['peak_rss_bytes'] = record['cache_hits'] = record['cache_misses'] = None
+            else:
+                record['cpu_seconds'] = _cpu_time() - cpu
+                record['peak_rss_bytes'] = peak_rss()
+                for cache, (hits, misses) in zip(self._sources, counters):
+                    record['cache_hits'] += cache.hits - hits
+                    record['cache_misses'] += cache.misses - misses
+            if profiler is not None:
+                profiler.stop()
+                record['profile_path'] = os.path.join(self.profile_dir, f"{self.run_id}-{self.pipeline}-{name}.folded")
+                profiler.write(record['profile_path'])
+                self.profiles[name] = profiler
+            self._emit(record)
+
+    def _emit(self, record):
+        with self._lock:
+            self.records.append(record)
+            self._unsaved.append(record)
+            if self.log_path:
+                with open(self.log_path, 'a') as f:
+                    f.write(json.dumps({name: record[name] for name, _ in METRIC_COLUMNS}) + '\n')
+
+    def flush(self):
+        """Insert the records not yet saved into the `stage_metrics` table of `db_path`"""
+        if not self.db_path or not self._unsaved:
+            return
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {METRICS_TABLE} "
+                             f"({', '.join(f'{name} {kind}' for name, kind in METRIC_COLUMNS)})")
+                conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{METRICS_TABLE}_stage "
+                             f"ON {METRICS_TABLE} (pipeline, stage, started)")
+                conn.executemany(f"INSERT INTO {METRICS_TABLE} VALUES ({', '.join('?' * len(METRIC_COLUMNS))})",
+                                 [[record[name] for name, _ in METRIC_COLUMNS] for record in self._unsaved])
+        finally:
+            conn.close()
+        self._unsaved = []
+
+    def report(self):
+        """One line per recorded stage: time, CPU, peak RSS, rows and cache hits"""
+        lines = [f"{'Stage':<26}{'Wall s':>9}{'CPU s':>9}{'Peak MB':>10}{'Rows':>11}{'Cache':>9}"]
+        for record in self.records:
+            rss = record['peak_rss_bytes']
+            rows = record['rows']
+            cache = '-' if record['cache_hits'] is None else f"{record['cache_hits']:>4}/{record['cache_misses']:<4}"
+            lines.append(f"{record['stage']:<26}{record['wall_seconds']:>9.3f}{record['cpu_seconds']:>8.3f}"
+                         f"{'*' if record['overlapped'] else ' '}"
+                         f"{'-' if rss is None else f'{rss / (1 << 20):.0f}':>10}"
+                         f"{'-' if rows is None else rows:>11}{cache:>9}")
+            profiler = self.profiles.get(record['stage'])
+            if profiler is not None:
+                for function, share in profiler.top(5):
+                    lines.append(f"    {share:6.1%}  {function}")
+        if any(record['overlapped'] for record in self.records):
+            lines.append("* ran alongside other stages: CPU of the stage's own thread, peak RSS and cache "
+                         "counts not attributable")
+        return '\n'.join(lines)
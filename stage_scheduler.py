@@ -0,0 +1,248 @@
+import glob
+import hashlib
+import io
+import os
+import pickle
+import sys
+import threading
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from data_cache import CACHE_DIR, file_digest, source_digest
+
+# Bump when fingerprints or cached payloads change meaning, so every stage reruns
+SCHEDULER_VERSION = 1
+
+# name: stage name; run: zero-argument step; inputs: names of sources and of
+# earlier stages it reads; params: values that change its results;
+# outputs: attributes of the pipeline object it sets for later stages;
+# cacheable: False for stages that only materialize in-memory state (loading),
+# which run whenever a stage that needs them runs; thread_safe: False for
+# stages that must run on the main thread (matplotlib);
+# products: files it writes, which must still exist for it to be skipped
+Stage = namedtuple('Stage', ['name', 'run', 'inputs', 'params', 'outputs', 'cacheable', 'thread_safe', 'products'],
+                   defaults=[(), (), True, True, ()])
+
+
+def code_fingerprint(directory=None):
+    """Digest of every Python module of the project; any code change reruns every stage"""
+    directory = directory or os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(SCHEDULER_VERSION).encode())
+    for path in sorted(glob.glob(os.path.join(directory, '*.py'))):
+        digest.update(os.path.basename(path).encode() + file_digest(path).encode())
+    return digest.hexdigest()
+
+
+def source_fingerprint(paths, options=None, cache_dir=CACHE_DIR):
+    """
+    Digest of the contents of input files plus the loading options that change
+    what is read. File hashes are reused from `cache_dir` while a file's size
+    and mtime are unchanged (see `source_digest`).
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        content = source_digest(path, cache_dir) if os.path.exists(path) else 'missing'
+        digest.update(path.encode() + b'\0' + content.encode())
+    digest.update(repr(sorted((options or {}).items())).encode())
+    return digest.hexdigest()
+
+
+class StageCache:
+    """Stage fingerprints and cached outputs in one pickle file (the database keeps them in `stage_cache`)"""
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path, 'rb') as f:
+                self.entries = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            self.entries = {}
+        self._dirty = False
+
+    def stage_entry(self, name):
+        entry = self.entries.get(name)
+        return (entry[0], pickle.loads(entry[1])) if entry else None
+
+    def record_stage(self, name, fingerprint, payload):
+        self.entries[name] = (fingerprint, pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+        self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path + '.tmp', 'wb') as f:
+            pickle.dump(self.entries, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(self.path + '.tmp', self.path)
+        self._dirty = False
+
+
+class _StageOutput(io.TextIOBase):
+    """stdout stand-in that sends each stage thread's prints to that stage's buffer"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self.local, 'buffer', None)
+        return (buffer if buffer is not None else self.stream).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+class StageScheduler:
+    """
+    Runs a pipeline declared as a DAG of `Stage`s.
+
+    Every stage gets a fingerprint from the code, its parameters and the
+    fingerprints of its inputs (the `sources` digests or upstream stages).
+    A stage whose fingerprint matches its cache entry is skipped: its printed
+    output is replayed and its `outputs` attributes are restored from the
+    entry. The remaining stages run as soon as their inputs are done, up to
+    `workers` at a time on a thread pool; their prints are captured per
+    stage and written in declaration order, so the output reads as if the
+    stages had run one after the other. `metrics` (a StageMetrics)
+    instruments each stage; skipped stages are recorded as 'cached'.
+    """
+
+    def __init__(self, stages, owner, sources, cache=None, workers=None, metrics=None):
+        self.stages = list(stages)
+        self.by_name = {stage.name: stage for stage in self.stages}
+        self.owner = owner
+        self.sources = sources
+        self.cache = cache
+        self.workers = workers
+        self.metrics = metrics
+        self.status = {}
+        known = set(sources)
+        for stage in self.stages:
+            missing = [name for name in stage.inputs if name not in known]
+            if missing:
+                raise ValueError(f"Stage {stage.name!r} reads {missing}, which no earlier stage or source provides")
+            known.add(stage.name)
+
+    def fingerprints(self):
+        """Fingerprint of every stage, in declaration order"""
+        code = code_fingerprint()
+        prints = dict(self.sources)
+        for stage in self.stages:
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(f"{code}\0{stage.name}\0{list(stage.params)!r}".encode())
+            for name in stage.inputs:
+                digest.update(prints[name].encode())
+            prints[stage.name] = digest.hexdigest()
+        return {stage.name: prints[stage.name] for stage in self.stages}
+
+    def plan(self):
+        """(fingerprints, cache entries of the stages that can be skipped, names of the stages to run)"""
+        fingerprints = self.fingerprints()
+        entries = {}
+        for stage in self.stages:
+            entry = self.cache.stage_entry(stage.name) if self.cache is not None else None
+            if entry and entry[0] == fingerprints[stage.name] and all(os.path.exists(p) for p in stage.products):
+                entries[stage.name] = entry[1]
+        run = {stage.name for stage in self.stages if stage.name not in entries}
+        # Loading stages keep no outputs, so they run whenever a stage that reads them runs
+        for stage in reversed(self.stages):
+            if stage.name in run:
+                for name in stage.inputs:
+                    upstream = self.by_name.get(name)
+                    if upstream is not None and not upstream.cacheable:
+                        run.add(name)
+        return fingerprints, entries, run
+
+    def run(self):
+        """Run or skip every stage; False if a stage returned False (its dependents are not run)"""
+        fingerprints, entries, run = self.plan()
+        texts = {}
+        for stage in self.stages:
+            if stage.name not in run:
+                for name, value in entries[stage.name]['outputs'].items():
+                    setattr(self.owner, name, value)
+                texts[stage.name] = entries[stage.name]['text']
+                self.status[stage.name] = 'cached'
+                if self.metrics is not None:
+                    with self.metrics.stage(stage.name) as record:
+                        record['status'] = 'cached'
+
+        output = _StageOutput(sys.stdout)
+        stdout, sys.stdout = sys.stdout, output
+        printed = 0
+        running = {}
+        try:
+            workers = self.workers or min(len(run), os.cpu_count() or 1) or 1
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                while True:
+                    for stage in self._ready(run, running):
+                        if stage.thread_safe and workers > 1:
+                            running[pool.submit(self._execute, stage, output)] = stage
+                        else:
+                            self._finish(stage, self._execute(stage, output), fingerprints, texts)
+                    printed = self._emit(texts, printed, stdout)
+                    if not running:
+                        if not self._ready(run, running):
+                            break
+                        continue
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._finish(running.pop(future), future.result(), fingerprints, texts)
+        finally:
+            sys.stdout = stdout
+            # Whatever was printed before a failure is still shown
+            for stage in self.stages[printed:]:
+                if stage.name in texts:
+                    stdout.write(texts[stage.name])
+        if hasattr(self.cache, 'save'):
+            self.cache.save()
+        return all(status != 'failed' for status in self.status.values())
+
+    def _ready(self, run, running):
+        started = set(self.status) | {stage.name for stage in running.values()}
+        ready = []
+        for stage in self.stages:
+            if stage.name in started or stage.name not in run:
+                continue
+            states = [self.status.get(name) for name in stage.inputs if name in self.by_name]
+            if any(state in ('failed', 'blocked') for state in states):
+                self.status[stage.name] = 'blocked'
+            elif all(state in ('done', 'cached') for state in states):
+                ready.append(stage)
+        return ready
+
+    def _execute(self, stage, output):
+        buffer = io.StringIO()
+        output.local.buffer = buffer
+        try:
+            if self.metrics is not None:
+                with self.metrics.stage(stage.name):
+                    result = stage.run()
+            else:
+                result = stage.run()
+        except BaseException:
+            self.status[stage.name] = 'failed'
+            output.stream.write(buffer.getvalue())
+            raise
+        finally:
+            output.local.buffer = None
+        return result, buffer.getvalue()
+
+    def _finish(self, stage, outcome, fingerprints, texts):
+        result, text = outcome
+        texts[stage.name] = text
+        if result is False:
+            self.status[stage.name] = 'failed'
+            return
+        self.status[stage.name] = 'done'
+        if self.cache is not None:
+            outputs = {name: getattr(self.owner, name) for name in stage.outputs} if stage.cacheable else {}
+            self.cache.record_stage(stage.name, fingerprints[stage.name], {'text': text, 'outputs': outputs})
+
+    def _emit(self, texts, printed, stream):
+        """Write the captured output of finished stages that precede every unfinished one"""
+        while printed < len(self.stages) and self.stages[printed].name in texts:
+            stream.write(texts[self.stages[printed].name])
+            printed += 1
+        return printed
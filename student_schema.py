@@ -0,0 +1,206 @@
+import numpy as np
+import pandas as pd
+
+from data_ingestion import POST_COLUMNS, PRE_COLUMNS, STUDENT_DTYPES, VR_COLUMNS
+
+# Domains of data_sources_specification.markdown, inclusive
+STUDENT_DOMAINS = {
+    'Age': (6, 12),
+    'Grade_Level': (1, 6),
+    **{col: (0, 100) for col in PRE_COLUMNS + POST_COLUMNS},
+    **{col: (1, 5) for col in VR_COLUMNS}
+}
+GENDER_LEVELS = ['Female', 'Male', 'Other']
+RANGED_COLUMNS = list(STUDENT_DOMAINS)
+
+# Numbers are parsed as float64 first, so blanks, decimals and values outside
+# the compact dtypes reach validation instead of failing the parse
+PARSE_DTYPES = {**STUDENT_DTYPES, **{col: 'float64' for col in RANGED_COLUMNS}}
+# Fallback when a numeric column holds text, which the float parser rejects;
+# validation then converts the columns and reports the text
+TEXT_DTYPES = {**STUDENT_DTYPES, **{col: 'string' for col in RANGED_COLUMNS}}
+
+# Offending rows listed per rule and column in a report
+REPORT_EXAMPLES = 3
+
+
+def expected_grade(age):
+    """Grade of an age under the spec's mapping: 6-year-olds in grade 1, 11- and 12-year-olds in grade 6"""
+    return np.clip(age - 5, 1, 6)
+
+
+def parse_student_csv(open_source, chunksize=None, names=None):
+    """
+    Yield the raw chunks of a student CSV typed with PARSE_DTYPES (one frame
+    if `chunksize` is None). `open_source()` returns the path or a fresh file
+    object at the first row; with `names` the source has no header line. If a
+    numeric column holds text, the rest of the file is re-read from the
+    first unparsed row with those columns as strings (TEXT_DTYPES).
+    """
+    header = 0 if names is None else None
+    done = 0
+    try:
+        if chunksize is None:
+            yield pd.read_csv(open_source(), names=names, header=header, dtype=PARSE_DTYPES)
+            return
+        with pd.read_csv(open_source(), names=names, header=header, dtype=PARSE_DTYPES,
+                         chunksize=chunksize) as reader:
+            for chunk in reader:
+                done += len(chunk)
+                yield chunk
+    except ValueError:
+        skip = range(1, done + 1) if names is None else range(done)
+        frames = pd.read_csv(open_source(), names=names, header=header, dtype=TEXT_DTYPES, skiprows=skip,
+                             chunksize=chunksize)
+        if chunksize is None:
+            yield frames
+            return
+        with frames:
+            yield from frames
+
+
+class ValidationReport:
+    """
+    Rows checked and rejected at ingest, with the count and first few
+    offending lines of every (rule, column) violation. Reports of separate
+    files or runs merge by adding counts.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.rejected = 0
+        self.counts = {}
+        self.examples = {}
+
+    @property
+    def ok(self):
+        return self.rejected == 0
+
+    def add(self, rule, column, lines, ids, values):
+        key = (rule, column)
+        self.counts[key] = self.counts.get(key, 0) + len(lines)
+        shown = self.examples.setdefault(key, [])
+        for line, student, value in list(zip(lines, ids, values))[:REPORT_EXAMPLES - len(shown)]:
+            if pd.isna(value):
+                value = 'missing'
+            elif isinstance(value, float) and value.is_integer():
+                value = int(value)
+            shown.append(f"line {line} ({'no ID' if pd.isna(student) else student}): {value}")
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.rejected += other.rejected
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+            shown = self.examples.setdefault(key, [])
+            shown.extend(other.examples.get(key, [])[:REPORT_EXAMPLES - len(shown)])
+        return self
+
+    def to_frame(self):
+        """One row per (rule, column) with its row count and examples"""
+        rows = [(rule, column, count, '; '.join(self.examples.get((rule, column), [])))
+                for (rule, column), count in sorted(self.counts.items())]
+        frame = pd.DataFrame(rows, columns=['Rule', 'Column', 'Rows', 'Examples']).astype({'Rows': 'int64'})
+        return frame.set_index(['Rule', 'Column'])
+
+    def summary(self):
+        """Printable report: one line per violation"""
+        lines = [f"✗ {self.rejected} of {self.rows} student rows failed validation and were left out:"]
+        for (rule, column), count in sorted(self.counts.items()):
+            lines.append(f"  {rule:<20}{column:<28}{count:>8}  e.g. {', '.join(self.examples[(rule, column)])}")
+        return '\n'.join(lines)
+
+    def as_dict(self):
+        """JSON-compatible form, stored with cached inputs"""
+        return {'rows': self.rows, 'rejected': self.rejected,
+                'violations': [[rule, column, count, self.examples.get((rule, column), [])]
+                               for (rule, column), count in self.counts.items()]}
+
+    @classmethod
+    def from_dict(cls, data):
+        report = cls()
+        report.rows, report.rejected = data['rows'], data['rejected']
+        for rule, column, count, examples in data['violations']:
+            report.counts[(rule, column)] = count
+            report.examples[(rule, column)] = list(examples)
+        return report
+
+
+class StudentValidator:
+    """
+    Vectorized ingest checks of student chunks, in order of arrival.
+
+    Every chunk is checked in one pass over its numeric block: missing,
+    non-numeric, non-integer and out-of-domain values, unknown genders, missing and
+    duplicate Student_IDs (the first occurrence is kept) and grades that do
+    not match the age. Failing rows are left out and counted in `report`;
+    the rest is cast to the compact STUDENT_DTYPES. Student_IDs are
+    remembered as sorted 64-bit hashes (8 bytes per student), so duplicates
+    are found across chunks and, with a persisted validator, across runs.
+    """
+
+    def __init__(self):
+        self.report = ValidationReport()
+        self.seen = np.empty(0, dtype=np.uint64)
+
+    def validate(self, chunk):
+        missing_columns = [col for col in STUDENT_DTYPES if col not in chunk]
+        if missing_columns:
+            raise ValueError(f"student data lacks the columns {', '.join(missing_columns)}")
+        n = len(chunk)
+        lines = np.arange(n) + self.report.rows + 2  # line 1 is the header
+        ids = chunk['Student_ID']
+        rejected = np.zeros(n, dtype=bool)
+
+        def flag(rule, column, mask, values):
+            if mask.any():
+                self.report.add(rule, column, lines[mask], ids[mask], np.asarray(values)[mask])
+                rejected[mask] = True
+
+        text = [col for col in RANGED_COLUMNS if chunk[col].dtype != np.float64]
+        numbers = chunk[RANGED_COLUMNS].assign(**{col: pd.to_numeric(chunk[col], errors='coerce') for col in text})
+        values = numbers.to_numpy(dtype=np.float64)
+        lows, highs = np.array(list(STUDENT_DOMAINS.values()), dtype=np.float64).T
+        known = ~np.isnan(values)
+        missing = ~known
+        for col in text:
+            unparsed = (chunk[col].notna() & numbers[col].isna()).to_numpy()
+            flag('not_numeric', col, unparsed, chunk[col])
+            missing[:, RANGED_COLUMNS.index(col)] &= ~unparsed
+        with np.errstate(invalid='ignore'):
+            fractional = known & (values % 1 != 0)
+            outside = known & ~fractional & ((values < lows) | (values > highs))
+        for rule, matrix in [('missing', missing), ('not_integer', fractional), ('out_of_range', outside)]:
+            for i in np.flatnonzero(matrix.any(axis=0)):
+                flag(rule, RANGED_COLUMNS[i], matrix[:, i], values[:, i])
+
+        gender = chunk['Gender']
+        flag('missing', 'Gender', gender.isna().to_numpy(), gender)
+        flag('unknown_category', 'Gender', (gender.notna() & ~gender.isin(GENDER_LEVELS)).to_numpy(), gender)
+
+        absent = ids.isna().to_numpy()
+        flag('missing', 'Student_ID', absent, ids)
+        hashes = pd.util.hash_pandas_object(ids, index=False).to_numpy()
+        position = np.searchsorted(self.seen, hashes).clip(max=max(len(self.seen) - 1, 0))
+        earlier = self.seen[position] == hashes if len(self.seen) else np.zeros(n, dtype=bool)
+        duplicate = ~absent & (earlier | ids.duplicated().to_numpy())
+        flag('duplicate_id', 'Student_ID', duplicate, ids)
+        new = np.sort(hashes[~absent & ~duplicate])
+        # Two sorted runs: the stable sort merges them in linear time
+        self.seen = np.sort(np.concatenate([self.seen, new]), kind='stable')
+
+        # Only ages and grades that are themselves valid are compared
+        a, g = RANGED_COLUMNS.index('Age'), RANGED_COLUMNS.index('Grade_Level')
+        valid = known & ~fractional & ~outside
+        flag('age_grade_mismatch', 'Grade_Level',
+             valid[:, a] & valid[:, g] & (values[:, g] != expected_grade(values[:, a])), values[:, g])
+
+        self.report.rows += n
+        self.report.rejected += int(rejected.sum())
+        if text:
+            chunk = chunk.assign(**{col: numbers[col] for col in text})
+        if rejected.any():
+            chunk = chunk[~rejected]
+            if isinstance(chunk['Gender'].dtype, pd.CategoricalDtype):
+                chunk = chunk.assign(Gender=chunk['Gender'].cat.remove_unused_categories())
+        return chunk.astype({col: STUDENT_DTYPES[col] for col in chunk.columns if col in STUDENT_DTYPES})
@@ -0,0 +1,177 @@
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from data_ingestion import GAIN_COLUMNS, VR_COLUMNS
+from exact_sums import integer_values, means, variances
+
+CUBE_DIMENSIONS = ['Gender', 'Grade_Level', 'Age']
+CUBE_MEASURES = GAIN_COLUMNS + VR_COLUMNS
+
+# Age groups of the subgroup report: (6, 7], (7, 8], ... (12, 13]
+AGE_BINS = range(6, 14)
+
+
+def grouping_sets(dimensions):
+    """Every subset of `dimensions`, from the grand total to the finest grouping"""
+    return [list(keys) for size in range(len(dimensions) + 1) for keys in combinations(dimensions, size)]
+
+
+class SubgroupCube:
+    """
+    Count, sum and sum of squares of every measure over all combinations of
+    the grouping dimensions, from one scan of the rows.
+
+    Each update factorizes every dimension once, packs the codes of a row
+    into one finest-cell code and reduces [present, x, x^2] of all measures
+    per cell with a single `np.add.reduceat` over the rows sorted by cell.
+    Every coarser grouping (Gender, Gender x Grade_Level, age groups, ...) is
+    then rolled up from the small finest-cell table instead of the rows.
+    Sums are exact integers, as in `PairedTestAccumulator`, so cubes of
+    separate chunks, files or saved states merge by adding aligned cells. Missing keys form their own cell
+    and are dropped only from groupings on that key, like `groupby`.
+    """
+
+    def __init__(self, dimensions=None, measures=None):
+        self.dimensions = list(dimensions or CUBE_DIMENSIONS)
+        self.measures = list(measures or CUBE_MEASURES)
+        self.cells = None  # int64 DataFrame: finest cells x [count, n..., S1..., S2...]
+
+    def _columns(self):
+        return (['count'] + [f'{m}_n' for m in self.measures] + [f'{m}_s1' for m in self.measures]
+                + [f'{m}_s2' for m in self.measures])
+
+    def update(self, data):
+        """Fold a data frame (or chunk) into the cells"""
+        if len(data) == 0:
+            return self
+        codes, levels = [], []
+        for dim in self.dimensions:
+            code, level = pd.factorize(data[dim], use_na_sentinel=False)
+            codes.append(code)
+            levels.append(level)
+        packed = np.ravel_multi_index(codes, [max(len(level), 1) for level in levels])
+        cells, inverse = np.unique(packed, return_inverse=True)
+
+        values = data[self.measures].to_numpy(dtype=np.float64)
+        present = ~np.isnan(values)
+        values = integer_values(np.where(present, values, 0))
+        block = np.hstack([np.ones((len(data), 1), dtype=np.int64), present, values, values * values])
+
+        order = np.argsort(inverse, kind='stable')
+        starts = np.flatnonzero(np.r_[True, np.diff(inverse[order]) != 0])
+        totals = np.add.reduceat(block[order], starts, axis=0)
+
+        cell_codes = np.unravel_index(cells, [max(len(level), 1) for level in levels])
+        index = pd.MultiIndex.from_arrays([np.asarray(level)[code] for level, code in zip(levels, cell_codes)],
+                                          names=self.dimensions)
+        return self._add(pd.DataFrame(totals, index=index, columns=self._columns()))
+
+    def merge(self, other):
+        """Fold another cube over the same dimensions and measures into this one"""
+        if other.cells is not None:
+            self._add(other.cells)
+        return self
+
+    def _add(self, cells):
+        if self.cells is None:
+            self.cells = cells.copy()
+        else:
+            self.cells = self.cells.add(cells, fill_value=0).astype(np.int64)
+        return self
+
+    def rollup(self, keys=(), bins=None):
+        """
+        Summed cells grouped by `keys` (all rows for no keys); `bins` maps a
+        key to `pd.cut` bins, so e.g. {'Age': AGE_BINS} groups by age group.
+        """
+        keys = list(keys)
+        if not keys:
+            return self.cells.sum().to_frame('All').T.rename_axis('Group')
+        groupers = []
+        for key in keys:
+            labels = self.cells.index.get_level_values(key).to_series(index=self.cells.index)
+            if bins and key in bins:
+                labels = pd.cut(labels, bins=bins[key])
+            groupers.append(labels.rename(key))
+        return self.cells.groupby(groupers, observed=True, sort=True).sum()
+
+    def statistics(self, keys=(), measures=None, bins=None):
+        """n, mean and SD of every measure per group of `keys`"""
+        measures = measures or self.measures
+        sums = self.rollup(keys, bins)
+        table = {}
+        for m in measures:
+            n, s1, s2 = (sums[f'{m}{suffix}'].to_numpy() for suffix in ('_n', '_s1', '_s2'))
+            table[f'{m}_n'] = n
+            table[f'{m}_mean'] = means(n, s1)
+            table[f'{m}_sd'] = np.sqrt(variances(n, s1, s2))
+        return pd.DataFrame(table, index=sums.index)
+
+    def means(self, keys, measures=None, bins=None):
+        """Per-group means of `measures` (the gains by default), one column per measure"""
+        measures = measures or GAIN_COLUMNS
+        stats = self.statistics(keys, measures, bins)
+        return stats[[f'{m}_mean' for m in measures]].set_axis(measures, axis=1)
+
+    def t_test(self, keys, measure, mu=0.0, bins=None):
+        """One-sample t-test of `measure` against `mu` per group (paired test for a gain column)"""
+        from scipy import stats
+        table = self.statistics(keys, [measure], bins).set_axis(['n', 'mean', 'sd'], axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            table['t_statistic'] = (table['mean'] - mu) / (table['sd'] / np.sqrt(table['n']))
+            table['p_value'] = 2 * stats.t.sf(np.abs(table['t_statistic']), table['n'] - 1)
+        return table
+
+    def welch_test(self, keys, measure, group_a, group_b, bins=None):
+        """Welch's t-test of `measure` between two groups of `keys`; returns (t, p)"""
+        from scipy import stats
+        table = self.statistics(keys, [measure], bins).set_axis(['n', 'mean', 'sd'], axis=1)
+        a, b = table.loc[group_a], table.loc[group_b]
+        va, vb = a['sd'] ** 2 / a['n'], b['sd'] ** 2 / b['n']
+        t = (a['mean'] - b['mean']) / np.sqrt(va + vb)
+        df = (va + vb) ** 2 / (va ** 2 / (a['n'] - 1) + vb ** 2 / (b['n'] - 1))
+        return t, 2 * stats.t.sf(abs(t), df)
+
+    # Storage
+
+    def table(self, sets=None):
+        """
+        Raw count, sum and sum of squares of every measure for every grouping
+        set, one row per group, indexed by (Grouping, dimensions...). Keys
+        rolled up in a grouping set are NULL, so SQL can answer any subgroup
+        mean, SD or t-test from the stored rows alone.
+        """
+        sets = grouping_sets(self.dimensions) if sets is None else sets
+        frames = []
+        for keys in sets:
+            sums = self.rollup(keys)
+            frame = pd.DataFrame(sums.to_numpy(), columns=[col.replace('_s1', '_sum').replace('_s2', '_sumsq')
+                                                           for col in self._columns()])
+            for dim in self.dimensions:
+                frame[dim] = sums.index.get_level_values(dim) if dim in keys else None
+            frame['Grouping'] = ' x '.join(keys) or 'All'
+            frames.append(frame)
+        table = pd.concat(frames, ignore_index=True)
+        for dim in self.dimensions:
+            # Numeric keys stay numeric (INTEGER / REAL in SQLite) with NULL where rolled up
+            labels = table[dim].astype(object)
+            numeric = pd.to_numeric(labels, errors='coerce')
+            if numeric.notna().sum() == labels.notna().sum():
+                whole = numeric.dropna().mod(1).eq(0).all()
+                table[dim] = numeric.astype('Int64' if whole else 'Float64')
+            else:
+                table[dim] = labels
+        return table.set_index(['Grouping'] + self.dimensions)
+
+    @classmethod
+    def from_table(cls, table, dimensions=None, measures=None):
+        """Rebuild a cube from the finest grouping set of a stored `table()`"""
+        cube = cls(dimensions, measures)
+        finest = ' x '.join(cube.dimensions)
+        rows = table.reset_index()
+        rows = rows[rows['Grouping'] == finest].set_index(cube.dimensions)
+        columns = [col.replace('_s1', '_sum').replace('_s2', '_sumsq') for col in cube._columns()]
+        cube.cells = rows[columns].set_axis(cube._columns(), axis=1).round().astype(np.int64)
+        return cube
@@ -0,0 +1,272 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_ingestion import POST_COLUMNS, PRE_COLUMNS, STUDENT_DTYPES, VR_COLUMNS
+from transcript_nlp import CONCERN_LIMIT, CONCERN_THEMES
+
+# Rows generated per random stream, so a cohort depends only on its seed and
+# size, not on the chunk size it is read in
+GENERATOR_CHUNK = 1 << 20
+
+# Distributions of data_sources_specification.markdown, section 1.3
+AGE_RANGE = (6, 12)
+GENDER_SHARES = {'Male': 0.50, 'Female': 0.45, 'Other': 0.05}
+PRE_SCORE_RANGE = (20, 80)
+GAIN_RANGE = (10, 30)
+# Spread of each assessment's gain around the student's overall gain
+GAIN_SPREAD = 3
+REACTION_SHARES = {3: 0.15, 4: 0.50, 5: 0.35}
+
+# Interviewed students and educators per student (25 and 10 of the 100 in the spec)
+STUDENT_INTERVIEW_RATE = 0.25
+EDUCATOR_INTERVIEW_RATE = 0.10
+
+# Transcript sentences per theme, worded as students and educators talk rather
+# than after the codebook's keywords; Key_Themes records the theme each one
+# expresses. Codebook agreement is measured on CODEBOOK_VALIDATION, not on these.
+STUDENT_SENTENCES = {
+    'immersive experience': ["It was like walking into a town where everybody signs.",
+                             "I forgot I was standing in the classroom."],
+    'gamification': ["I kept going because I wanted to get all the stars.",
+                     "Getting a sticker at the end of each lesson was the best part."],
+    'instant feedback': ["When my hands were wrong it showed me straight away how to fix them.",
+                         "A little bell told me when I got a sign right."],
+    'confidence building': ["I am not scared to sign with grown-ups anymore.",
+                            "I showed my class a whole sentence and nobody laughed."],
+    'social interaction': ["My friends and I met in the VR room and signed to each other.",
+                           "The characters in there talked back to me with signs."],
+    'repetitive practice': ["I could do the hard lessons again and again until I got them."],
+    'contextual learning': ["We learned how to ask for things at the shop and at the library."],
+    'self-paced learning': ["Nobody hurried me, I could go slow on the tricky words."],
+    'visual clarity': ["I could walk around the signer and see the hands from every side."],
+    'progress and retention': ["I still know the animal signs from the first week.",
+                               "I learned way more signs than last year."],
+    'teacher support': ["The helper in the program was patient with me."],
+    'controller difficulty': ["The things you hold in your hands were hard to use."],
+    'headset comfort': ["The goggles pushed on my face."],
+    'fatigue and discomfort': ["Sometimes my head felt funny and I had to stop for a while."],
+    'technical issues': ["Sometimes the screen stopped and we had to start again."],
+    'need for assistance': ["A grown-up had to put it on me every time."],
+}
+STUDENT_OPENERS = (["The VR was really cool!", "I loved using the VR headset!", "VR sign language learning was amazing!"],
+                   ["The VR was okay.", "The VR lessons were fine most of the time."])
+STUDENT_CLOSERS = ["I want to use it more!", "I hope we can keep using it.", "It was still helpful for learning signs."]
+
+EDUCATOR_SENTENCES = {
+    'instant feedback': ["Students see at once when a handshape is off and adjust it on the spot."],
+    'confidence building': ["Students who used to hold back now sign outside class."],
+    'teacher support': ["Our staff needed proper preparation before running sessions."],
+    'contextual learning': ["Students practise ordering food and asking for directions in realistic settings."],
+    'repetitive practice': ["Students can go over difficult signs until they master them."],
+    'progress and retention': ["Vocabulary scores have risen steadily over the term."],
+    'self-paced learning': ["Each student moves through the lessons at a speed that suits them."],
+    'social interaction': ["Shy students now join in with their peers."],
+    'headset comfort': ["Fitting the headsets to younger students took time."],
+    'technical issues': ["We had some trouble getting the software to run reliably."],
+    'controller difficulty': ["Some younger students struggled with the hand units."],
+}
+EDUCATOR_OPENERS = (["The VR sign language application has been valuable for our students.",
+                     "I was skeptical at first, but the program has worked well."],
+                    ["The program has had mixed results so far."])
+EDUCATOR_CLOSERS = ["It requires proper support and training for educators.",
+                    "I would recommend expanding it to more classrooms."]
+EDUCATOR_ROLES = ['Deaf Education Teacher', 'Special Education Coordinator', 'Sign Language Instructor',
+                  'Technology Integration Specialist', 'Principal', 'Educational Therapist', 'Curriculum Developer',
+                  'Parent Liaison Coordinator', 'School Psychologist', 'Assistant Principal']
+VR_FAMILIARITY = ['Low', 'Moderate', 'High', 'Expert']
+PROFESSIONAL_ASSESSMENTS = ['Highly Effective with Proper Support', 'Positive ROI with Expansion Potential',
+                            'Technically Sound and Scalable', 'Valuable for Diverse Learning Needs',
+                            'Successful Implementation with Operational Challenges',
+                            'Positive Psychological Impact with Minor Concerns']
+
+# Concern themes are mentioned less often than benefits
+CONCERN_WEIGHT = 0.25
+
+STUDENT_METADATA = {
+    'description': 'Synthetic semi-structured interview data from a subset of students',
+    'interview_duration_range': '15-20 minutes',
+    'linkage': 'Tied to Student_ID for integration with CSV data'
+}
+EDUCATOR_METADATA = {
+    'description': 'Synthetic in-depth interview data from educators involved in VR sign language program',
+    'interview_duration_range': '30-45 minutes'
+}
+
+
+def _rng(seed, *stream):
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=stream))
+
+
+def _student_ids(numbers, width):
+    return pd.Series(numbers + 1).astype(str).str.zfill(width).radd('S')
+
+
+def _id_width(n):
+    return max(3, len(str(n)))
+
+
+def student_chunks(n, seed=0, chunksize=GENERATOR_CHUNK):
+    """Yield a spec-conforming cohort of `n` students as data frames of at most `chunksize` rows"""
+    width = _id_width(n)
+    for start in range(0, n, GENERATOR_CHUNK):
+        stop = min(start + GENERATOR_CHUNK, n)
+        chunk = _student_block(_rng(seed, 0, start // GENERATOR_CHUNK), start, stop - start, width)
+        for offset in range(0, len(chunk), chunksize):
+            yield chunk.iloc[offset:offset + chunksize]
+
+
+def _student_block(rng, start, size, width):
+    age = rng.integers(AGE_RANGE[0], AGE_RANGE[1] + 1, size)
+    columns = {
+        'Student_ID': _student_ids(np.arange(start, start + size), width).to_numpy(),
+        'Age': age,
+        'Gender': rng.choice(list(GENDER_SHARES), size, p=list(GENDER_SHARES.values())),
+        # 6-year-olds are in grade 1, 11- and 12-year-olds in grade 6
+        'Grade_Level': np.minimum(age - 5, 6)
+    }
+    pre = rng.integers(PRE_SCORE_RANGE[0], PRE_SCORE_RANGE[1] + 1, (size, len(PRE_COLUMNS)))
+    overall = rng.integers(GAIN_RANGE[0], GAIN_RANGE[1] + 1, (size, 1))
+    gains = np.clip(overall + rng.integers(-GAIN_SPREAD, GAIN_SPREAD + 1, pre.shape), *GAIN_RANGE)
+    post = np.minimum(pre + gains, 100)
+    columns.update(zip(PRE_COLUMNS, pre.T))
+    columns.update(zip(POST_COLUMNS, post.T))
+    reactions = rng.choice(list(REACTION_SHARES), (size, len(VR_COLUMNS)), p=list(REACTION_SHARES.values()))
+    columns.update(zip(VR_COLUMNS, reactions.T))
+    frame = pd.DataFrame(columns, index=pd.RangeIndex(start, start + size))
+    return frame.astype({col: STUDENT_DTYPES[col] for col in frame.columns})
+
+
+def generate_students(n, seed=0):
+    """Data frame of a spec-conforming cohort of `n` students"""
+    return pd.concat(list(student_chunks(n, seed)))
+
+
+def write_student_csv(path, n, seed=0):
+    """Write a cohort of `n` students to `path` chunk by chunk"""
+    for i, chunk in enumerate(student_chunks(n, seed)):
+        chunk.to_csv(path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+    if n == 0:
+        pd.DataFrame(columns=list(STUDENT_DTYPES)).to_csv(path, index=False)
+
+
+def _compose(rng, size, sentences, openers, closers, themes_range):
+    """
+    Transcripts, coded themes and coded sentiment of `size` interviews.
+
+    Themes are drawn without replacement with concern themes down-weighted
+    (one sort of exponential keys for the whole batch); every theme adds one
+    of its sentences between an opener and a closer.
+    """
+    names = list(sentences)
+    weights = np.array([CONCERN_WEIGHT if name in CONCERN_THEMES else 1.0 for name in names])
+    order = np.argsort(rng.exponential(size=(size, len(names))) / weights, axis=1)
+    counts = rng.integers(themes_range[0], themes_range[1] + 1, size)
+    variants = rng.integers(0, 1 << 16, order.shape)
+    neutral = rng.random(size) < 0.2
+    opener = rng.integers(0, 1 << 16, size)
+    closer = rng.integers(0, len(closers), size)
+    concern = np.array([name in CONCERN_THEMES for name in names])[order]
+    concerns = (concern * (np.arange(len(names)) < counts[:, None])).sum(axis=1)
+    sentiment = np.where(concerns >= CONCERN_LIMIT, 'Neutral', 'Positive')
+    sentiment[neutral & (concerns >= CONCERN_LIMIT + 1)] = 'Negative'
+    sentiment[neutral & (concerns < CONCERN_LIMIT)] = 'Neutral'
+
+    transcripts, themes = [], []
+    for i in range(size):
+        chosen = [names[j] for j in order[i, :counts[i]]]
+        tone = openers[1] if neutral[i] else openers[0]
+        parts = [tone[opener[i] % len(tone)]]
+        parts.extend(sentences[name][variants[i, k] % len(sentences[name])] for k, name in enumerate(chosen))
+        parts.append(closers[closer[i]])
+        transcripts.append(' '.join(parts))
+        themes.append(chosen)
+    return transcripts, themes, sentiment
+
+
+def student_interview_batches(n_students, seed=0, rate=STUDENT_INTERVIEW_RATE, batch_size=GENERATOR_CHUNK):
+    """Yield lists of interview records for a random `rate` share of a cohort of `n_students`"""
+    selected = np.sort(_rng(seed, 1).choice(n_students, int(round(rate * n_students)), replace=False))
+    width = _id_width(n_students)
+    for batch, start in enumerate(range(0, len(selected), batch_size)):
+        rng = _rng(seed, 2, batch)
+        ids = _student_ids(selected[start:start + batch_size], width).tolist()
+        transcripts, themes, sentiment = _compose(rng, len(ids), STUDENT_SENTENCES, STUDENT_OPENERS,
+                                                  STUDENT_CLOSERS, (3, 5))
+        dates = (np.datetime64('2024-03-15') + rng.integers(0, 13, len(ids))).astype(str)
+        durations = rng.integers(14, 23, len(ids))
+        yield [{'Interview_ID': f'INT_{student_id}', 'Student_ID': student_id, 'Interview_Date': str(dates[i]),
+                'Interview_Duration': int(durations[i]), 'Transcript': transcripts[i], 'Key_Themes': themes[i],
+                'Sentiment_Score': str(sentiment[i])} for i, student_id in enumerate(ids)]
+
+
+def educator_interview_batches(n_students, seed=0, rate=EDUCATOR_INTERVIEW_RATE, batch_size=GENERATOR_CHUNK):
+    """Yield lists of educator interview records, `rate` educators per student"""
+    total = int(round(rate * n_students))
+    width = _id_width(total)
+    for batch, start in enumerate(range(0, total, batch_size)):
+        size = min(batch_size, total - start)
+        rng = _rng(seed, 3, batch)
+        transcripts, _, _ = _compose(rng, size, EDUCATOR_SENTENCES, EDUCATOR_OPENERS, EDUCATOR_CLOSERS, (4, 6))
+        roles = rng.integers(0, len(EDUCATOR_ROLES), size)
+        familiarity = rng.integers(0, len(VR_FAMILIARITY), size)
+        assessments = rng.integers(0, len(PROFESSIONAL_ASSESSMENTS), size)
+        experience = rng.integers(5, 21, size)
+        dates = (np.datetime64('2024-03-28') + rng.integers(0, 5, size)).astype(str)
+        durations = rng.integers(30, 46, size)
+        yield [{'Educator_ID': f'EDU_{start + i + 1:0{width}d}', 'Role': EDUCATOR_ROLES[roles[i]],
+                'Experience_Years': int(experience[i]), 'VR_Familiarity': VR_FAMILIARITY[familiarity[i]],
+                'Interview_Date': str(dates[i]), 'Interview_Duration': int(durations[i]),
+                'Transcript': transcripts[i], 'Professional_Assessment': PROFESSIONAL_ASSESSMENTS[assessments[i]]}
+               for i in range(size)]
+
+
+def write_interviews(path, batches, metadata):
+    """Write interview record batches as a {'metadata', 'interviews'} JSON document, one record per line"""
+    count = 0
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write('{"metadata": ' + json.dumps(metadata) + ',\n"interviews": [')
+        for batch in batches:
+            for record in batch:
+                f.write((',\n' if count else '\n') + json.dumps(record))
+                count += 1
+        f.write('\n]}\n')
+    os.replace(tmp_path, path)
+    return count
+
+
+def write_cohort(directory, n_students, seed=0, interview_rate=STUDENT_INTERVIEW_RATE,
+                 educator_rate=EDUCATOR_INTERVIEW_RATE):
+    """
+    Write student_data.csv, student_interview_data.json and
+    educator_interview_data.json for a synthetic cohort of `n_students`
+    into `directory`; returns the number of rows written to each file.
+    """
+    os.makedirs(directory, exist_ok=True)
+    write_student_csv(os.path.join(directory, 'student_data.csv'), n_students, seed)
+    students = write_interviews(os.path.join(directory, 'student_interview_data.json'),
+                                student_interview_batches(n_students, seed, interview_rate),
+                                {**STUDENT_METADATA, 'sample_size': int(round(interview_rate * n_students))})
+    educators = write_interviews(os.path.join(directory, 'educator_interview_data.json'),
+                                 educator_interview_batches(n_students, seed, educator_rate),
+                                 {**EDUCATOR_METADATA, 'sample_size': int(round(educator_rate * n_students))})
+    return {'student_data.csv': n_students, 'student_interview_data.json': students,
+            'educator_interview_data.json': educators}
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate a synthetic spec-conforming VR evaluation cohort")
+    parser.add_argument('directory', help="output directory for the CSV and the two interview files")
+    parser.add_argument('--students', type=int, default=100, help="cohort size")
+    parser.add_argument('--seed', type=int, default=0, help="random seed")
+    parser.add_argument('--interview-rate', type=float, default=STUDENT_INTERVIEW_RATE,
+                        help="share of students interviewed")
+    parser.add_argument('--educator-rate', type=float, default=EDUCATOR_INTERVIEW_RATE,
+                        help="educators interviewed per student")
+    args = parser.parse_args()
+    written = write_cohort(args.directory, args.students, args.seed, args.interview_rate, args.educator_rate)
+    for name, rows in written.items():
+        print(f"✓ {rows} rows written to {os.path.join(args.directory, name)}")
@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+
+from cohort_shards import map_reduce_shards
+from synthetic_cohort import generate_students
+
+
+@pytest.fixture
+def cohort(tmp_path):
+    students = generate_students(3_000, seed=3)
+    whole = tmp_path / 'all.csv'
+    students.to_csv(whole, index=False)
+    shards = []
+    for i, (start, stop) in enumerate([(0, 1_100), (1_100, 1_103), (1_103, 3_000)]):
+        path = tmp_path / 'parts' / f's{i}.csv'
+        path.parent.mkdir(exist_ok=True)
+        students.iloc[start:stop].to_csv(path, index=False)
+        shards.append(str(path))
+    return str(whole), shards
+
+
+def test_shard_tables_equal_single_file_tables(cohort):
+    whole, shards = cohort
+    single, _ = map_reduce_shards([whole], chunksize=700, cache_dir=None, workers=1)
+    combined, _ = map_reduce_shards(shards, chunksize=400, cache_dir=None, workers=1)
+    assert combined.rows == single.rows == 3_000
+    assert combined.duplicates == {}
+    expected, tables = single.tables(), combined.tables()
+    assert tables.keys() == expected.keys()
+    for name, table in tables.items():
+        pd.testing.assert_frame_equal(table, expected[name], check_exact=True, obj=name)
+
+
+def test_students_in_more_than_one_shard_are_reported(cohort, tmp_path):
+    _, shards = cohort
+    repeated = tmp_path / 'parts' / 's3.csv'
+    pd.read_csv(shards[0]).head(5).to_csv(repeated, index=False)
+    combined, _ = map_reduce_shards(shards + [str(repeated)], cache_dir=None, workers=1)
+    assert combined.duplicates == {'s3': 5}
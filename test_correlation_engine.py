@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from correlation_engine import PairwiseCorrelation, correlate, pairs_of
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(4)
+    base = rng.integers(0, 50, 2_000)
+    frame = pd.DataFrame({'a': base + rng.integers(0, 20, 2_000), 'b': base // 2 + rng.integers(0, 40, 2_000),
+                          'c': rng.integers(1, 6, 2_000)}).astype(np.float64)
+    frame.loc[rng.choice(2_000, 150, replace=False), 'b'] = np.nan
+    frame.loc[rng.choice(2_000, 90, replace=False), 'c'] = np.nan
+    return frame
+
+
+def test_chunked_pairs_match_dataframe_corr(frame):
+    table = correlate((frame.iloc[start:start + 300] for start in range(0, len(frame), 300)),
+                      pairs_of(['a', 'b', 'c']), spearman=True)
+    for (a, b), row in table.iterrows():
+        both = frame[[a, b]].dropna()
+        assert row['n'] == len(both)
+        assert np.isclose(row['r'], frame[a].corr(frame[b]), rtol=1e-12)
+        assert np.isclose(row['spearman_r'], frame[a].corr(frame[b], method='spearman'), rtol=1e-12)
+        assert np.isclose(row['p_value'], stats.pearsonr(both[a], both[b])[1], rtol=1e-8)
+
+
+def test_merged_accumulators_equal_one_pass(frame):
+    pairs = pairs_of(['a', 'b', 'c'])
+    merged = PairwiseCorrelation(pairs).update(frame.iloc[:777])
+    merged.merge(PairwiseCorrelation(pairs).update(frame.iloc[777:]))
+    single = PairwiseCorrelation(pairs).update(frame)
+    pd.testing.assert_frame_equal(merged.results(), single.results(), check_exact=True)
+    assert merged.corr('c', 'a') == single.corr('a', 'c')
+    with pytest.raises(KeyError):
+        PairwiseCorrelation([('a', 'b')]).update(frame).corr('a', 'c')
@@ -0,0 +1,23 @@
+import pandas as pd
+import pytest
+
+from data_cache import DataCache
+
+
+@pytest.mark.parametrize('dtype', [object, 'str', 'string'])
+def test_missing_strings_survive_the_cache(tmp_path, dtype):
+    csv = tmp_path / 'students.csv'
+    csv.write_text("Student_ID,Gender,Age\nS1,Female,7\nS2,,8\n,Male,9\n")
+    columns = {'Student_ID': dtype, 'Gender': dtype}
+    cache = DataCache(str(tmp_path / 'cache'))
+
+    def parse(path):
+        yield pd.read_csv(path, dtype=columns)
+
+    parsed = cache.read_frame(str(csv), parse)
+    cached = cache.read_frame(str(csv), parse)
+    assert cache.hits == 1
+    pd.testing.assert_frame_equal(cached, parsed)
+    assert cached['Gender'].isna().sum() == 1
+    chunks = list(cache.frame_chunks(str(csv), parse, chunksize=2))
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), parsed)
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+from matplotlib.cbook import boxplot_stats
+
+import figure_rendering
+from cohort_statistics import summarize_chunks
+from data_ingestion import POST_COLUMNS, PRE_COLUMNS, VR_COLUMNS
+from figure_rendering import _box_stats, _pre_post_payload, _satisfaction_scatter_payload
+
+
+def _chunks(n, size, seed=0):
+    rng = np.random.default_rng(seed)
+    for start in range(0, n, size):
+        rows = min(size, n - start)
+        chunk = pd.DataFrame({'Student_ID': [f'S{i:06d}' for i in range(start, start + rows)],
+                              'Age': rng.integers(6, 13, rows), 'Gender': rng.choice(['F', 'M'], rows),
+                              'Grade_Level': rng.integers(1, 7, rows)})
+        for pre, post in zip(PRE_COLUMNS, POST_COLUMNS):
+            chunk[pre] = rng.integers(10, 70, rows)
+            chunk[post] = chunk[pre] + rng.integers(0, 30, rows)
+        for col in VR_COLUMNS:
+            chunk[col] = rng.integers(1, 6, rows)
+        yield chunk
+
+
+def test_box_stats_from_counts_match_matplotlib():
+    rng = np.random.default_rng(1)
+    values = np.r_[rng.integers(20, 80, 500), [150, 150, 2]]
+    [expected] = boxplot_stats(values.astype(float))
+    box = _box_stats(pd.Series(values).value_counts(), 'Pre')
+    for key in ['mean', 'iqr', 'q1', 'med', 'q3', 'whislo', 'whishi', 'cilo', 'cihi']:
+        assert np.isclose(box[key], expected[key]), key
+    np.testing.assert_array_equal(box['fliers'], np.unique(expected['fliers']))
+
+
+def test_large_streamed_cohorts_are_binned_over_every_student(monkeypatch):
+    monkeypatch.setattr(figure_rendering, 'BINNED_ROWS', 2_000)
+    summary, sample = summarize_chunks(_chunks(5_000, 1_000), sample_size=500)
+    assert len(sample) < figure_rendering.BINNED_ROWS < summary.n
+    assert 'boxes' in _pre_post_payload(summary, sample)
+    grid = _satisfaction_scatter_payload(summary, sample)['grid']
+    assert grid['counts'].sum() == summary.n
@@ -0,0 +1,62 @@
+import pandas as pd
+import pytest
+
+from incremental_statistics import IncrementalStatistics
+from synthetic_cohort import generate_students
+
+TEST_GROUPS = [['Gender'], ['Grade_Level']]
+
+
+def _tables(state):
+    tables = {
+        'describe': state.summary.describe(),
+        'likert': state.summary.likert_counts(),
+        'correlations': state.summary.correlations.results(),
+        'cube': state.summary.cube.table()
+    }
+    for i, accumulator in enumerate(state.group_tests + state.group_reactions):
+        tables[f'group_{i}'] = accumulator.results()
+    return tables
+
+
+@pytest.fixture
+def students():
+    return generate_students(3_000, seed=5)
+
+
+def _assert_same(state, expected):
+    tables = _tables(state)
+    for name, table in _tables(expected).items():
+        pd.testing.assert_frame_equal(tables[name], table, check_exact=True, obj=name)
+
+
+def test_appended_batches_match_one_pass_over_the_file(students, tmp_path):
+    csv_file, state_file = str(tmp_path / 'students.csv'), str(tmp_path / 'state.pkl')
+    students.iloc[:2_000].to_csv(csv_file, index=False)
+    state = IncrementalStatistics.load(state_file, csv_file, TEST_GROUPS)
+    assert state.refresh(chunksize=300) == 2_000
+    state.save(state_file)
+
+    students.iloc[2_000:].to_csv(csv_file, mode='a', header=False, index=False)
+    state = IncrementalStatistics.load(state_file, csv_file, TEST_GROUPS)
+    assert state.refresh(chunksize=300) == 1_000
+    assert state.refresh(chunksize=300) == 0
+
+    expected = IncrementalStatistics(csv_file, TEST_GROUPS)
+    assert expected.refresh(chunksize=1_000) == 3_000
+    assert state.rows == expected.rows == 3_000
+    _assert_same(state, expected)
+
+
+def test_rewritten_prefix_rebuilds_the_state(students, tmp_path):
+    csv_file = str(tmp_path / 'students.csv')
+    students.iloc[:2_000].to_csv(csv_file, index=False)
+    state = IncrementalStatistics(csv_file, TEST_GROUPS)
+    state.refresh()
+
+    # Same size, different rows: the anchor hash no longer matches
+    students.iloc[1_000:3_000].to_csv(csv_file, index=False)
+    assert state.refresh() == 2_000
+    expected = IncrementalStatistics(csv_file, TEST_GROUPS)
+    expected.refresh()
+    _assert_same(state, expected)
@@ -0,0 +1,20 @@
+import numpy as np
+import pandas as pd
+
+from data_ingestion import VR_COLUMNS
+from likert_histograms import LikertHistogram, likert_histogram
+
+
+def test_missing_group_key_rows_are_left_out():
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({col: rng.integers(1, 6, 10) for col in VR_COLUMNS})
+    data['Gender'] = rng.choice(['Female', 'Male'], 10)
+    data.loc[[2, 5], 'Gender'] = np.nan
+    results = LikertHistogram(by='Gender').update(data).results()
+    expected = LikertHistogram(by='Gender').update(data.dropna(subset=['Gender'])).results()
+    pd.testing.assert_frame_equal(results, expected)
+
+
+def test_nan_codes_are_not_counted():
+    counts = likert_histogram([[1], [2], [3]], [0.0, np.nan, -1.0], n_groups=1)
+    assert counts.tolist() == [[[1, 0, 0, 0, 0]]]
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from data_ingestion import ASSESSMENT_PAIRS
+from paired_tests import PairedTestAccumulator
+
+
+def _students(n=12, seed=0):
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({'Gender': rng.choice(['Female', 'Male'], n), 'Grade_Level': rng.integers(1, 4, n)})
+    for pre, post, _, _ in ASSESSMENT_PAIRS:
+        data[pre] = rng.integers(20, 60, n)
+        data[post] = data[pre] + rng.integers(0, 30, n)
+    return data
+
+
+def test_missing_group_key_rows_are_left_out():
+    data = _students()
+    data.loc[[1, 4], 'Gender'] = np.nan
+    data['Grade_Level'] = data['Grade_Level'].astype('Int64')
+    data.loc[7, 'Grade_Level'] = pd.NA
+    by = ['Gender', 'Grade_Level']
+    results = PairedTestAccumulator(by=by).update(data).results()
+    expected = PairedTestAccumulator(by=by).update(data.dropna(subset=by)).results()
+    pd.testing.assert_frame_equal(results, expected)
+    assert results.groupby(level='Assessment')['n'].sum().eq(9).all()
+
+
+def test_chunk_without_group_keys_adds_nothing():
+    data = _students()
+    accumulator = PairedTestAccumulator(by='Gender').update(data)
+    before = accumulator.sums.copy()
+    accumulator.update(data.assign(Gender=np.nan).head(3))
+    pd.testing.assert_frame_equal(accumulator.sums, before)
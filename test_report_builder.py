@@ -0,0 +1,60 @@
+import os
+import sqlite3
+
+import pytest
+
+from report_builder import REPORT_NAME, ReportBuilder, ReportSection
+
+
+def _render_rows(name):
+    def render(doc, tables, files):
+        doc.paragraph(f"{len(tables[name])} rows in {name}")
+    return render
+
+
+@pytest.fixture
+def report(tmp_path):
+    db_path = str(tmp_path / 'results.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute('CREATE TABLE scores (value INTEGER)')
+    conn.execute('CREATE TABLE themes (value TEXT)')
+    conn.executemany('INSERT INTO scores VALUES (?)', [(1,), (2,)])
+    conn.execute("INSERT INTO themes VALUES ('gamification')")
+    conn.commit()
+    conn.close()
+    sections = [ReportSection('scores', 'Scores', ['scores'], [], _render_rows('scores')),
+                ReportSection('themes', 'Themes', ['themes'], [], _render_rows('themes'))]
+
+    def build():
+        return ReportBuilder(db_path, str(tmp_path / 'report'), sections).build()
+    return db_path, str(tmp_path / 'report'), build
+
+
+def test_only_sections_with_changed_tables_are_rendered_again(report):
+    db_path, output_dir, build = report
+    rendered, reassembled = build()
+    assert sorted(rendered) == ['scores.md', 'scores.tex', 'themes.md', 'themes.tex']
+    assert reassembled
+    assert build() == ([], False)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute('INSERT INTO scores VALUES (3)')
+    conn.commit()
+    conn.close()
+    rendered, reassembled = build()
+    assert sorted(rendered) == ['scores.md', 'scores.tex']
+    assert reassembled
+    with open(os.path.join(output_dir, f'{REPORT_NAME}.md')) as f:
+        document = f.read()
+    assert '3 rows in scores' in document and '1 rows in themes' in document
+
+
+def test_missing_outputs_are_written_again(report):
+    _, output_dir, build = report
+    build()
+    os.remove(os.path.join(output_dir, 'sections', 'themes.tex'))
+    os.remove(os.path.join(output_dir, f'{REPORT_NAME}.md'))
+    rendered, reassembled = build()
+    assert rendered == ['themes.tex']
+    assert reassembled
+    assert os.path.exists(os.path.join(output_dir, f'{REPORT_NAME}.md'))
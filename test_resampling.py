@@ -0,0 +1,77 @@
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import resampling
+from data_ingestion import POST_COLUMNS, PRE_COLUMNS, VR_COLUMNS
+from derived_columns import DerivedFrame
+from resampling import _load_worker, _open_prepared, _prepare_shared, _run_block, resampling_table
+from score_matrix import SCORE_COLUMNS, write_score_matrix
+
+
+def _cohort(n, seed=0):
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({'Age': rng.integers(6, 13, n), 'Grade_Level': rng.integers(1, 7, n)})
+    for col in PRE_COLUMNS:
+        data[col] = rng.integers(10, 70, n)
+    for pre, post in zip(PRE_COLUMNS, POST_COLUMNS):
+        data[post] = data[pre] + rng.integers(0, 30, n)
+    for col in VR_COLUMNS:
+        data[col] = rng.integers(1, 6, n)
+    return data[SCORE_COLUMNS]
+
+
+def _matrix(tmp_path, n, name='scores'):
+    return write_score_matrix([_cohort(n)], str(tmp_path / name))
+
+
+def test_results_do_not_depend_on_workers(tmp_path, monkeypatch):
+    monkeypatch.setattr(resampling, 'BLOCK_CELLS', 200 * 50)
+    data = DerivedFrame(_cohort(200))
+    serial = resampling_table(data, n_resamples=300, seed=3, workers=1)
+    pooled = resampling_table(data, n_resamples=300, seed=3, workers=2)
+    pd.testing.assert_frame_equal(serial, pooled)
+
+
+def test_score_matrix_gives_the_frame_results(tmp_path, monkeypatch):
+    monkeypatch.setattr(resampling, 'PREPARE_ROWS', 64)
+    matrix = _matrix(tmp_path, 200)
+    expected = resampling_table(DerivedFrame(_cohort(200)), n_resamples=200, seed=1, workers=1)
+    pd.testing.assert_frame_equal(resampling_table(matrix, n_resamples=200, seed=1, workers=1), expected)
+    # The shared prepared columns are removed afterwards
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['scores', 'scores.json']
+
+
+def _worker_peak(tmp_path, n):
+    """Peak private (heap) memory of a worker mapping the shared columns and running one block of each kind"""
+    directory = tmp_path / f'prepared-{n}'
+    directory.mkdir()
+    _prepare_shared(_matrix(tmp_path, n, f'scores-{n}'), resampling.ASSESSMENT_PAIRS, resampling.REPORT_PAIRS,
+                    str(directory))
+    size = resampling._block_sizes(1000, n)[0]
+    k = len(resampling.ASSESSMENT_PAIRS)
+    prepared = _open_prepared(str(directory))
+    observed = resampling._statistics(np.ones((1, n)), prepared, k)[0]
+    tested = np.r_[observed[:k], observed[3 * k:]]
+    tracemalloc.start()
+    try:
+        _load_worker(str(directory))
+        _run_block(('bootstrap', np.random.SeedSequence(0), size, k))
+        _run_block(('permutation', np.random.SeedSequence(1), size, tested))
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        _load_worker(None)
+    return peak, prepared.columns.nbytes
+
+
+@pytest.mark.parametrize('cells', [1 << 16])
+def test_worker_memory_does_not_grow_with_the_cohort(tmp_path, monkeypatch, cells):
+    monkeypatch.setattr(resampling, 'BLOCK_CELLS', cells)
+    small, _ = _worker_peak(tmp_path, 4_000)
+    large, prepared_bytes = _worker_peak(tmp_path, 64_000)
+    # The prepared columns of the large cohort are mapped, never copied into the worker
+    assert large < prepared_bytes / 4
+    assert large < 2 * small
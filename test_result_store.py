@@ -0,0 +1,59 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from result_store import ResultStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultStore(str(tmp_path / 'results.db'))
+    yield store
+    store.close()
+
+
+def _tables(store):
+    return {row[0] for row in store.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def test_failed_stage_rolls_back_only_its_own_writes(store):
+    def good():
+        with store.transaction():
+            store.write_results('good', pd.DataFrame({'a': [1, 2]}))
+
+    def bad():
+        try:
+            with store.transaction():
+                store.write_results('bad', pd.DataFrame({'a': [1]}))
+                raise RuntimeError('stage failed')
+        except RuntimeError:
+            pass
+
+    with store.transaction():
+        store.write_results('before', pd.DataFrame({'a': [0]}))
+        threads = [threading.Thread(target=target) for target in (good, bad, good)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert {'before', 'good'} <= _tables(store)
+    assert 'bad' not in _tables(store)
+    assert len(pd.read_sql_query('SELECT * FROM good', store.conn)) == 2
+
+
+def test_outer_rollback_undoes_the_whole_run(store):
+    with pytest.raises(RuntimeError):
+        with store.transaction():
+            store.write_results('results', pd.DataFrame({'a': [1]}))
+            with store.transaction():
+                store.write_results('nested', pd.DataFrame({'a': [1]}))
+            raise RuntimeError('run failed')
+    assert not {'results', 'nested'} & _tables(store)
+
+
+def test_student_rows_are_upserted_and_read_in_chunks(store):
+    store.upsert_students(pd.DataFrame({'Student_ID': ['S1', 'S2', 'S3'], 'Age': [7, 8, 9]}))
+    store.upsert_students(pd.DataFrame({'Student_ID': ['S2'], 'Age': [10]}))
+    rows = pd.concat(store.read_students(['Student_ID', 'Age'], chunksize=2), ignore_index=True)
+    assert rows.sort_values('Student_ID')['Age'].tolist() == [7, 10, 9]
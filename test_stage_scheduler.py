@@ -0,0 +1,86 @@
+import threading
+
+import pytest
+
+from stage_scheduler import Stage, StageCache, StageScheduler
+
+
+class Pipeline:
+    def __init__(self):
+        self.calls = []
+        self.total = None
+        self.lock = threading.Lock()
+        self.release = threading.Event()
+
+    def step(self, name, result=None, wait=False):
+        def run():
+            if wait:
+                # Finishes after the stage declared below it has printed
+                self.release.wait(5)
+            with self.lock:
+                self.calls.append(name)
+            print(f"{name} ran")
+            return result
+        return run
+
+
+def _stages(pipeline, scale=2):
+    def total():
+        pipeline.total = 21 * scale
+        print("total computed")
+        pipeline.release.set()
+
+    return [
+        Stage('load', pipeline.step('load'), ['csv'], cacheable=False),
+        Stage('slow', pipeline.step('slow', wait=True), ['load']),
+        Stage('total', total, ['load'], params=[scale], outputs=['total']),
+        Stage('report', pipeline.step('report'), ['slow', 'total'])
+    ]
+
+
+def test_output_follows_declaration_order_and_unchanged_stages_are_skipped(tmp_path, capsys):
+    cache_path = str(tmp_path / 'stages.pkl')
+    pipeline = Pipeline()
+    assert StageScheduler(_stages(pipeline), pipeline, {'csv': 'v1'}, StageCache(cache_path), workers=2).run()
+    assert capsys.readouterr().out == "load ran\nslow ran\ntotal computed\nreport ran\n"
+    assert pipeline.total == 42
+
+    again = Pipeline()
+    scheduler = StageScheduler(_stages(again), again, {'csv': 'v1'}, StageCache(cache_path), workers=2)
+    assert scheduler.run()
+    assert again.calls == []
+    assert again.total == 42
+    assert set(scheduler.status.values()) == {'cached'}
+    # Skipped stages replay what they printed
+    assert capsys.readouterr().out == "load ran\nslow ran\ntotal computed\nreport ran\n"
+
+
+def test_changed_parameters_rerun_the_stage_and_its_dependents(tmp_path):
+    cache_path = str(tmp_path / 'stages.pkl')
+    pipeline = Pipeline()
+    pipeline.release.set()
+    StageScheduler(_stages(pipeline), pipeline, {'csv': 'v1'}, StageCache(cache_path), workers=1).run()
+
+    changed = Pipeline()
+    scheduler = StageScheduler(_stages(changed, scale=3), changed, {'csv': 'v1'}, StageCache(cache_path), workers=1)
+    assert scheduler.run()
+    assert sorted(changed.calls) == ['load', 'report']
+    assert scheduler.status['slow'] == 'cached'
+    assert changed.total == 63
+
+
+def test_failed_stage_blocks_its_dependents():
+    pipeline = Pipeline()
+    stages = [Stage('load', pipeline.step('load', result=False), ['csv']),
+              Stage('analyze', pipeline.step('analyze'), ['load']),
+              Stage('other', pipeline.step('other'), ['csv'])]
+    scheduler = StageScheduler(stages, pipeline, {'csv': 'v1'}, workers=1)
+    assert not scheduler.run()
+    assert scheduler.status == {'load': 'failed', 'analyze': 'blocked', 'other': 'done'}
+    assert 'analyze' not in pipeline.calls
+
+
+def test_undeclared_input_is_rejected():
+    pipeline = Pipeline()
+    with pytest.raises(ValueError, match='missing'):
+        StageScheduler([Stage('analyze', pipeline.step('analyze'), ['missing'])], pipeline, {'csv': 'v1'})
@@ -0,0 +1,39 @@
+import json
+
+import pytest
+
+from synthetic_cohort import EDUCATOR_SENTENCES, STUDENT_SENTENCES
+from transcript_nlp import THEME_KEYWORDS, codebook_agreement, extract_themes, tokenize, validation_transcripts
+
+
+def test_keywords_match_stems_and_phrases():
+    assert extract_themes(tokenize("The teachers kept repeating it.")) == ['repetitive practice', 'teacher support']
+    assert extract_themes(tokenize("It felt real in there.")) == []
+
+
+def test_agreement_counts_every_theme_decision():
+    codebook = {'a': ('apple*',), 'b': ('banana',)}
+    records = [{'Transcript': 'apples', 'Themes': ['a']}, {'Transcript': 'banana', 'Themes': ['a']}]
+    agreement = codebook_agreement(records, codebook)
+    assert agreement['precision'] == 0.5 and agreement['recall'] == 0.5
+    # 2 of 4 decisions agree; chance agreement is 1/2 as well
+    assert agreement['kappa'] == pytest.approx(0.0)
+
+
+def test_held_out_transcripts_are_new_text():
+    held_out = validation_transcripts()
+    texts = {record['Transcript'] for record in held_out}
+    seen = set()
+    for path in ['student_interview_data.json', 'educator_interview_data.json']:
+        with open(path, 'r') as f:
+            seen |= {interview['Transcript'] for interview in json.load(f)['interviews']}
+    seen |= {record['Transcript'] for record in validation_transcripts(split='development')}
+    seen |= {text for sentences in [STUDENT_SENTENCES, EDUCATOR_SENTENCES] for options in sentences.values()
+             for text in options}
+    assert len(held_out) >= 30 and not any(text in other or other in text for text in texts for other in seen)
+    assert all(set(record['Themes']) <= set(THEME_KEYWORDS) for record in held_out)
+
+
+def test_held_out_agreement_does_not_regress():
+    # Measured when the codebook was fixed (kappa 0.59); keyword coding misses paraphrases
+    assert codebook_agreement(validation_transcripts())['kappa'] >= 0.55
@@ -0,0 +1,251 @@
+import hashlib
+import json
+import os
+import pickle
+import re
+from collections import Counter
+
+from data_cache import CACHE_DIR
+from process_pool import process_pool
+
+# Bump when the tokenizer, codebook or scoring changes, so cached results are recomputed
+PIPELINE_VERSION = 2
+
+# Transcripts sent to a worker process per task
+BATCH_SIZE = 256
+
+STOPWORDS = frozenset("""
+a about after all also am an and any are as at be because been before being but by can could did didn't do
+does doing don't each even every for from had has have having he her here him his how i i'd i'm i've if in
+into is it it's its just like made make me more most much my no not now of on once only or other our out over
+own really same she so some such than that the their them then there these they this those through to too
+under until up us very was we were what when where which while who will with would you your
+""".split())
+
+# Theme codebook: every theme is flagged when a transcript contains one of its
+# keywords. Keywords match whole tokens, or token prefixes when they end in '*';
+# multi-word keywords match consecutive tokens. Keywords are general stems of
+# each theme's vocabulary, not phrases from the interviews; agreement with hand
+# coding is measured on the held-out transcripts of CODEBOOK_VALIDATION.
+THEME_KEYWORDS = {
+    'immersive experience': ('immers*', 'realistic*', 'lifelike', 'believab*', 'world*', 'village*', 'adventur*',
+                             'transport*', 'presence', 'actually there', 'being there', 'whole new'),
+    'gamification': ('game*', 'gamif*', 'play', 'plays', 'playing', 'played', 'reward*', 'badge*', 'trophy',
+                     'trophies', 'coin*', 'prize*', 'unlock*', 'points', 'leaderboard*', 'level up', 'win',
+                     'won', 'winning', 'round', 'rounds', 'compet*'),
+    'instant feedback': ('feedback', 'correct*', 'instant*', 'immediate*', 'right away', 'mistake*', 'fix*',
+                         'nudg*', 'notic*', 'tip', 'tips', 'hint*', 'mirror*'),
+    'confidence building': ('confiden*', 'proud', 'pride', 'embarrass*', 'shy', 'brave*', 'courage*',
+                            'nervous*', 'scared', 'afraid', 'fear*', 'hide', 'hiding', 'volunteer*', 'speak up',
+                            'spoke up'),
+    'social interaction': ('friend*', 'peer*', 'classmate*', 'community', 'conversation*', 'social*',
+                           'collaborat*', 'together', 'each other', 'partner*', 'group*', 'avatar*', 'chat*',
+                           'talk*', 'team*'),
+    'repetitive practice': ('repeat*', 'repetit*', 'practic*', 'again', 'over and over', 'redo*', 'retry*',
+                            'rehears*', 'drill*', 'review*'),
+    'contextual learning': ('context*', 'situation*', 'scenario*', 'everyday', 'daily life', 'real life',
+                            'real world', 'place*', 'park*', 'restaurant*', 'shop*', 'store*', 'grocer*',
+                            'doctor*', 'bus', 'librar*', 'famil*', 'home', 'environment*', 'trip*'),
+    'self-paced learning': ('pace*', 'own speed', 'own time', 'speed', 'rush*', 'skip*', 'as long as',
+                            'personali*', 'adapt*', 'individual*', 'flexib*'),
+    'visual clarity': ('3d', 'clear*', 'clarity', 'color*', 'colour*', 'bright*', 'picture*', 'visual*',
+                       'angle*', 'from the side', 'look at', 'detail*', 'view*', 'vivid*', 'sharp*'),
+    'progress and retention': ('progress*', 'improv*', 'remember*', 'retain*', 'retention', 'memor*', 'master*',
+                               'learned', 'knew', 'new words', 'better', 'faster', 'smooth*', 'growth', 'gain*'),
+    'teacher support': ('teacher*', 'tutor*', 'coach*', 'mentor*', 'instructor*', 'staff', 'ms', 'mr', 'mrs',
+                        'guid*', 'train*', 'workshop*', 'showed us'),
+    'controller difficulty': ('controller*', 'button*', 'grip*', 'joystick*', 'sensor*', 'hand unit*',
+                              'handheld*', 'tracking'),
+    'headset comfort': ('goggles', 'heavy', 'weigh*', 'slip*', 'slid*', 'too large', 'too big', 'calibrat*',
+                        'strap*', 'uncomfortabl*', 'tight*', 'bulky', 'press*', 'nose', 'hurt*', 'sweat*'),
+    'fatigue and discomfort': ('tired*', 'tiring', 'sleep*', 'dizz*', 'nause*', 'queasy', 'sick*', 'headache*',
+                               'sore', 'break', 'breaks', 'rest', 'resting', 'sit down', 'fatigu*', 'exhaust*',
+                               'strain*', 'ache*'),
+    'technical issues': ('technical*', 'glitch*', 'crash*', 'froze', 'freez*', 'bug*', 'restart*', 'reboot*',
+                         'lag', 'lagg*', 'error*', 'broke*', 'black', 'sync*', 'network*', 'losing', 'stopped',
+                         'not work*', "didn't work*", "wasn't work*", 'would not', "wouldn't"),
+    'need for assistance': ('assist*', 'aide*', 'adult*', 'reli*', 'rely*', 'by myself', 'needed help',
+                            'need help', 'needs help', 'help from', 'asked for help', 'ask for help'),
+}
+
+# Themes that record a difficulty rather than a benefit
+CONCERN_THEMES = frozenset({'controller difficulty', 'headset comfort', 'fatigue and discomfort',
+                            'technical issues', 'need for assistance'})
+
+# Hand-coded transcripts written after the codebook, for measuring its agreement;
+# shipped next to this module, so it is found from any working directory
+CODEBOOK_VALIDATION = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'codebook_validation.json')
+
+# TextBlob polarity bounds of the sentiment labels
+POSITIVE_POLARITY = 0.1
+NEGATIVE_POLARITY = -0.1
+# Transcripts raising this many concern themes are at most Neutral
+CONCERN_LIMIT = 2
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+def tokenize(text):
+    """Lower-case word tokens of `text`, apostrophes kept inside words"""
+    return _TOKEN.findall(text.lower())
+
+
+def content_terms(tokens):
+    """Tokens that are not stopwords or numbers"""
+    return [token for token in tokens if token not in STOPWORDS and not token.isdigit()]
+
+
+def _compile_codebook(codebook):
+    """One alternation regex per theme, matched against the space-joined tokens"""
+    patterns = {}
+    for theme, keywords in codebook.items():
+        alternatives = []
+        for keyword in keywords:
+            words = [re.escape(word) for word in tokenize(keyword.rstrip('*'))]
+            suffix = r"[a-z0-9']*" if keyword.endswith('*') else ''
+            alternatives.append(r' '.join(words) + suffix)
+        patterns[theme] = re.compile(r'(?:^| )(?:' + '|'.join(alternatives) + r')(?= |$)')
+    return patterns
+
+
+_THEME_PATTERNS = _compile_codebook(THEME_KEYWORDS)
+
+
+def extract_themes(tokens):
+    """Codebook themes mentioned in a token sequence, in codebook order"""
+    joined = ' '.join(tokens)
+    return [theme for theme, pattern in _THEME_PATTERNS.items() if pattern.search(joined)]
+
+
+def validation_transcripts(path=CODEBOOK_VALIDATION, split='held-out'):
+    """Hand-coded transcripts of one split of the codebook validation file"""
+    with open(path, 'r') as f:
+        return [record for record in json.load(f)['transcripts'] if record['Split'] == split]
+
+
+def codebook_agreement(records, codebook=None):
+    """
+    Agreement of the codebook with hand-coded themes over `records` (dicts
+    with 'Transcript' and 'Themes'): precision and recall of the flagged
+    themes and Cohen's kappa of the (transcript, theme) decisions
+    """
+    codebook = codebook or THEME_KEYWORDS
+    patterns = _THEME_PATTERNS if codebook is THEME_KEYWORDS else _compile_codebook(codebook)
+    both = flagged = coded = decisions = 0
+    for record in records:
+        joined = ' '.join(tokenize(record['Transcript']))
+        found = {theme for theme, pattern in patterns.items() if pattern.search(joined)}
+        expected = set(record['Themes'])
+        both += len(found & expected)
+        flagged += len(found)
+        coded += len(expected)
+        decisions += len(patterns)
+    observed = (decisions - flagged - coded + 2 * both) / decisions
+    chance = (flagged * coded + (decisions - flagged) * (decisions - coded)) / decisions ** 2
+    return {'transcripts': len(records), 'precision': both / flagged if flagged else float('nan'),
+            'recall': both / coded if coded else float('nan'), 'kappa': (observed - chance) / (1 - chance)}
+
+
+def sentiment_label(polarity, themes):
+    """Positive / Neutral / Negative from TextBlob polarity and the concern themes raised"""
+    if polarity <= NEGATIVE_POLARITY:
+        return 'Negative'
+    if polarity >= POSITIVE_POLARITY and sum(theme in CONCERN_THEMES for theme in themes) < CONCERN_LIMIT:
+        return 'Positive'
+    return 'Neutral'
+
+
+def analyze_batch(texts):
+    """Tokens, term counts, polarity, sentiment label and themes of every text in a batch"""
+    from textblob import TextBlob
+    results = []
+    for text in texts:
+        tokens = tokenize(text)
+        themes = extract_themes(tokens)
+        sentiment = TextBlob(text).sentiment
+        results.append({
+            'n_tokens': len(tokens),
+            'terms': Counter(content_terms(tokens)),
+            'polarity': sentiment.polarity,
+            'subjectivity': sentiment.subjectivity,
+            'sentiment': sentiment_label(sentiment.polarity, themes),
+            'themes': themes
+        })
+    return results
+
+
+def text_digest(text):
+    """Cache key of a transcript: its content hash under the current pipeline version"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{PIPELINE_VERSION}\0".encode())
+    digest.update(text.encode())
+    return digest.hexdigest()
+
+
+class TranscriptPipeline:
+    """
+    Batch transcript NLP with a content-hash result cache.
+
+    `run()` looks every transcript up by the hash of its text; only texts
+    not seen before (new or edited interviews) are tokenized, scored and
+    coded, in batches of `batch_size` spread over a process pool. Results
+    are kept in one pickle under `cache_dir` (None disables it), rewritten
+    atomically when new texts were processed. Identical texts are processed
+    once.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, workers=None, batch_size=BATCH_SIZE):
+        self.cache_path = os.path.join(cache_dir, 'transcript_nlp.pkl') if cache_dir else None
+        self.workers = workers
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+        self._results = self._load()
+
+    def _load(self):
+        if self.cache_path is None:
+            return {}
+        try:
+            with open(self.cache_path, 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = self.cache_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(self._results, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.cache_path)
+
+    def run(self, texts):
+        """Results for `texts`, in order"""
+        keys = [text_digest(text) for text in texts]
+        pending = {}
+        for key, text in zip(keys, texts):
+            if key not in self._results and key not in pending:
+                pending[key] = text
+        self.misses += len(pending)
+        self.hits += len(keys) - len(pending)
+
+        if pending:
+            texts_todo = list(pending.values())
+            batches = [texts_todo[i:i + self.batch_size] for i in range(0, len(texts_todo), self.batch_size)]
+            workers = self.workers
+            if workers is None:
+                workers = min(len(batches), os.cpu_count() or 1)
+            if workers <= 1 or len(batches) <= 1:
+                processed = [analyze_batch(batch) for batch in batches]
+            else:
+                with process_pool(workers) as pool:
+                    processed = list(pool.map(analyze_batch, batches))
+            self._results.update(zip(pending, (result for batch in processed for result in batch)))
+            if self.cache_path is not None:
+                self._save()
+        return [self._results[key] for key in keys]
+
+
+def analyze_transcripts(interviews, field='Transcript', pipeline=None):
+    """Pipeline results of the `field` text of every interview record"""
+    pipeline = pipeline or TranscriptPipeline()
+    return pipeline.run([interview.get(field) or '' for interview in interviews])
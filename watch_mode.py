@@ -0,0 +1,268 @@
+import asyncio
+import glob
+import json
+import os
+import shutil
+import time
+
+from data_cache import CACHE_DIR
+
+STUDENT_FILE = 'student_data.csv'
+STUDENT_INTERVIEWS = 'student_interview_data.json'
+EDUCATOR_INTERVIEWS = 'educator_interview_data.json'
+WATCH_STATE_FILE = os.path.join(CACHE_DIR, 'watch-state.pkl')
+# Seconds without further changes before an update starts
+DEFAULT_DEBOUNCE = 2.0
+DEFAULT_POLL_INTERVAL = 0.5
+PROCESSED_DIR = 'processed'
+REJECTED_DIR = 'rejected'
+
+
+def _interview_key(interview):
+    """Identity of an interview: student interviews by Interview_ID, educator ones by educator and date"""
+    if 'Educator_ID' in interview:
+        return ('educator', interview['Educator_ID'], interview.get('Interview_Date'))
+    return ('student', interview['Interview_ID'])
+
+
+def merge_interviews(path, interviews):
+    """
+    Merge `interviews` into the interview file at `path`: an interview with
+    the key of an existing one replaces it, others are appended. The file is
+    replaced atomically. Returns the number of interviews added or changed.
+    """
+    with open(path, 'r') as f:
+        document = json.load(f)
+    existing = {_interview_key(interview): i for i, interview in enumerate(document['interviews'])}
+    changed = 0
+    for interview in interviews:
+        i = existing.get(_interview_key(interview))
+        if i is None:
+            existing[_interview_key(interview)] = len(document['interviews'])
+            document['interviews'].append(interview)
+        elif document['interviews'][i] == interview:
+            continue
+        else:
+            document['interviews'][i] = interview
+        changed += 1
+    if changed:
+        with open(path + '.tmp', 'w') as f:
+            json.dump(document, f, indent=2, ensure_ascii=False)
+        os.replace(path + '.tmp', path)
+    return changed
+
+
+def append_student_rows(csv_file, export):
+    """
+    Append the rows of the CSV `export` to `csv_file`; both must have the same
+    header. The bytes are copied as they are, so validation and the
+    incremental statistics see the rows exactly as exported. Returns the
+    number of rows appended.
+    """
+    with open(csv_file, 'rb') as f:
+        header = f.readline()
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size:
+            f.seek(size - 1)
+            last = f.read(1)
+    with open(export, 'rb') as f:
+        if f.readline().strip() != header.strip():
+            raise ValueError(f"header of {export} does not match {csv_file}")
+        rows = f.read()
+    if rows and not rows.endswith(b'\n'):
+        rows += b'\n'
+    with open(csv_file, 'ab') as f:
+        if size and last != b'\n':
+            f.write(b'\n')
+        f.write(rows)
+    return rows.count(b'\n')
+
+
+class AnalysisWatcher:
+    """
+    Long-running watch mode of the detailed analysis.
+
+    An asyncio task polls the sizes and mtimes of the student CSV, the
+    interview files and, if given, a drop directory. Every change restarts
+    a `debounce`-second timer, so a burst of writes leads to one update once
+    the files are quiet. An update first ingests the drop directory: student
+    exports (*.csv) are appended to the student CSV and interview files
+    (*.json) merged into the student or educator interviews, then the files
+    move to `processed/` (or `rejected/`). It then runs the detailed
+    pipeline on a worker thread, which recomputes only what changed:
+    incremental state folds just the appended rows into the statistics and
+    subgroup accumulators, the stage DAG reruns only stages whose inputs
+    changed (new interviews leave the student statistics alone), the
+    figure cache re-renders only figures whose data changed and the report
+    builder rewrites only changed sections.
+    """
+
+    def __init__(self, drop_dir=None, csv_file=STUDENT_FILE, state_file=WATCH_STATE_FILE, debounce=DEFAULT_DEBOUNCE,
+                 poll_interval=DEFAULT_POLL_INTERVAL, report=False, analysis_options=None):
+        self.drop_dir = drop_dir
+        self.csv_file = csv_file
+        self.state_file = state_file
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.report = report
+        self.analysis_options = analysis_options or {}
+        self.updates = 0
+        self._timer = None
+        self._due = None
+        self._ingesting = False
+        self._seen = {}
+
+    def watched_files(self):
+        files = [self.csv_file, STUDENT_INTERVIEWS, EDUCATOR_INTERVIEWS]
+        if self.drop_dir:
+            files += sorted(glob.glob(os.path.join(self.drop_dir, '*.csv')) +
+                            glob.glob(os.path.join(self.drop_dir, '*.json')))
+        return files
+
+    def snapshot(self):
+        """(size, mtime) of every watched file; a missing file maps to None"""
+        state = {}
+        for path in self.watched_files():
+            try:
+                st = os.stat(path)
+                state[path] = (st.st_size, st.st_mtime_ns)
+            except OSError:
+                state[path] = None
+        return state
+
+    def ingest(self):
+        """Move the drop directory's exports into the inputs; returns (rows appended, interviews merged)"""
+        rows = interviews = 0
+        if not self.drop_dir:
+            return rows, interviews
+        for path in sorted(glob.glob(os.path.join(self.drop_dir, '*.csv')), key=os.path.getmtime):
+            try:
+                rows += append_student_rows(self.csv_file, path)
+            except (OSError, ValueError) as e:
+                print(f"✗ {os.path.basename(path)} not ingested: {e}")
+                self._archive(path, REJECTED_DIR)
+                continue
+            self._archive(path, PROCESSED_DIR)
+        for path in sorted(glob.glob(os.path.join(self.drop_dir, '*.json')), key=os.path.getmtime):
+            try:
+                with open(path, 'r') as f:
+                    document = json.load(f)
+                dropped = document['interviews'] if isinstance(document, dict) else document
+                educators = [interview for interview in dropped if 'Educator_ID' in interview]
+                students = [interview for interview in dropped if 'Educator_ID' not in interview]
+                interviews += merge_interviews(STUDENT_INTERVIEWS, students) if students else 0
+                interviews += merge_interviews(EDUCATOR_INTERVIEWS, educators) if educators else 0
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                print(f"✗ {os.path.basename(path)} not ingested: {e}")
+                self._archive(path, REJECTED_DIR)
+                continue
+            self._archive(path, PROCESSED_DIR)
+        return rows, interviews
+
+    def _archive(self, path, folder):
+        target = os.path.join(self.drop_dir, folder)
+        os.makedirs(target, exist_ok=True)
+        shutil.move(path, os.path.join(target, f"{time.strftime('%Y%m%dT%H%M%S')}-{os.path.basename(path)}"))
+
+    def analyze(self):
+        """One incremental run of the detailed pipeline (and the report); returns True if it completed"""
+        from detailed_data_analysis import DetailedDataAnalysis
+        options = dict(self.analysis_options)
+        run_options = {key: options.pop(key) for key in ['figures', 'profile', 'workers', 'resamples', 'seed',
+                                                         'stage_workers'] if key in options}
+        analyzer = DetailedDataAnalysis(self.csv_file, state_file=self.state_file, **options)
+        try:
+            completed = analyzer.run_complete_analysis(**run_options)
+        finally:
+            analyzer.close()
+        if completed and self.report:
+            from report_builder import ReportBuilder
+            rendered, reassembled = ReportBuilder(analyzer.store.db_path).build()
+            print(f"✓ Report {'updated' if reassembled else 'unchanged'} in report/ "
+                  f"({len(rendered)} sections regenerated)")
+        return completed
+
+    async def update(self):
+        """Ingest the drop directory, then run the analysis on a worker thread"""
+        self._ingesting = True
+        try:
+            rows, interviews = await asyncio.to_thread(self.ingest)
+            # The update's own writes are not changes to react to
+            self._seen = self.snapshot()
+        finally:
+            self._ingesting = False
+        self.updates += 1
+        print(f"\n── Update {self.updates} at {time.strftime('%H:%M:%S')}: "
+              f"{rows} dropped student rows, {interviews} dropped interviews")
+        return await asyncio.to_thread(self.analyze)
+
+    def _changed(self):
+        """Restart the debounce timer"""
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(self.debounce, self._due.set)
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if self._ingesting:
+                continue
+            current = self.snapshot()
+            if current != self._seen:
+                self._seen = current
+                self._changed()
+
+    async def run(self, max_updates=None):
+        """Update now, then after every quiet period following a change (until `max_updates` updates)"""
+        self._due = asyncio.Event()
+        self._seen = self.snapshot()
+        await self.update()
+        poller = asyncio.create_task(self._poll())
+        try:
+            while max_updates is None or self.updates < max_updates:
+                await self._due.wait()
+                self._due.clear()
+                await self.update()
+        finally:
+            poller.cancel()
+            if self._timer is not None:
+                self._timer.cancel()
+
+
+if __name__ == "__main__":
+    import argparse
+    from figure_rendering import DETAILED_FIGURES, RESOLUTION_PROFILES
+    from resampling import DEFAULT_RESAMPLES
+    parser = argparse.ArgumentParser(description="Keep the detailed analysis up to date as student exports and "
+                                                 "interviews arrive")
+    parser.add_argument('--drop-dir', default=None,
+                        help="directory to ingest *.csv student exports and *.json interview files from")
+    parser.add_argument('--state-file', default=WATCH_STATE_FILE, help="incremental statistics of the student CSV")
+    parser.add_argument('--debounce', type=float, default=DEFAULT_DEBOUNCE,
+                        help="seconds without further changes before an update starts")
+    parser.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL,
+                        help="seconds between checks of the watched files")
+    parser.add_argument('--once', action='store_true', help="ingest and update once, then exit")
+    parser.add_argument('--report', action='store_true', help="also update the report in report/ after every run")
+    parser.add_argument('--figures', nargs='+', choices=list(DETAILED_FIGURES), default=None, metavar='NAME',
+                        help="render only these figures")
+    parser.add_argument('--profile', choices=list(RESOLUTION_PROFILES), default='print',
+                        help="figure resolution profile")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="figure rendering, resampling and transcript NLP processes")
+    parser.add_argument('--resamples', type=int, default=DEFAULT_RESAMPLES,
+                        help="bootstrap and permutation resamples for inference (0 skips them)")
+    args = parser.parse_args()
+
+    watcher = AnalysisWatcher(args.drop_dir, state_file=args.state_file, debounce=args.debounce,
+                              poll_interval=args.poll_interval, report=args.report,
+                              analysis_options={'figures': args.figures, 'profile': args.profile,
+                                                'workers': args.workers, 'resamples': args.resamples})
+    if not args.once:
+        print(f"Watching {', '.join(watcher.watched_files()[:3])}"
+              + (f" and {args.drop_dir}/" if args.drop_dir else '') + " (Ctrl+C stops)")
+    try:
+        asyncio.run(watcher.run(max_updates=1 if args.once else None))
+    except KeyboardInterrupt:
+        print(f"\n✓ Watch mode stopped after {watcher.updates} updates")